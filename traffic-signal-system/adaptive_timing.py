@@ -0,0 +1,143 @@
+import math
+import threading
+
+from phase_plan import make_plan
+
+# ADAPTIVE SIGNAL TIMING
+# Replaces the fixed 5 s green / 3 s yellow splits with splits recomputed once
+# per cycle from measured demand. Vehicle counts per approach (signal requests,
+# detector events from detectors.py) accumulate in a DemandMeter; at each cycle boundary they are
+# smoothed into flow rates and Webster's method sizes the next cycle:
+#   y_k = max(flow / saturation flow) over the approaches phase k serves
+#   C   = (1.5 L + 5) / (1 - Y)       L = lost time, Y = sum of y_k
+#   green_k = (C - sum of yellows) * y_k / Y
+# clamped to safe minimum/maximum greens and cycle lengths. The work is a few
+# operations per phase, whatever the traffic volume. Each new plan starts at the
+# boundary its predecessor ended on, so the change never cuts a phase short.
+
+SATURATION_FLOW = 0.5      # Vehicles per second one approach discharges while green
+LOST_TIME_PER_PHASE = 4.0  # Seconds of start-up and clearance lost per phase
+MIN_GREEN = 5.0            # Seconds - never shorter than the fixed plan's green
+MAX_GREEN = 60.0
+MIN_CYCLE = 16.0           # Seconds - the fixed plan's cycle
+MAX_CYCLE = 120.0
+MAX_DEGREE_OF_SATURATION = 0.9  # Y is capped here - beyond it Webster's cycle length diverges
+DEMAND_SMOOTHING = 0.3     # Weight of the latest cycle in the smoothed flow rates
+
+
+class DemandMeter:
+    """Vehicle counts per approach (signals 1-4), smoothed into flow rates once per cycle"""
+
+    def __init__(self, smoothing=DEMAND_SMOOTHING):
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.counts = [0, 0, 0, 0]   # Since the last cycle closed
+        self.reported = [0, 0, 0, 0]  # Since take_counts() last drained them
+        self.flows = None            # Smoothed vehicles/s per approach, None until the first cycle closes
+
+    def add(self, approach, count=1):
+        """Record count vehicles demanding approach 1-4"""
+        with self.lock:
+            self.counts[approach - 1] += count
+            self.reported[approach - 1] += count
+
+    def record(self, counts):
+        """Record per-approach vehicle counts measured on this node (a detector batch)"""
+        with self.lock:
+            for i, count in enumerate(counts):
+                self.counts[i] += count
+                self.reported[i] += count
+
+    def add_counts(self, counts):
+        """Merge per-approach counts measured elsewhere (another replica)"""
+        with self.lock:
+            for i, count in enumerate(counts):
+                self.counts[i] += count
+
+    def take_counts(self):
+        """Counts recorded since the last call - what a replica reports to the PRIMARY"""
+        with self.lock:
+            counts, self.reported = self.reported, [0, 0, 0, 0]
+            return counts
+
+    def close_cycle(self, seconds):
+        """Fold the counts of a cycle lasting seconds into the smoothed flows; returns the flows"""
+        with self.lock:
+            measured = [count / seconds for count in self.counts] if seconds > 0 else [0.0] * 4
+            self.counts = [0, 0, 0, 0]
+            if self.flows is None:
+                self.flows = measured
+            else:
+                self.flows = [flow + self.smoothing * (rate - flow) for flow, rate in zip(self.flows, measured)]
+            return list(self.flows)
+
+
+def webster_splits(flows, phases, saturation_flow=SATURATION_FLOW, lost_time=LOST_TIME_PER_PHASE,
+                   min_green=MIN_GREEN, max_green=MAX_GREEN, min_cycle=MIN_CYCLE, max_cycle=MAX_CYCLE):
+    """Phases with green times sized by Webster's method for flows (vehicles/s of signals 1-4)
+
+    Without measured demand the phases are returned unchanged.
+    """
+    ratios = [max(flows[signal - 1] for signal in phase['signals']) / saturation_flow for phase in phases]
+    total = sum(ratios)
+    if total <= 0:
+        return tuple(dict(phase) for phase in phases)
+    total_ratio = min(total, MAX_DEGREE_OF_SATURATION)
+    cycle = (1.5 * lost_time * len(phases) + 5) / (1 - total_ratio)
+    cycle = min(max(cycle, min_cycle), max_cycle)
+    effective = cycle - sum(phase['yellow'] for phase in phases)
+    # Whole seconds: small demand fluctuations keep the same plan (and plan version)
+    return tuple(dict(phase, green=float(min(max(round(effective * ratio / total), min_green), max_green)))
+                 for phase, ratio in zip(phases, ratios))
+
+
+class AdaptiveTimingEngine:
+    """Recomputes the timing plan from measured demand at every cycle boundary"""
+
+    def __init__(self, plan, meter=None, **limits):
+        self.plan = plan
+        self.meter = meter or DemandMeter()
+        self.limits = limits  # Keyword overrides for webster_splits
+        self.cycle_start = None  # Boundary the current plan's cycle started at
+        self.cycle_end = None
+        self.plans_built = 0
+        self.changes = 0
+
+    def boundaries(self, now):
+        """(start, end) of the current plan's cycle containing now"""
+        cycles = math.floor((now - self.plan['epoch']) / self.plan['cycle_length'])
+        start = self.plan['epoch'] + cycles * self.plan['cycle_length']
+        return start, start + self.plan['cycle_length']
+
+    def due(self, now):
+        """True once the cycle in progress has ended"""
+        if self.cycle_end is None:
+            self.cycle_start, self.cycle_end = self.boundaries(now)
+        return now >= self.cycle_end
+
+    def next_plan(self, now):
+        """Close the measured cycle and return the plan starting at the latest boundary"""
+        boundary = self.boundaries(now)[0]
+        flows = self.meter.close_cycle(boundary - self.cycle_start)
+        phases = webster_splits(flows, self.plan['phases'], **self.limits)
+        plan = make_plan(phases, epoch=boundary)
+        self.plans_built += 1
+        if [phase['green'] for phase in phases] != [phase['green'] for phase in self.plan['phases']]:
+            self.changes += 1
+        self.adopt(plan)
+        return plan
+
+    def adopt(self, plan):
+        """Continue from a plan built here or elsewhere (restored from the journal, pushed by the PRIMARY)"""
+        self.plan = plan
+        self.cycle_start = plan['epoch']
+        self.cycle_end = plan['epoch'] + plan['cycle_length']
+
+    def get_stats(self):
+        return {
+            'adaptive_cycle_length': self.plan['cycle_length'],
+            'adaptive_greens': [phase['green'] for phase in self.plan['phases']],
+            'adaptive_flows': [round(flow, 4) for flow in self.meter.flows or (0.0, 0.0, 0.0, 0.0)],
+            'adaptive_plans_built': self.plans_built,
+            'adaptive_plan_changes': self.changes
+        }
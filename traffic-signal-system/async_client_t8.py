@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+import xmlrpc.client
+from collections import deque
+from urllib.parse import urlsplit
+
+from bootstrap import BALANCER_URL
+from hlc import HLC_HEADER, HybridLogicalClock, encode
+
+# ASYNC VEHICLE CONTROLLER
+# Drives many simulated junction controllers from one process. Instead of a
+# thread + blocking ServerProxy per request, all controllers share a small pool
+# of keep-alive HTTP/1.1 connections to the load balancer and pipeline their
+# calls: requests are written as soon as they are issued and responses are
+# matched back in order, so a connection is never idle waiting for a round trip.
+# The balancer serves each connection on one thread, so the calls pipelined on
+# one connection still run one after another there - a slow call (a
+# get_next_message waiting for the next event) holds up everything queued
+# behind it. Spreading controllers over several connections keeps that
+# head-of-line blocking to one connection's share of them.
+# Requests follow the demand model of workload.py (per-approach Poisson
+# arrivals shaped by a time-of-day curve), as client_t8 does.
+
+DEFAULT_URL = BALANCER_URL
+DEFAULT_CONNECTIONS = 4
+DEMAND_WINDOW = 4.0  # Seconds of arrivals per cycle when controllers don't think between cycles
+
+
+class PipelinedXMLRPCClient:
+    """Asyncio XML-RPC client pipelining calls over one keep-alive connection"""
+
+    def __init__(self, url=DEFAULT_URL, depth=64, clock=None):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        self.clock = clock                      # HLC carried in the X-HLC header
+        self.window = asyncio.Semaphore(depth)  # Max requests in flight on the connection
+        self.write_lock = asyncio.Lock()
+        self.reader = None
+        self.writer = None
+        self.in_flight = deque()                # Futures in request order - HTTP/1.1 replies in order
+        self.keep_alive = True                  # False once the server turns out to close connections
+        self.read_tasks = set()                 # Keep response readers referenced while they run
+        self.calls = 0
+        self.connections = 0
+
+    def _request(self, method, params):
+        body = xmlrpc.client.dumps(tuple(params), method, allow_none=True).encode()
+        headers = [f"POST {self.path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                   "Content-Type: text/xml", f"Content-Length: {len(body)}"]
+        if self.clock:
+            headers.append(f"{HLC_HEADER}: {encode(self.clock.now())}")
+        if not self.keep_alive:
+            headers.append("Connection: close")
+        return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.in_flight = deque()
+        task = asyncio.create_task(self._read_loop(self.reader, self.writer, self.in_flight))
+        self.read_tasks.add(task)
+        task.add_done_callback(self.read_tasks.discard)
+        self.connections += 1
+
+    async def _read_response(self, reader):
+        """Read one HTTP response; returns (status line, headers, body)"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        return status_line.decode().strip(), headers, body
+
+    async def _read_loop(self, reader, writer, in_flight):
+        """Resolve in-flight calls with responses in arrival (= request) order"""
+        error = ConnectionResetError("connection closed by server")
+        try:
+            while True:
+                status_line, headers, body = await self._read_response(reader)
+                future = in_flight.popleft()
+                if self.clock:
+                    self.clock.receive_header(headers.get(HLC_HEADER.lower()))
+                version, status = status_line.split(" ", 2)[:2]
+                if future.done():
+                    pass  # Caller was cancelled - response discarded
+                elif status != "200":
+                    future.set_exception(xmlrpc.client.ProtocolError(self.host, int(status), status_line, headers))
+                else:
+                    try:
+                        future.set_result(xmlrpc.client.loads(body, use_builtin_types=True)[0][0])
+                    except xmlrpc.client.Fault as e:
+                        future.set_exception(e)
+                if headers.get("connection", "").lower() == "close" or version == "HTTP/1.0":
+                    # Server does not keep connections alive - it never read any pipelined requests
+                    self.keep_alive = False
+                    break
+        except Exception as e:
+            error = e if isinstance(e, ConnectionResetError) else ConnectionResetError(str(e))
+        finally:
+            writer.close()
+            if self.writer is writer:
+                self.reader = self.writer = None
+            while in_flight:
+                future = in_flight.popleft()
+                if not future.done():
+                    future.set_exception(error)
+
+    async def call(self, method, *params):
+        """Issue one RPC; concurrent calls are pipelined on the shared connection"""
+        async with self.window:
+            for attempt in range(3):
+                future = asyncio.get_running_loop().create_future()
+                async with self.write_lock:
+                    if self.writer is None:
+                        await self._connect()
+                    self.in_flight.append(future)
+                    self.writer.write(self._request(method, params))
+                    await self.writer.drain()
+                    if not self.keep_alive:
+                        self.reader = self.writer = None  # One request per connection from now on
+                try:
+                    result = await future
+                    self.calls += 1
+                    return result
+                except ConnectionResetError:
+                    if self.keep_alive or attempt == 2:
+                        raise
+                    # Server closes after each reply: the request was never read - safe to resend
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+def generate_signal_requests(demand, window):
+    """Signals requested by vehicles arriving in the next window seconds - same demand model as client_t8"""
+    from workload import seconds_of_day  # workload imports this module - import it on use
+    return demand.approaches_in_window(window, seconds_of_day())
+
+
+class ControllerStats:
+    """Aggregate request counts and change latencies across simulated controllers"""
+
+    def __init__(self):
+        self.changes = 0
+        self.denied = 0
+        self.errors = 0
+        self.messages = 0
+        self.status_reads = 0
+        self.latencies = []
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_controller(client, junction_id, stats, deadline, think_time, drain, demand):
+    """One simulated junction controller: request changes, drain the change sequence, repeat"""
+    subscriber_id = f"Async Junction {junction_id}-{os.getpid()}"
+    await asyncio.sleep(random.uniform(0, think_time))  # Spread controllers out
+    while time.time() < deadline:
+        for signal_id in generate_signal_requests(demand, think_time or DEMAND_WINDOW):
+            start = time.perf_counter()
+            try:
+                if not await client.call("signal_manipulator", signal_id):
+                    stats.denied += 1
+                    continue
+                while drain and time.time() < deadline:
+                    msg = await client.call("get_next_message", subscriber_id)
+                    if msg is None:
+                        break
+                    stats.messages += 1
+                stats.changes += 1
+                stats.latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                stats.errors += 1
+                print(f"❌ Junction {junction_id}: signal {signal_id} failed: {e}")
+        await asyncio.sleep(think_time)
+
+
+async def run_status_monitor(client, stats, deadline, interval):
+    """Cheap status reads interleaved with the change traffic on the same connection"""
+    while time.time() < deadline:
+        try:
+            await asyncio.gather(client.call("get_signal_status"), client.call("get_active_signal"))
+            stats.status_reads += 2
+        except Exception:
+            stats.errors += 1
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    from workload import DemandGenerator, DemandProfile
+    demand = DemandGenerator(DemandProfile([float(rate) for rate in args.approach_rates.split(",")], args.profile))
+    clock = HybridLogicalClock()
+    clients = [PipelinedXMLRPCClient(args.url, depth=args.depth, clock=clock) for _ in range(args.connections)]
+    stats = ControllerStats()
+    deadline = time.time() + args.duration
+    start = time.perf_counter()
+
+    tasks = [run_controller(clients[i % len(clients)], i + 1, stats, deadline, args.think_time, not args.no_drain,
+                            demand)
+             for i in range(args.controllers)]
+    tasks += [run_status_monitor(client, stats, deadline, args.status_interval) for client in clients]
+    await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - start
+    total_calls = sum(client.calls for client in clients)
+    for client in clients:
+        await client.close()
+
+    print("\n" + "=" * 80)
+    print("📊 ASYNC VEHICLE CONTROLLER RESULTS")
+    print(f"   🚦 Controllers: {args.controllers} | Connections: {args.connections} | "
+          f"Pipeline depth: {args.depth}")
+    print(f"   ⏱️ Duration: {elapsed:.1f}s | RPCs: {total_calls} | Throughput: {total_calls / elapsed:.1f} req/s")
+    print(f"   ✅ Signal changes: {stats.changes} | 🚫 Denied: {stats.denied} | ❌ Errors: {stats.errors}")
+    print(f"   🚗 Messages drained: {stats.messages} | 📊 Status reads: {stats.status_reads}")
+    if stats.latencies:
+        print(f"   ⚡ Change latency: p50 {stats.percentile(50) * 1000:.1f} ms | "
+              f"p95 {stats.percentile(95) * 1000:.1f} ms | max {max(stats.latencies) * 1000:.1f} ms")
+    print(f"   🔌 Connections opened: {sum(client.connections for client in clients)}")
+    print("=" * 80)
+
+
+def main():
+    from workload import DEFAULT_APPROACH_RATES, TIME_OF_DAY_PROFILES
+    parser = argparse.ArgumentParser(description="Asyncio vehicle controller driving many junctions")
+    parser.add_argument("--url", default=DEFAULT_URL, help="load balancer URL")
+    parser.add_argument("--controllers", type=int, default=50, help="simulated junction controllers")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS,
+                        help="keep-alive connections the controllers are spread over")
+    parser.add_argument("--depth", type=int, default=64, help="max pipelined requests per connection")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--think-time", type=float, default=4.0, help="seconds between a controller's cycles")
+    parser.add_argument("--status-interval", type=float, default=0.5, help="seconds between status reads")
+    parser.add_argument("--no-drain", action="store_true", help="don't read the change message sequence")
+    parser.add_argument("--profile", default="flat", choices=sorted(TIME_OF_DAY_PROFILES),
+                        help="time-of-day demand curve")
+    parser.add_argument("--approach-rates", default=",".join(map(str, DEFAULT_APPROACH_RATES)),
+                        help="vehicle arrivals per second per approach 1-4 (comma-separated)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🚗 ASYNC FOUR-WAY VEHICLE CONTROLLER - PIPELINED KEEP-ALIVE CONNECTIONS 🚙")
+    print(f"📡 {args.controllers} junction controllers via {args.url}")
+    print("=" * 80)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\n🛑 Async vehicle controller stopped manually.")
+
+
+if __name__ == "__main__":
+    main()
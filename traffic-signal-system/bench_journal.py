@@ -0,0 +1,111 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import signal_server
+from journal import StateJournal
+
+# JOURNAL BENCHMARK - write throughput and recovery time
+# Appends N server-like events through the batched fsync policy, applying each
+# to the real server state, and snapshots it with signal_server.capture_state()
+# as the server does. Then measures restart recovery both from the full journal
+# and from a snapshot + tail.
+
+
+def make_event(i):
+    """Build a representative journal event (mostly requests, some signal changes)"""
+    if i % 10 == 0:
+        return "signal_change", {'signal': i % 4 + 1}
+    return "request", {
+        'request_id': i,
+        'timestamp': i,
+        'client_id': f"Vehicle Controller-{i % 32}",
+        'requested_signal': i % 4 + 1,
+        'is_vip': i % 100 == 0,
+        'time': "12:00:00.000",
+        'server': 'PRIMARY'
+    }
+
+
+def run_writes(directory, events, snapshot_every):
+    """Append events and return (seconds, journal stats, longest snapshot lock hold, snapshot write seconds)"""
+    journal = StateJournal("bench", directory=directory, snapshot_every=snapshot_every).open()
+    longest_hold = snapshot_writes = 0.0
+    start = time.perf_counter()
+    for i in range(1, events + 1):
+        event_type, data = make_event(i)
+        signal_server.apply_journal_event(event_type, data)
+        journal.append(event_type, data)
+        if journal.should_snapshot():
+            # What the request path pays (under the server lock) vs. the background write
+            held = time.perf_counter()
+            with signal_server.lock:
+                state = signal_server.capture_state()
+                seq = journal.begin_snapshot()
+            written = time.perf_counter()
+            journal.write_snapshot(state, seq)
+            longest_hold = max(longest_hold, written - held)
+            snapshot_writes += time.perf_counter() - written
+    journal.sync()
+    duration = time.perf_counter() - start
+    stats = journal.get_stats()
+    journal.close()
+    return duration, stats, longest_hold, snapshot_writes
+
+
+def run_recovery(directory):
+    """Replay the journal as a restarting server would and return (seconds, events replayed)"""
+    journal = StateJournal("bench", directory=directory)
+    start = time.perf_counter()
+    replayed = journal.replay(signal_server.apply_snapshot, signal_server.apply_journal_event)
+    return time.perf_counter() - start, replayed
+
+
+def reset_server_state():
+    """Empty the request state the previous run left in the server module"""
+    signal_server.request_history.clear()
+    signal_server.request_totals.update(requests=0, vip=0)
+    signal_server.current_request_id = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark state journal throughput and recovery")
+    parser.add_argument("--events", type=int, default=1_000_000, help="events to append")
+    parser.add_argument("--snapshot-every", type=int, default=150_000, help="events between snapshots")
+    parser.add_argument("--dir", default=None, help="journal directory (default: temporary)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="journal-bench-")
+    print("=" * 60)
+    print("💾 STATE JOURNAL BENCHMARK")
+    print(f"   Events: {args.events:,} | Directory: {directory}")
+    print("=" * 60)
+
+    try:
+        for label, snapshot_every in (("journal only", args.events + 1), ("with snapshots", args.snapshot_every)):
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+
+            reset_server_state()
+            write_time, stats, longest_hold, snapshot_writes = run_writes(directory, args.events, snapshot_every)
+            journal_size = os.path.getsize(os.path.join(directory, "bench.journal"))
+            reset_server_state()
+            recovery_time, replayed = run_recovery(directory)
+
+            print(f"\n📊 {label.upper()}:")
+            print(f"   ✍️ Write: {write_time:.2f}s ({args.events / write_time:,.0f} events/s, "
+                  f"{stats['journal_fsyncs']} fsyncs, {stats['journal_snapshots']} snapshots)")
+            if stats['journal_snapshots']:
+                print(f"   📸 Snapshots: longest lock hold {longest_hold * 1000:.2f} ms, "
+                      f"{snapshot_writes / stats['journal_snapshots'] * 1000:.2f} ms each written in the background")
+            print(f"   📁 Journal tail on disk: {journal_size / 1e6:.1f} MB")
+            print(f"   🔄 Recovery: {recovery_time:.2f}s ({replayed:,} events replayed)")
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import xmlrpc.client
+
+# MULTI-PROCESS SERVER SCALING BENCHMARK
+# Starts server_t8_1.py in single-process mode and in pre-fork mode with 1..N
+# workers, drives it with a read-heavy RPC mix from several client processes,
+# and reports throughput for each configuration.
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server_t8_1.py")
+
+# Read-heavy mix: (method, weight)
+RPC_MIX = (
+    ("get_signal_status", 45),
+    ("get_active_signal", 45),
+    ("get_countdown_info", 10),
+)
+
+
+def client_worker(url, duration, seed, results):
+    """Closed-loop client: issue the RPC mix back to back for duration seconds"""
+    rng = random.Random(seed)
+    methods = [name for name, weight in RPC_MIX for _ in range(weight)]
+    server = xmlrpc.client.ServerProxy(url, allow_none=True)
+    completed = errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        try:
+            getattr(server, rng.choice(methods))()
+            completed += 1
+        except Exception:
+            errors += 1
+    results.put((completed, errors))
+
+
+def wait_until_ready(url, timeout=15):
+    """Poll the server until it answers or the timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            xmlrpc.client.ServerProxy(url, allow_none=True).get_signal_status()
+            return True
+        except Exception:
+            time.sleep(0.1)
+    return False
+
+
+def run_configuration(port, workers, clients, duration, journal_dir):
+    """Start a server with the given worker count, load it, and return (rps, errors)"""
+    env = dict(os.environ, TRAFFIC_JOURNAL_DIR=journal_dir)
+    env.pop("TRAFFIC_SHARED_STATE", None)
+    process = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT, "--port", str(port), "--workers", str(workers), "--clock", "host"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env
+    )
+    url = f"http://127.0.0.1:{port}/"
+    try:
+        if not wait_until_ready(url):
+            raise RuntimeError(f"server with {workers} workers did not start")
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=client_worker, args=(url, duration, i, results))
+                 for i in range(clients)]
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        completed = sum(t[0] for t in totals)
+        errors = sum(t[1] for t in totals)
+        return completed / duration, errors
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark multi-process server scaling")
+    parser.add_argument("--max-workers", type=int, default=cores, help="largest worker count to test")
+    parser.add_argument("--clients", type=int, default=max(4, cores * 2), help="client processes")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per configuration")
+    parser.add_argument("--port", type=int, default=18000, help="base port for test servers")
+    args = parser.parse_args()
+
+    worker_counts = [0] + sorted({w for w in (1, 2, 4, 8, 16, 32, args.max_workers) if w <= args.max_workers})
+    print("=" * 60)
+    print("🚀 MULTI-PROCESS SERVER SCALING BENCHMARK")
+    print(f"   Cores: {cores} | Clients: {args.clients} | Duration: {args.duration}s per run")
+    print(f"   Mix: " + ", ".join(f"{name} {weight}%" for name, weight in RPC_MIX))
+    print("=" * 60)
+
+    baseline = None
+    with tempfile.TemporaryDirectory(prefix="bench-journal-") as journal_dir:
+        for i, workers in enumerate(worker_counts):
+            rps, errors = run_configuration(args.port + i, workers, args.clients, args.duration, journal_dir)
+            baseline = baseline or rps
+            label = "single-process" if workers == 0 else f"{workers} workers"
+            print(f"   {label:>15}: {rps:10,.0f} req/s  ({rps / baseline:4.2f}x, {errors} errors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import os
+import sys
+import time
+
+# SIMULATION WIDGET PAINT BENCHMARK
+# Renders TrafficSimulationWidget off-screen for a fixed number of animation
+# frames (cars and pedestrians moving, lights changing, optional VIP flash) and
+# reports the paint time per frame (and, with --alloc, the painter resources -
+# pens, brushes, colours, gradients, fonts, pixmaps - built per frame). With --live it instead runs the widget in a
+# real event loop on its own timers (status updates every second, as from the
+# server) and reports repaints, repainted area and process CPU. With --city it
+# renders the city map (city_map.py) at city, district and street zoom. Runs
+# headless via Qt's offscreen platform.
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication
+
+import ui
+from city_map import CityMapWidget, grid_city, parse_grid
+from ui import TrafficSimulationWidget
+
+PHASES = (
+    {"t1": "green", "t2": "red", "t3": "green", "t4": "red"},
+    {"t1": "yellow", "t2": "red", "t3": "yellow", "t4": "red"},
+    {"t1": "red", "t2": "green", "t3": "red", "t4": "green"},
+    {"t1": "red", "t2": "yellow", "t3": "red", "t4": "yellow"},
+)
+FRAMES_PER_PHASE = 50  # 5 s of 100 ms animation ticks
+ALL_RED = {"t1": "red", "t2": "red", "t3": "red", "t4": "red"}
+STATUS_INTERVAL_MS = 1000  # The UI polls the server status once a second
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(frames, width, height, vip, warmup):
+    """Paint frames; returns per-frame paint times in seconds and painter resources allocated while painting"""
+    widget = TrafficSimulationWidget()
+    widget.resize(width, height)
+    target = QPixmap(width, height)  # Off-screen windows are never exposed - render into a pixmap
+    if vip:
+        widget.set_vip_active(2)
+    times = []
+    allocations = 0
+    for frame in range(warmup + frames):
+        if frame % FRAMES_PER_PHASE == 0:
+            widget.update_traffic_lights(PHASES[(frame // FRAMES_PER_PHASE) % len(PHASES)])
+        widget.update_animations()
+        start, allocated = time.perf_counter(), ui.paint_allocations
+        widget.render(target)
+        if frame >= warmup:
+            times.append(time.perf_counter() - start)
+            allocations += ui.paint_allocations - allocated
+    return times, allocations
+
+
+def run_city(rows, cols, frames, width, height):
+    """Render the city map at three zoom levels; returns [(view, intersections drawn, paint times)]"""
+    widget = CityMapWidget(*grid_city(rows, cols))
+    widget.resize(width, height)
+    widget.fit_city()
+    target = QPixmap(width, height)
+    centre = widget.rect().center()
+    results = []
+    for view, zoom in (("city", widget.zoom), ("district", widget.zoom * 8), ("street", 2.0)):
+        widget.zoom_at(zoom / widget.zoom, centre)
+        drawn = len(widget.junction_index.query(*widget.world_box(widget.rect())))
+        times = []
+        for frame in range(frames):
+            start = time.perf_counter()
+            widget.render(target)
+            times.append(time.perf_counter() - start)
+        results.append((view, drawn, times))
+    return results
+
+
+def run_live(app, seconds, width, height, vip, all_red):
+    """Run the widget on its own timers for seconds; returns (paints, repainted fraction, CPU seconds)"""
+    widget = TrafficSimulationWidget()
+    widget.resize(width, height)
+    widget.show()
+    if vip:
+        widget.set_vip_active(2)
+    ticks = [0]
+
+    def poll_status():
+        phase = ALL_RED if all_red else PHASES[(ticks[0] // 5) % len(PHASES)]  # 5 s phases
+        widget.update_traffic_lights(phase)
+        ticks[0] += 1
+
+    poll_status()
+    poller = QTimer()
+    poller.timeout.connect(poll_status)
+    poller.start(STATUS_INTERVAL_MS)
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    cpu_start = time.process_time()
+    app.exec_()
+    cpu = time.process_time() - cpu_start
+    coverage = getattr(widget, "paint_pixels", 0) / max(1, widget.paint_frames * width * height)
+    return widget.paint_frames, coverage, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure TrafficSimulationWidget paint time per frame")
+    parser.add_argument("--frames", type=int, default=500, help="frames to measure")
+    parser.add_argument("--warmup", type=int, default=20, help="frames painted before measuring")
+    parser.add_argument("--width", type=int, default=1000, help="widget width")
+    parser.add_argument("--height", type=int, default=860, help="widget height")
+    parser.add_argument("--vip", action="store_true", help="VIP flash active on signal 2")
+    parser.add_argument("--live", type=float, metavar="SECONDS", help="run the real event loop for SECONDS")
+    parser.add_argument("--alloc", action="store_true", help="count painter resource allocations per frame")
+    parser.add_argument("--city", metavar="ROWSxCOLS", help="render the city map of a ROWSxCOLS grid city")
+    parser.add_argument("--all-red", action="store_true", help="live: all signals red (traffic idle)")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    if args.alloc:
+        ui.install_allocation_counter()
+    if args.city:
+        rows, cols = parse_grid(args.city)
+        print("=" * 60)
+        print(f"🗺️ CITY MAP - {rows * cols} intersections at {args.width}x{args.height}, {args.frames} frames per view")
+        for view, drawn, times in run_city(rows, cols, args.frames, args.width, args.height):
+            print(f"   {view:<8} {drawn:>6} drawn | avg {sum(times) / len(times) * 1000:.3f} ms | "
+                  f"p99 {percentile(times, 99) * 1000:.3f} ms")
+        print("=" * 60)
+        return
+    if args.live:
+        paints, coverage, cpu = run_live(app, args.live, args.width, args.height, args.vip, args.all_red)
+        print("=" * 60)
+        print(f"🎨 LIVE - {args.live:.0f}s at {args.width}x{args.height}"
+              f"{' (VIP)' if args.vip else ''}{' (all red)' if args.all_red else ''}")
+        print(f"   repaints {paints} ({paints / args.live:.1f}/s) | repainted {coverage:.0%} of the widget each | "
+              f"CPU {cpu / args.live * 100:.1f}%")
+        print("=" * 60)
+        return
+    times, allocations = run(args.frames, args.width, args.height, args.vip, args.warmup)
+    print("=" * 60)
+    print(f"🎨 PAINT TIME - {args.frames} frames at {args.width}x{args.height}{' (VIP)' if args.vip else ''}")
+    print(f"   avg {sum(times) / len(times) * 1000:.3f} ms | p50 {percentile(times, 50) * 1000:.3f} ms | "
+          f"p99 {percentile(times, 99) * 1000:.3f} ms | max {max(times) * 1000:.3f} ms")
+    if args.alloc:
+        print(f"   allocations {allocations / args.frames:.1f} painter resources/frame")
+    print("=" * 60)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
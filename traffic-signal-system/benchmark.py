@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import time
+import xmlrpc.client
+from collections import defaultdict
+from datetime import datetime
+
+from async_client_t8 import DEFAULT_URL, PipelinedXMLRPCClient
+from cluster import Cluster
+from hlc import HybridLogicalClock
+
+# LOAD-TESTING AND BENCHMARK HARNESS
+# Replaces the fixed 15-request load tests in manual_t8_1.py and ui.py.
+#   - closed loop: N concurrent callers issue the RPC mix back to back (optional
+#     think time) - measures capacity
+#   - open loop: Poisson arrivals at a fixed rate regardless of completions,
+#     latency measured from the scheduled send time - exposes queueing
+# Requests during the warm-up are sent but not recorded. Latencies go into HDR
+# histograms (constant memory, ~0.1% precision); results include throughput,
+# per-method percentiles, per-backend distribution (from the balancer's
+# counters) and an error breakdown, and can be exported as JSON or appended to
+# a CSV file for regression tracking. --local runs against a stand-in cluster
+# started on loopback (cluster.py).
+
+# Named RPC mixes: ((method, weight), ...)
+RPC_MIXES = {
+    "status": (("get_signal_status", 40), ("get_active_signal", 25), ("get_system_stats", 15),
+               ("get_synchronized_time", 10), ("get_countdown_info", 10)),
+    "read": (("get_signal_status", 45), ("get_active_signal", 45), ("get_countdown_info", 10)),
+    "control": (("get_signal_status", 55), ("get_active_signal", 20), ("signal_manipulator", 20),
+                ("get_next_message", 5)),
+}
+
+# Arguments for RPCs that take them
+RPC_ARGS = {
+    "signal_manipulator": lambda rng: (rng.randint(1, 4),),
+    "vip_signal_manipulator": lambda rng: (rng.randint(1, 4),),
+    "get_next_message": lambda rng: (f"Benchmark-{os.getpid()}",),
+    "get_next_pedestrian_message": lambda rng: (f"Benchmark-{os.getpid()}",),
+}
+
+PERCENTILES = (50, 90, 99, 99.9)
+CSV_FIELDS = ("timestamp", "label", "mode", "url", "mix", "concurrency", "rate", "duration", "requests",
+              "errors", "throughput_rps", "p50_ms", "p90_ms", "p99_ms", "p999_ms", "max_ms", "mean_ms")
+
+
+class HdrHistogram:
+    """Log-linear latency histogram in microseconds (HDR style): fixed relative precision, sparse buckets"""
+
+    def __init__(self, significant_figures=3):
+        self.sub_bucket_bits = (2 * 10 ** significant_figures - 1).bit_length()  # 2048 sub-buckets for 3
+        self.counts = defaultdict(int)  # {(bucket, sub_bucket): count}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def _key(self, value):
+        bucket = max(value.bit_length() - self.sub_bucket_bits, 0)
+        return bucket, value >> bucket
+
+    def record(self, seconds):
+        value = max(int(seconds * 1_000_000), 0)
+        self.counts[self._key(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] += count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def value_at(self, pct):
+        """Latency in milliseconds at percentile pct (highest value equivalent to the bucket)"""
+        if not self.total:
+            return 0.0
+        target = max(1, int(round(self.total * pct / 100)))
+        seen = 0
+        for bucket, sub in sorted(self.counts):
+            seen += self.counts[(bucket, sub)]
+            if seen >= target:
+                return min(((sub + 1) << bucket) - 1, self.max) / 1000
+        return self.max / 1000
+
+    def summary(self):
+        summary = {f"p{str(pct).replace('.', '')}_ms": round(self.value_at(pct), 3) for pct in PERCENTILES}
+        summary.update({
+            'count': self.total,
+            'min_ms': round((self.min or 0) / 1000, 3),
+            'max_ms': round(self.max / 1000, 3),
+            'mean_ms': round(self.sum / self.total / 1000, 3) if self.total else 0.0
+        })
+        return summary
+
+
+def parse_mix(text):
+    """RPC mix from a preset name or 'method:weight,method:weight'"""
+    if text in RPC_MIXES:
+        return RPC_MIXES[text]
+    mix = []
+    for item in text.split(","):
+        method, _, weight = item.partition(":")
+        mix.append((method.strip(), int(weight or 1)))
+    return tuple(mix)
+
+
+def classify_error(error):
+    """Short error category for the breakdown"""
+    if isinstance(error, xmlrpc.client.Fault):
+        return f"fault:{error.faultCode}"
+    if isinstance(error, xmlrpc.client.ProtocolError):
+        return f"http:{error.errcode}"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, ConnectionRefusedError):
+        return "connection_refused"
+    if isinstance(error, ConnectionResetError):
+        return "connection_reset"
+    return type(error).__name__
+
+
+def backend_counts(url):
+    """Requests routed to each backend so far, from the balancer's stats ({} if not a balancer)"""
+    try:
+        stats = xmlrpc.client.ServerProxy(url, allow_none=True).get_system_stats()
+    except Exception:
+        return {}
+    counts = {}
+    index = 0
+    while f"server_{index}_requests" in stats:
+        counts[stats[f"server_{index}_url"]] = stats[f"server_{index}_requests"]
+        index += 1
+    return counts
+
+
+class BenchmarkRecorder:
+    """Collects latencies and errors for requests issued after the warm-up"""
+
+    def __init__(self):
+        self.overall = HdrHistogram()
+        self.methods = defaultdict(HdrHistogram)
+        self.errors = defaultdict(int)
+        self.method_errors = defaultdict(int)
+        self.warmup_requests = 0
+
+    async def call(self, client, method, rng, measured, started, timeout):
+        """Issue one RPC and record it if it started inside the measurement window"""
+        try:
+            await asyncio.wait_for(client.call(method, *RPC_ARGS.get(method, lambda _: ())(rng)), timeout)
+            if measured:
+                latency = time.perf_counter() - started
+                self.overall.record(latency)
+                self.methods[method].record(latency)
+        except Exception as e:
+            if measured:
+                self.errors[classify_error(e)] += 1
+                self.method_errors[method] += 1
+        if not measured:
+            self.warmup_requests += 1
+
+
+async def closed_loop_caller(client, recorder, methods, rng, window, think_time, timeout):
+    """One closed-loop caller: next request as soon as the previous one returns"""
+    measure_start, deadline = window
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await recorder.call(client, rng.choice(methods), rng, started >= measure_start, started, timeout)
+        if think_time:
+            await asyncio.sleep(rng.expovariate(1 / think_time))
+
+
+async def open_loop_sender(clients, recorder, methods, rng, window, rate, timeout, max_in_flight):
+    """Poisson arrivals at rate req/s; latency counts from the scheduled time, not the send time"""
+    measure_start, deadline = window
+    in_flight = set()
+    scheduled = time.perf_counter()
+    shed = sent = 0
+    while True:
+        scheduled += rng.expovariate(rate)
+        if scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            shed += 1
+            continue
+        client = clients[sent % len(clients)]
+        sent += 1
+        task = asyncio.create_task(
+            recorder.call(client, rng.choice(methods), rng, scheduled >= measure_start, scheduled, timeout))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    if shed:
+        recorder.errors["shed"] += shed
+
+
+async def run_benchmark(url=DEFAULT_URL, mode="closed", concurrency=16, rate=100.0, duration=10.0, warmup=2.0,
+                        mix="status", connections=4, depth=64, think_time=0.0, timeout=60.0,
+                        max_in_flight=10000, seed=None, clock=None, label=None):
+    """Run one benchmark scenario and return its results as a dict"""
+    rpc_mix = parse_mix(mix) if isinstance(mix, str) else tuple(mix)
+    methods = [method for method, weight in rpc_mix for _ in range(weight)]
+    rng = random.Random(seed)
+    clock = clock or HybridLogicalClock()
+    clients = [PipelinedXMLRPCClient(url, depth=depth, clock=clock) for _ in range(connections)]
+    recorder = BenchmarkRecorder()
+    loop = asyncio.get_running_loop()
+
+    measure_start = time.perf_counter() + warmup
+    window = (measure_start, measure_start + duration)
+
+    async def snapshot_after_warmup():
+        await asyncio.sleep(warmup)
+        return await loop.run_in_executor(None, backend_counts, url)
+
+    snapshot = asyncio.create_task(snapshot_after_warmup())
+    if mode == "open":
+        await open_loop_sender(clients, recorder, methods, rng, window, rate, timeout, max_in_flight)
+    else:
+        await asyncio.gather(*[
+            closed_loop_caller(clients[i % connections], recorder, methods, random.Random(rng.random()),
+                               window, think_time, timeout)
+            for i in range(concurrency)])
+    elapsed = min(time.perf_counter(), window[1]) - measure_start
+    before = await snapshot
+    after = await loop.run_in_executor(None, backend_counts, url)
+    for client in clients:
+        await client.close()
+
+    errors = sum(recorder.errors.values())
+    requests = recorder.overall.total + errors
+    return {
+        'label': label or f"{mode}-{mix if isinstance(mix, str) else 'custom'}",
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'url': url, 'mode': mode, 'concurrency': concurrency if mode == "closed" else None,
+            'rate': rate if mode == "open" else None, 'duration': duration, 'warmup': warmup,
+            'mix': dict(rpc_mix), 'connections': connections, 'depth': depth, 'think_time': think_time,
+            'timeout': timeout, 'seed': seed
+        },
+        'requests': requests,
+        'errors': errors,
+        'warmup_requests': recorder.warmup_requests,
+        'throughput_rps': round(recorder.overall.total / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency': recorder.overall.summary(),
+        'methods': {method: dict(hist.summary(), errors=recorder.method_errors[method])
+                    for method, hist in sorted(recorder.methods.items())},
+        'error_breakdown': dict(recorder.errors),
+        'backends': {backend: after[backend] - before.get(backend, 0) for backend in after}
+    }
+
+
+def print_report(result):
+    config = result['config']
+    latency = result['latency']
+    load = (f"{config['concurrency']} callers" if config['mode'] == "closed"
+            else f"{config['rate']:.0f} req/s offered")
+    print("\n" + "=" * 80)
+    print(f"📊 BENCHMARK RESULTS: {result['label']}")
+    print(f"   🎯 {config['mode']}-loop | {load} | {config['duration']:.0f}s after {config['warmup']:.0f}s warm-up "
+          f"| {config['connections']} connections → {config['url']}")
+    print(f"   ⚡ Throughput: {result['throughput_rps']:.1f} req/s | Requests: {result['requests']} | "
+          f"❌ Errors: {result['errors']}")
+    print(f"   ⏱️ Latency: p50 {latency['p50_ms']:.2f} ms | p90 {latency['p90_ms']:.2f} ms | "
+          f"p99 {latency['p99_ms']:.2f} ms | p99.9 {latency['p999_ms']:.2f} ms | max {latency['max_ms']:.2f} ms")
+    if result['methods']:
+        print("   📋 Per method:")
+        for method, stats in result['methods'].items():
+            print(f"      {method:<28} {stats['count']:>8} ok {stats['errors']:>6} err | "
+                  f"p50 {stats['p50_ms']:8.2f} ms | p99 {stats['p99_ms']:8.2f} ms")
+    if result['backends']:
+        total = sum(result['backends'].values()) or 1
+        print("   ⚖️ Backend distribution:")
+        for backend, count in result['backends'].items():
+            print(f"      {backend:<28} {count:>8} ({count / total * 100:5.1f}%)")
+    if result['error_breakdown']:
+        print("   🔍 Errors: " + ", ".join(f"{kind} {count}" for kind, count in result['error_breakdown'].items()))
+    print("=" * 80)
+
+
+def export_json(result, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+
+def export_csv(result, path):
+    """Append one summary row per run, so successive runs form a regression history"""
+    config = result['config']
+    row = dict(result['latency'], timestamp=result['timestamp'], label=result['label'], mode=config['mode'],
+               url=config['url'], mix=";".join(f"{m}:{w}" for m, w in config['mix'].items()),
+               concurrency=config['concurrency'], rate=config['rate'], duration=config['duration'],
+               requests=result['requests'], errors=result['errors'], throughput_rps=result['throughput_rps'])
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def add_benchmark_arguments(parser):
+    """Add the scenario options to an argparse parser (shared with the cluster launcher)"""
+    group = parser.add_argument_group("benchmark scenario")
+    group.add_argument("--url", default=DEFAULT_URL, help="load balancer (or server) URL")
+    group.add_argument("--mode", choices=("closed", "open"), default="closed", help="closed- or open-loop load")
+    group.add_argument("--concurrency", type=int, default=16, help="closed loop: concurrent callers")
+    group.add_argument("--rate", type=float, default=100.0, help="open loop: offered requests per second")
+    group.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    group.add_argument("--warmup", type=float, default=2.0, help="seconds of unrecorded warm-up")
+    group.add_argument("--mix", default="status", help=f"RPC mix: {', '.join(RPC_MIXES)} or 'method:weight,...'")
+    group.add_argument("--connections", type=int, default=4, help="keep-alive connections")
+    group.add_argument("--depth", type=int, default=64, help="max pipelined requests per connection")
+    group.add_argument("--think-time", type=float, default=0.0, help="closed loop: mean seconds between calls")
+    group.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    group.add_argument("--seed", type=int, help="random seed for the request sequence")
+    group.add_argument("--label", help="run label in the report and exports")
+    group.add_argument("--json", help="write the full result to this JSON file")
+    group.add_argument("--csv", help="append a summary row to this CSV file")
+    return parser
+
+
+def run_benchmark_args(args, url=None):
+    """run_benchmark() coroutine for parsed add_benchmark_arguments() options"""
+    return run_benchmark(url or args.url, args.mode, args.concurrency, args.rate, args.duration, args.warmup,
+                         args.mix, args.connections, args.depth, args.think_time, args.timeout, seed=args.seed,
+                         label=args.label)
+
+
+def main():
+    parser = add_benchmark_arguments(
+        argparse.ArgumentParser(description="Load-testing and benchmark harness for the traffic signal system"))
+    parser.add_argument("--local", action="store_true",
+                        help="run against a stand-in cluster on loopback (see cluster.py for more options)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🧪 TRAFFIC SIGNAL SYSTEM BENCHMARK")
+    print(f"📡 Target: {'local stand-in cluster' if args.local else args.url}")
+    print("=" * 80)
+
+    try:
+        if args.local:
+            with Cluster() as cluster:
+                result = asyncio.run(run_benchmark_args(args, cluster.balancer_url))
+        else:
+            result = asyncio.run(run_benchmark_args(args))
+    except KeyboardInterrupt:
+        print("\n🛑 Benchmark stopped manually.")
+        return
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print_report(result)
+    if args.json:
+        export_json(result, args.json)
+        print(f"💾 Results written to {args.json}")
+    if args.csv:
+        export_csv(result, args.csv)
+        print(f"💾 Summary row appended to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
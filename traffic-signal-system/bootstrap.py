@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+# NON-INTERACTIVE STARTUP CONFIGURATION
+# Every entry point used to block on input() for an HH:MM:SS clock time. The
+# startup clock can now come from (lowest to highest precedence):
+#   1. a JSON config file (--config or TRAFFIC_CONFIG) - top-level keys apply to
+#      every process, a section named after the role ("primary", "clone",
+#      "vehicle", "pedestrian", "manual") overrides them
+#   2. environment variables (TRAFFIC_CLOCK, TRAFFIC_CLOCK_OFFSET, ...)
+#   3. command-line arguments (--clock, --clock-offset, ...)
+# clock is "HH:MM:SS", "host" (host clock) or "prompt" (ask as before); the
+# offset in seconds is added to either. With nothing configured, processes
+# attached to a terminal prompt and scripted ones start on the host clock.
+
+ENV_CONFIG = "TRAFFIC_CONFIG"
+# Clients reach the system through the load balancer; the cluster launcher points them elsewhere
+BALANCER_URL = os.environ.get("TRAFFIC_BALANCER_URL") or "http://127.0.0.1:9000/"
+ENV_VARS = {
+    'clock': "TRAFFIC_CLOCK",
+    'clock_offset': "TRAFFIC_CLOCK_OFFSET",
+    'name': "TRAFFIC_CLIENT_NAME",
+    'sync_wait': "TRAFFIC_SYNC_WAIT",
+}
+DEFAULTS = {
+    'clock': None,         # "HH:MM:SS", "host" or "prompt"
+    'clock_offset': 0.0,   # Seconds added to the startup clock
+    'name': None,          # Client name registered with the servers (clients only)
+    'sync_wait': None,     # Seconds clients wait before reading the synchronized time
+}
+HOST = "host"
+PROMPT = "prompt"
+
+
+def add_bootstrap_arguments(parser):
+    """Add the startup configuration options to an argparse parser"""
+    group = parser.add_argument_group("startup")
+    group.add_argument("--config", help=f"JSON startup config file (or ${ENV_CONFIG})")
+    group.add_argument("--clock", help="startup clock: HH:MM:SS, 'host' or 'prompt'")
+    group.add_argument("--clock-offset", type=float, help="seconds added to the startup clock")
+    group.add_argument("--name", help="client name registered with the servers")
+    group.add_argument("--sync-wait", type=float, help="seconds to wait for Berkeley synchronization")
+    return parser
+
+
+def parse_clock(text):
+    """Today's date at HH:MM:SS; raises ValueError for anything else"""
+    hour, minute, second = map(int, text.strip().split(':'))
+    return datetime.now().replace(hour=hour, minute=minute, second=second, microsecond=0)
+
+
+def load_config(role, args=None):
+    """Merge config file, environment and CLI arguments into one startup config"""
+    config = dict(DEFAULTS)
+    configured = False
+
+    path = getattr(args, 'config', None) or os.environ.get(ENV_CONFIG)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for source in (data, data.get(role, {})):
+            for key in DEFAULTS:
+                if key in source:
+                    config[key] = source[key]
+                    configured = True
+
+    for key, env in ENV_VARS.items():
+        if os.environ.get(env):
+            config[key] = os.environ[env]
+            configured = True
+
+    if args is not None:
+        for key in DEFAULTS:
+            value = getattr(args, key, None)
+            if value is not None:
+                config[key] = value
+                configured = True
+
+    config['clock_offset'] = float(config['clock_offset'] or 0.0)
+    if config['sync_wait'] is not None:
+        config['sync_wait'] = float(config['sync_wait'])
+    if not config['clock']:
+        config['clock'] = PROMPT if sys.stdin.isatty() and not configured else HOST
+    config['clock'] = str(config['clock']).strip().lower()
+    if config['clock'] not in (HOST, PROMPT):
+        parse_clock(config['clock'])  # Fail at startup, not at registration
+    if config['clock'] != PROMPT and config['sync_wait'] is None:
+        config['sync_wait'] = 0.0  # Scripted starts don't wait for a human-paced fleet
+    return config
+
+
+def startup_clock(config):
+    """Startup clock time as a datetime, or None when the operator should be prompted"""
+    if config['clock'] == PROMPT:
+        return None
+    if config['clock'] == HOST:
+        clock_time = datetime.now()
+    else:
+        clock_time = parse_clock(config['clock'])
+    return clock_time + timedelta(seconds=config['clock_offset'])
+
+
+def parse_startup_args(description, role):
+    """Parse a client's command line and return its startup config"""
+    parser = add_bootstrap_arguments(argparse.ArgumentParser(description=description))
+    args = parser.parse_args()
+    try:
+        return load_config(role, args)
+    except (OSError, ValueError) as e:
+        parser.error(f"invalid startup configuration: {e}")
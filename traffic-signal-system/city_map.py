@@ -0,0 +1,347 @@
+import math
+import os
+import time
+
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRect, QRectF, QLineF, QTimer
+from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QPolygonF, QFont
+from PyQt5.QtWidgets import QWidget
+
+from phase_plan import CITY_SPACING, grid_epoch, make_plan, override_at, override_status, phase_at
+
+# CITY MAP VIEW
+# Zoomable, pannable map of every intersection in a deployment. Intersections
+# and road segments live in uniform grid indexes in world coordinates (metres),
+# so a repaint only visits the cells under the invalidated part of the viewport.
+# Geometry is kept in world coordinates and drawn through the painter transform,
+# so panning and zooming never rebuild it. Zoomed out, each intersection is one
+# dot coloured by its north-south vehicle state, drawn in a single batched call
+# per colour; zoomed in, it becomes a
+# junction with its four vehicle lights and, closer still, its name. Signal
+# states are computed locally from each intersection's timing plan (see
+# phase_plan.py) and re-evaluated only when its current phase runs out.
+
+CITY_GRID = os.environ.get("TRAFFIC_CITY_GRID", "20x20")  # ROWSxCOLS of the synthetic city in the UI
+INDEX_CELL_SIZE = 500.0   # Metres per spatial index cell
+MIN_ZOOM = 0.005          # Pixels per metre
+MAX_ZOOM = 8.0
+DETAIL_ZOOM = 0.6         # From this zoom on draw junctions instead of dots
+LABEL_ZOOM = 1.5          # ... and their names
+ZOOM_STEP = 1.25          # Zoom factor per mouse wheel notch
+FIT_MARGIN = 40           # Pixels around the city when fitted to the widget
+MAP_REFRESH_MS = 250      # Signal state check interval for intersections in view
+FULL_REPAINT_CHANGES = 64  # More changed intersections than this in one check: repaint everything
+DOT_SIZE = 6              # Pixels
+LABEL_WIDTH = 80          # Pixels
+LABEL_HEIGHT = 16
+ROAD_WIDTH = 16.0         # Metres (detail view)
+LAMP_OFFSET = 14.0        # Metres from a junction centre to each of its lights (detail view)
+LAMP_SIZE = 8.0           # Metres (detail view)
+STATE_COLORS = {"green": (80, 255, 80), "yellow": (255, 255, 80), "red": (255, 80, 80)}
+OVERRIDE_COLOR = (255, 0, 100)  # VIP / manual override in effect
+LAMP_DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))  # Signals 1-4: north, east, south, west
+
+
+class GridIndex:
+    """Uniform grid spatial index: each item is stored in every cell its bounding box touches"""
+
+    def __init__(self, cell_size=INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}      # {(column, row): [item, ...]}
+        self.bounds = None   # [min column, min row, max column, max row] of occupied cells
+        self.items = []      # Everything, for queries that cover the whole index
+
+    def cell_span(self, x1, y1, x2, y2):
+        size = self.cell_size
+        return math.floor(x1 / size), math.floor(y1 / size), math.floor(x2 / size), math.floor(y2 / size)
+
+    def insert(self, item, x1, y1, x2, y2):
+        self.items.append(item)
+        c1, r1, c2, r2 = self.cell_span(x1, y1, x2, y2)
+        for column in range(c1, c2 + 1):
+            for row in range(r1, r2 + 1):
+                self.cells.setdefault((column, row), []).append(item)
+        if self.bounds is None:
+            self.bounds = [c1, r1, c2, r2]
+        else:
+            self.bounds = [min(self.bounds[0], c1), min(self.bounds[1], r1),
+                           max(self.bounds[2], c2), max(self.bounds[3], r2)]
+
+    def query(self, x1, y1, x2, y2):
+        """Items in the cells the box overlaps (a superset of those inside it), each once"""
+        if self.bounds is None:
+            return []
+        c1, r1, c2, r2 = self.cell_span(x1, y1, x2, y2)
+        if c1 <= self.bounds[0] and r1 <= self.bounds[1] and c2 >= self.bounds[2] and r2 >= self.bounds[3]:
+            return list(self.items)
+        c1, r1 = max(c1, self.bounds[0]), max(r1, self.bounds[1])  # Never walk empty space off the map
+        c2, r2 = min(c2, self.bounds[2]), min(r2, self.bounds[3])
+        found = {}
+        for column in range(c1, c2 + 1):
+            for row in range(r1, r2 + 1):
+                for item in self.cells.get((column, row), ()):
+                    found[id(item)] = item
+        return list(found.values())
+
+
+class MapIntersection:
+    """One intersection on the map: position (metres), timing plan and its light states"""
+
+    def __init__(self, name, x, y, plan=None):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.point = QPointF(x, y)
+        self.plan = plan or make_plan()
+        self.lights = None       # Vehicle states of signals 1-4, None until first evaluated
+        self.override = False
+        self.next_change = 0.0   # Server time the current phase (or override) runs out
+
+    def evaluate(self, now):
+        """Recompute light states from the plan once the current phase ran out; True if they changed"""
+        if now < self.next_change:
+            return False
+        override = override_at(self.plan, now)
+        if override:
+            held = override_status(override)
+            lights = tuple(held[f"t{i}"] for i in range(1, 5))
+            self.next_change = override['until'] if override['until'] is not None else math.inf
+        else:
+            index, state, left = phase_at(self.plan, now)
+            green = self.plan['phases'][index]['signals']
+            lights = tuple(state if i in green else "red" for i in range(1, 5))
+            self.next_change = now + left
+        changed = (lights, bool(override)) != (self.lights, self.override)
+        self.lights, self.override = lights, bool(override)
+        return changed
+
+    def set_plan(self, plan):
+        self.plan = plan
+        self.next_change = 0.0
+
+
+def grid_city(rows, cols, spacing=CITY_SPACING, live=None):
+    """Synthetic city of rows x cols intersections on a green wave; returns (intersections, roads)
+
+    live names the centre intersection (e.g. the server's "main") so its plan can be fed from the server.
+    """
+    grid = {}
+    for row in range(rows):
+        for col in range(cols):
+            plan = make_plan(epoch=grid_epoch(row, col, spacing))
+            grid[row, col] = MapIntersection(f"{row + 1}-{col + 1}", col * spacing, row * spacing, plan)
+    if live and grid:
+        grid[rows // 2, cols // 2].name = live
+    roads = [(grid[row, col], grid[row, col + 1]) for row in range(rows) for col in range(cols - 1)]
+    roads += [(grid[row, col], grid[row + 1, col]) for row in range(rows - 1) for col in range(cols)]
+    return list(grid.values()), roads
+
+
+def parse_grid(text):
+    """'ROWSxCOLS' -> (rows, cols)"""
+    rows, cols = text.lower().split("x")
+    return int(rows), int(cols)
+
+
+class CityMapWidget(QWidget):
+    """Zoomable, pannable city map: wheel zooms about the cursor, drag pans, double-click fits the city"""
+
+    def __init__(self, intersections, roads=(), clock=time.time):
+        super().__init__()
+        self.setMinimumSize(400, 400)
+        self.clock = clock  # Server time - the same clock the timing plans are written against
+        self.intersections = {intersection.name: intersection for intersection in intersections}
+        self.junction_index = GridIndex()
+        self.road_index = GridIndex()
+        for intersection in intersections:
+            self.junction_index.insert(intersection, intersection.x, intersection.y, intersection.x, intersection.y)
+        for a, b in roads:
+            self.road_index.insert(QLineF(a.point, b.point), min(a.x, b.x), min(a.y, b.y), max(a.x, b.x), max(a.y, b.y))
+
+        # View: zoom in pixels per metre, origin is the world point at the widget's top-left
+        self.zoom = 1.0
+        self.origin_x = 0.0
+        self.origin_y = 0.0
+        self.fitted = False
+        self.drag_from = None
+        self.visible = None  # Intersections in view, None after the view moved
+
+        # Pens, brushes and fonts are built once, per state colour. Cosmetic pens keep
+        # their pixel width under the zoom transform; the detail road pen is in metres.
+        self.background = QColor(26, 26, 46)
+        self.dot_pens = {state: self.cosmetic_pen(rgb, DOT_SIZE) for state, rgb in STATE_COLORS.items()}
+        self.dot_pens['override'] = self.cosmetic_pen(OVERRIDE_COLOR, DOT_SIZE + 2)
+        self.lamp_brushes = {state: QBrush(QColor(*rgb)) for state, rgb in STATE_COLORS.items()}
+        self.override_pen = self.cosmetic_pen(OVERRIDE_COLOR, 2)
+        self.thin_road_pen = self.cosmetic_pen((70, 70, 95), 1)
+        self.road_pen = QPen(QColor(51, 51, 51), ROAD_WIDTH, Qt.SolidLine, Qt.FlatCap)
+        self.label_pen = QPen(QColor(220, 220, 240))
+        self.label_font = QFont("Arial", 9)
+
+        self.refresh_timer = QTimer()
+        self.refresh_timer.timeout.connect(self.refresh_states)
+        self.refresh_timer.start(MAP_REFRESH_MS)
+
+    @staticmethod
+    def cosmetic_pen(rgb, width):
+        pen = QPen(QColor(*rgb), width, Qt.SolidLine, Qt.RoundCap)
+        pen.setCosmetic(True)
+        return pen
+
+    def world_bounds(self):
+        xs = [intersection.x for intersection in self.intersections.values()] or [0.0]
+        ys = [intersection.y for intersection in self.intersections.values()] or [0.0]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def fit_city(self):
+        """Zoom and centre so the whole city fits the widget"""
+        x1, y1, x2, y2 = self.world_bounds()
+        width, height = max(1, self.width() - 2 * FIT_MARGIN), max(1, self.height() - 2 * FIT_MARGIN)
+        zoom = min(width / max(x2 - x1, 1.0), height / max(y2 - y1, 1.0))
+        self.set_view(zoom, (x1 + x2) / 2 - self.width() / 2 / zoom, (y1 + y2) / 2 - self.height() / 2 / zoom)
+        self.fitted = True
+
+    def set_view(self, zoom, origin_x, origin_y):
+        self.zoom = min(MAX_ZOOM, max(MIN_ZOOM, zoom))
+        self.origin_x, self.origin_y = origin_x, origin_y
+        self.visible = None
+        self.update()
+
+    def zoom_at(self, factor, point):
+        """Zoom by factor keeping the world point under the screen point fixed"""
+        world_x = self.origin_x + point.x() / self.zoom
+        world_y = self.origin_y + point.y() / self.zoom
+        zoom = min(MAX_ZOOM, max(MIN_ZOOM, self.zoom * factor))
+        self.set_view(zoom, world_x - point.x() / zoom, world_y - point.y() / zoom)
+
+    def to_screen(self, x, y):
+        return int((x - self.origin_x) * self.zoom), int((y - self.origin_y) * self.zoom)
+
+    def junction_extent(self):
+        """(half width, height above, height below) in pixels of one intersection's drawing"""
+        if self.zoom < DETAIL_ZOOM:
+            return DOT_SIZE, DOT_SIZE, DOT_SIZE
+        radius = int((LAMP_OFFSET + LAMP_SIZE) * self.zoom) + 2
+        if self.zoom < LABEL_ZOOM:
+            return radius, radius, radius
+        return max(radius, LABEL_WIDTH // 2), radius, radius + LABEL_HEIGHT
+
+    def junction_rect(self, intersection):
+        x, y = self.to_screen(intersection.x, intersection.y)
+        half, above, below = self.junction_extent()
+        return QRect(x - half, y - above, 2 * half, above + below)
+
+    def world_box(self, rect):
+        """World box (x1, y1, x2, y2) under a screen rectangle, padded by the size of a junction drawing"""
+        pad = max(self.junction_extent()) / self.zoom
+        return (self.origin_x + rect.left() / self.zoom - pad, self.origin_y + rect.top() / self.zoom - pad,
+                self.origin_x + (rect.right() + 1) / self.zoom + pad, self.origin_y + (rect.bottom() + 1) / self.zoom + pad)
+
+    def set_plan(self, name, plan):
+        """Install a new timing plan (e.g. fetched from the intersection's server) for one intersection"""
+        intersection = self.intersections.get(name)
+        if intersection:
+            intersection.set_plan(plan)
+            if intersection.evaluate(self.clock()):
+                self.update(self.junction_rect(intersection))
+
+    def refresh_states(self):
+        """Re-evaluate intersections in view whose phase ran out; repaint only those that changed"""
+        if self.visible is None:
+            self.visible = self.junction_index.query(*self.world_box(self.rect()))
+        now = self.clock()
+        changed = [intersection for intersection in self.visible if intersection.evaluate(now)]
+        if len(changed) > FULL_REPAINT_CHANGES:
+            self.update()
+        else:
+            for intersection in changed:
+                self.update(self.junction_rect(intersection))
+
+    def resizeEvent(self, event):
+        if not self.fitted:
+            self.fit_city()
+        self.visible = None
+        super().resizeEvent(event)
+
+    def wheelEvent(self, event):
+        self.zoom_at(ZOOM_STEP ** (event.angleDelta().y() / 120), event.pos())
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_from = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_from is not None:
+            delta = event.pos() - self.drag_from
+            self.drag_from = event.pos()
+            self.set_view(self.zoom, self.origin_x - delta.x() / self.zoom, self.origin_y - delta.y() / self.zoom)
+
+    def mouseReleaseEvent(self, event):
+        self.drag_from = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit_city()
+
+    def paintEvent(self, event):
+        """Draw the roads and intersections under the invalidated rectangle only"""
+        dirty = event.rect()
+        box = self.world_box(dirty)
+        junctions = self.junction_index.query(*box)
+        now = self.clock()
+        for intersection in junctions:
+            if intersection.lights is None:
+                intersection.evaluate(now)
+
+        painter = QPainter(self)
+        painter.fillRect(dirty, self.background)
+        painter.scale(self.zoom, self.zoom)  # Draw in world coordinates
+        painter.translate(-self.origin_x, -self.origin_y)
+        if self.zoom < DETAIL_ZOOM:
+            self.draw_roads(painter, self.road_index.query(*box), self.thin_road_pen)
+            self.draw_dots(painter, junctions)
+        else:
+            painter.setRenderHint(QPainter.Antialiasing)
+            self.draw_roads(painter, self.road_index.query(*box), self.road_pen)
+            self.draw_junctions(painter, junctions)
+        painter.end()
+
+    def draw_roads(self, painter, roads, pen):
+        painter.setPen(pen)
+        painter.drawLines(roads)
+
+    def draw_dots(self, painter, junctions):
+        """Level of detail for zoomed-out views: one dot per intersection, one draw call per colour"""
+        groups = {}
+        for intersection in junctions:
+            key = 'override' if intersection.override else intersection.lights[0]
+            groups.setdefault(key, []).append(intersection.point)
+        for key, points in groups.items():
+            painter.setPen(self.dot_pens[key])
+            painter.drawPoints(QPolygonF(points))
+
+    def draw_junctions(self, painter, junctions):
+        """Detail view: the four vehicle lights of each intersection, plus its name when close enough"""
+        half = LAMP_SIZE / 2
+        painter.setPen(Qt.NoPen)
+        for intersection in junctions:
+            for (dx, dy), state in zip(LAMP_DIRECTIONS, intersection.lights):
+                painter.setBrush(self.lamp_brushes[state])
+                painter.drawEllipse(QRectF(intersection.x + dx * LAMP_OFFSET - half,
+                                           intersection.y + dy * LAMP_OFFSET - half, LAMP_SIZE, LAMP_SIZE))
+
+        overridden = [intersection for intersection in junctions if intersection.override]
+        if overridden:
+            radius = LAMP_OFFSET + half + 2 / self.zoom
+            painter.setPen(self.override_pen)
+            painter.setBrush(Qt.NoBrush)
+            for intersection in overridden:
+                painter.drawEllipse(intersection.point, radius, radius)
+
+        if self.zoom >= LABEL_ZOOM:
+            painter.resetTransform()  # Text stays at its pixel size
+            painter.setPen(self.label_pen)
+            painter.setFont(self.label_font)
+            below = int((LAMP_OFFSET + LAMP_SIZE) * self.zoom) + 2
+            for intersection in junctions:
+                x, y = self.to_screen(intersection.x, intersection.y)
+                painter.drawText(QRect(x - LABEL_WIDTH // 2, y + below, LABEL_WIDTH, LABEL_HEIGHT),
+                                 Qt.AlignCenter, intersection.name)
@@ -1,14 +1,36 @@
 import xmlrpc.client
-import random
 import time
 import threading
+import os
+from clock_sync import SyncClock, ClockSyncClient
+from bootstrap import BALANCER_URL, parse_clock, parse_startup_args, startup_clock
+from hlc import HybridLogicalClock, HLCTransport
+from workload import DemandGenerator, DemandProfile, seconds_of_day
+from signal_events import from_wire, render_event
 from queue import Queue
 
+# Local clock kept in step with the servers by continuous Berkeley re-synchronization
+local_clock = SyncClock()
+# Default clock-sync ID - unique per process, since samples and corrections are keyed by it
+CLIENT_ID = f"Traffic Signal-{os.getpid()}"
+clock_client = ClockSyncClient(xmlrpc.client.ServerProxy(BALANCER_URL, allow_none=True),
+                               CLIENT_ID, local_clock)
+
+# Hybrid logical clock carried on every RPC (X-HLC header) for causal ordering
+client_hlc = HybridLogicalClock(physical=local_clock.now)
+
 # UPDATED TO CONNECT TO LOAD BALANCER ON PORT 9000
 # server = xmlrpc.client.ServerProxy("http://192.168.1.200:9000/", allow_none=True)
-server = xmlrpc.client.ServerProxy("http://127.0.0.1:9000/", allow_none=True)
+server = xmlrpc.client.ServerProxy(BALANCER_URL, allow_none=True, transport=HLCTransport(client_hlc))
+
+# Vehicle arrivals per approach follow the rush-hour demand curve (see workload.py)
+CYCLE_SECONDS = 4
+demand = DemandGenerator(DemandProfile(time_of_day="rush_hour"))
 
-def register_time_and_sync():
+# Each controller reads its own complete message sequence from the server
+SUBSCRIBER_ID = f"Traffic Signal-{os.getpid()}"
+
+def register_time_and_sync(config):
     """Register this client's time and trigger Berkeley synchronization"""
     print("=" * 80)
     print("🚗 FOUR-WAY VEHICLE CONTROLLER - LOAD BALANCED VERSION 🚙")
@@ -20,29 +42,34 @@ def register_time_and_sync():
     print("📊 Shows current signal status array")
     print("=" * 80)
 
-    while True:
+    # Startup clock from config/env/CLI (host clock + offset); prompt only if none is configured
+    clock_time = startup_clock(config)
+    while clock_time is None:
         traffic_time = input("🕐 Enter Traffic Signal time (HH:MM:SS): ")
         try:
-            hour, minute, second = map(int, traffic_time.split(':'))
-            if 0 <= hour <= 23 and 0 <= minute <= 59 and 0 <= second <= 59:
-                break
-            else:
-                print("❌ Invalid time values. Please use valid HH:MM:SS format.")
-        except:
-            print("❌ Invalid time format. Please use HH:MM:SS")
+            clock_time = parse_clock(traffic_time)
+        except ValueError:
+            print("❌ Invalid time format. Please use valid HH:MM:SS format.")
     
+    traffic_time = clock_time.strftime('%H:%M:%S')
+    client_name = config['name'] or CLIENT_ID
+    clock_client.client_id = client_name
+    local_clock.set_time(clock_time)
     print("🔗 Connecting to Load Balancer...")
     
     try:
-        success = server.register_client_time("Traffic Signal", traffic_time)
+        success = server.register_client_time(client_name, traffic_time)
         if success:
             print("✅ Traffic Signal time registered successfully!")
         else:
             print("❌ Failed to register time")
             return False
         
+        # RTT-compensated clock sample refines the typed time for the next Berkeley round
+        clock_client.sync_once()
+        
         print("⏳ Waiting for all clients to connect...")
-        time.sleep(3)
+        time.sleep(3 if config['sync_wait'] is None else config['sync_wait'])
 
         sync_time = server.berkeley_synchronization()
         if sync_time:
@@ -51,6 +78,10 @@ def register_time_and_sync():
         else:
             print("⏳ Synchronization pending - waiting for all clients...")
         
+        clock_client.sync_once()  # Pick up this client's correction from the round
+        clock_client.start()
+        print(f"🕐 Local clock: {local_clock.strftime('%H:%M:%S.%f')[:-3]} "
+              f"(re-synchronizing every {clock_client.interval:.0f}s)")
         return True
         
     except Exception as e:
@@ -68,16 +99,8 @@ def display_signal_status():
         print(f"❌ Failed to get signal status: {e}")
 
 def generate_signal_requests():
-    """Generate 1-2 random signal requests (1, 2, 3, or 4)"""
-    all_signals = [1, 2, 3, 4]
-    num_requests = random.choice([1, 2])  # Randomly choose to make 1 or 2 requests
-    
-    if num_requests == 1:
-        return [random.choice(all_signals)]
-    else:
-        # For 2 requests, ensure they're different signals
-        selected = random.sample(all_signals, 2)
-        return selected
+    """Signals requested by vehicles arriving before the next cycle (Poisson, time-of-day scaled)"""
+    return demand.approaches_in_window(CYCLE_SECONDS, seconds_of_day(local_clock.datetime()))
 
 def process_single_signal_request(signal_id, worker_id, results_queue):
     """Process a single signal request and put results in queue"""
@@ -97,12 +120,13 @@ def process_single_signal_request(signal_id, worker_id, results_queue):
         print(f"\n🚦 Worker {worker_id} - SIGNAL {signal_id} CHANGE SEQUENCE:")
         
         while True:
-            msg = server.get_next_message()
-            if msg is None:
+            values = server.get_next_message(SUBSCRIBER_ID)
+            if values is None:
                 break
+            event = from_wire(values)
             message_count += 1
-            messages.append(msg)
-            print(f"🚗 Worker {worker_id}: {msg}")
+            messages.append(event)
+            print(f"🚗 Worker {worker_id}: {render_event(event)}")
         
         if message_count == 0:
             print(f"ℹ️ Worker {worker_id}: No signal changes were needed for signal {signal_id}.")
@@ -119,9 +143,12 @@ def process_single_signal_request(signal_id, worker_id, results_queue):
 def t_signal():
     """Control four-way traffic signals with regular requests only"""
     try:
-        # Generate 1-2 random REGULAR signal requests
+        # Signals wanted by vehicles arriving this cycle
         requested_signals = generate_signal_requests()
         num_regular_requests = len(requested_signals)
+        if not requested_signals:
+            print(f"\n🛣️ No vehicles arrived this cycle - no signal requests")
+            return
         
         print(f"\n📋 REGULAR SIGNAL REQUESTS:")
         print(f"   🔥 Regular signals requested: {requested_signals} ({num_regular_requests} requests)")
@@ -182,6 +209,7 @@ def display_status():
         
         if sync_time:
             print(f"⏰ Current synchronized time: {sync_time}")
+        print(f"🕐 Local clock: {local_clock.strftime('%H:%M:%S.%f')[:-3]}")
         if active_signal:
             print(f"🟢 Currently GREEN signal: {active_signal}")
             red_signals = [sig for sig in [1, 2, 3, 4] if sig != active_signal]
@@ -207,7 +235,8 @@ def display_status():
         print(f"❌ Status check failed: {e}")
 
 if __name__ == "__main__":
-    if not register_time_and_sync():
+    config = parse_startup_args("Four-way vehicle signal controller", "vehicle")
+    if not register_time_and_sync(config):
         print("❌ Failed to initialize. Exiting...")
         exit(1)
     
@@ -221,7 +250,7 @@ if __name__ == "__main__":
     print("🔒 Using Ricart-Agrawala Algorithm for Critical Section Access")
     print("📋 REGULAR REQUESTS ONLY: No VIP generation in this client")
     print("⚡ RULE: Only ONE signal can be GREEN at a time!")
-    print("🎲 Regular signals: Always generated (1-2 requests)")
+    print("🎲 Regular signals: Poisson vehicle arrivals, rush-hour demand curve")
     print("👑 VIP vehicles: Handled by tm.py")
     print("📊 Signal status array: Real-time updates from server")
     print("🔥 Processes requests sequentially to avoid conflicts")
@@ -234,7 +263,7 @@ if __name__ == "__main__":
         try:
             t_signal()
             print(f"\n⏳ Waiting before next cycle (regular requests only)...\n")
-            time.sleep(4)
+            time.sleep(CYCLE_SECONDS)
         except KeyboardInterrupt:
             print("\nπŸ›' Four-way vehicle signal controller stopped manually.")
             break
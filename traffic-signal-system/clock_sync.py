@@ -0,0 +1,230 @@
+import threading
+import time
+from datetime import datetime
+
+# BERKELEY CLOCK SYNCHRONIZATION SERVICE
+# Replaces the one-shot average of operator-typed HH:MM:SS strings.
+#   - Every clock is a monotonic clock plus an offset, so it keeps advancing and
+#     is immune to host wall-clock jumps.
+#   - Clients continuously exchange timestamps with the server (Cristian-style,
+#     RTT compensated) and report their measured offset.
+#   - Every sync interval the server runs a Berkeley round: samples with a high
+#     RTT are dropped, clocks outside the largest group that agrees within
+#     OUTLIER_THRESHOLD are rejected as faulty (fault-tolerant average), the
+#     server steps its own clock by the average and hands each client the
+#     correction that brings it to the same time.
+
+SYNC_INTERVAL = 10.0       # Seconds between Berkeley rounds / client exchanges
+MAX_SAMPLE_RTT = 0.25      # Samples with a longer round trip are too imprecise
+OUTLIER_THRESHOLD = 2.0    # Clocks further apart than this cannot both be trusted
+SERVER_ID = "__server__"   # The coordinator's own entry in a round
+
+
+class SyncClock:
+    """Monotonic clock with an adjustable offset from the host wall clock"""
+
+    def __init__(self):
+        self.base_wall = time.time()
+        self.base_mono = time.monotonic()
+        self.offset = 0.0          # Seconds this clock runs ahead of the host clock
+        self.synchronized = False  # True once a Berkeley round has set the offset
+
+    def host_now(self):
+        """Host time derived from the monotonic clock (no wall-clock jumps)"""
+        return self.base_wall + (time.monotonic() - self.base_mono)
+
+    def now(self):
+        """Current time of this clock as epoch seconds"""
+        return self.host_now() + self.offset
+
+    def set_time(self, clock_time):
+        """Set the clock so it currently reads clock_time (a datetime)"""
+        self.offset = clock_time.timestamp() - self.host_now()
+
+    def set_offset(self, offset):
+        """Set the offset from the host clock directly"""
+        self.offset = offset
+
+    def adjust(self, delta):
+        """Step the clock by delta seconds"""
+        self.offset += delta
+
+    def datetime(self):
+        """Current time of this clock as a datetime"""
+        return datetime.fromtimestamp(self.now())
+
+    def strftime(self, fmt='%H:%M:%S'):
+        return self.datetime().strftime(fmt)
+
+
+class BerkeleyCoordinator:
+    """Server side of continuous Berkeley synchronization with RTT filtering and outlier rejection"""
+
+    def __init__(self, clock, name="SERVER", interval=SYNC_INTERVAL, max_rtt=MAX_SAMPLE_RTT,
+                 outlier_threshold=OUTLIER_THRESHOLD, on_adjust=None):
+        self.clock = clock
+        self.name = name
+        self.interval = interval
+        self.max_rtt = max_rtt
+        self.outlier_threshold = outlier_threshold
+        self.on_adjust = on_adjust     # Called with the new offset after each round
+        self.lock = threading.Lock()
+        self.round_id = 0
+        self.samples = {}              # {client_id: (offset, rtt, received_at)} for the current round
+        self.corrections = {}          # {client_id: seconds the client must add to its clock}
+        self.client_stats = {}         # {client_id: {'offset_ms', 'rtt_ms', 'accepted'}}
+        self.stats = {'rounds': 0, 'rejected_rtt': 0, 'rejected_outliers': 0, 'last_adjust_ms': 0.0,
+                      'max_skew_ms': 0.0, 'last_round_time': None}
+        self.thread = None
+
+    def start(self):
+        """Run Berkeley rounds every interval in a background thread"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._round_loop, name=f"Berkeley-{self.name}", daemon=True)
+            self.thread.start()
+
+    def _round_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_round()
+            except Exception as e:
+                print(f"❌ {self.name}: Berkeley round failed: {e}")
+
+    def clock_exchange(self):
+        """Server half of a timestamp exchange: [server time, round id]"""
+        return [self.clock.now(), self.round_id]
+
+    def add_sample(self, client_id, offset, rtt=None, round_id=None):
+        """Record a client's offset from the server clock (client minus server, seconds)
+
+        Returns the correction the client must apply now (0.0 if none is pending).
+        """
+        with self.lock:
+            correction = self.corrections.pop(client_id, None)
+            if correction is not None:
+                # Sample was measured before the client applied its correction - discard it
+                return correction
+            if round_id is not None and round_id != self.round_id:
+                return 0.0  # Measured against the server clock before the last step
+            if rtt is not None and rtt > self.max_rtt:
+                self.stats['rejected_rtt'] += 1
+                return 0.0
+            self.samples[client_id] = (offset, rtt, time.time())
+            self.client_stats[client_id] = {
+                'offset_ms': round(offset * 1000, 3),
+                'rtt_ms': round(rtt * 1000, 3) if rtt is not None else None,
+                'accepted': True
+            }
+            return 0.0
+
+    def _agreeing_clocks(self, offsets):
+        """Largest group of clocks within outlier_threshold of each other (ties prefer the server's group)"""
+        ordered = sorted(offsets.items(), key=lambda item: item[1])
+        best_score, best_range = None, (0, 1)
+        start = 0
+        for end in range(len(ordered)):
+            # Sliding window over sorted offsets - O(n log n) even with many clients
+            while ordered[end][1] - ordered[start][1] > self.outlier_threshold:
+                start += 1
+            has_server = ordered[start][1] <= 0.0 <= ordered[end][1]
+            score = (end - start + 1, has_server)
+            if best_score is None or score > best_score:
+                best_score, best_range = score, (start, end + 1)
+        return dict(ordered[best_range[0]:best_range[1]])
+
+    def run_round(self):
+        """Run one Berkeley round; returns the server's adjustment in seconds or None"""
+        with self.lock:
+            if not self.samples:
+                return None
+
+            # Server participates with offset 0 against itself
+            offsets = {SERVER_ID: 0.0}
+            offsets.update({client_id: sample[0] for client_id, sample in self.samples.items()})
+            accepted = self._agreeing_clocks(offsets)
+            rejected = len(offsets) - len(accepted)
+            self.stats['rejected_outliers'] += rejected
+            for client_id in offsets:
+                if client_id in self.client_stats:
+                    self.client_stats[client_id]['accepted'] = client_id in accepted
+
+            average = sum(accepted.values()) / len(accepted)
+
+            # Every clock (including rejected ones) is steered to the fault-tolerant average
+            for client_id, sample in self.samples.items():
+                self.corrections[client_id] = average - sample[0]
+            self.clock.adjust(average)
+            self.clock.synchronized = True
+
+            skews = [abs(off - average) for off in accepted.values()]
+            self.stats['rounds'] += 1
+            self.stats['last_adjust_ms'] = round(average * 1000, 3)
+            self.stats['max_skew_ms'] = round(max(skews) * 1000, 3)
+            self.stats['last_round_time'] = self.clock.strftime('%H:%M:%S.%f')[:-3]
+            self.samples.clear()
+            self.round_id += 1
+            new_offset = self.clock.offset
+
+        if self.on_adjust:
+            self.on_adjust(new_offset)
+        return average
+
+    def get_stats(self):
+        """Return clock synchronization statistics (skews in milliseconds)"""
+        with self.lock:
+            rtts = [s['rtt_ms'] for s in self.client_stats.values() if s['rtt_ms'] is not None]
+            return {
+                'clock_synchronized': self.clock.synchronized,
+                'clock_offset_ms': round(self.clock.offset * 1000, 3),
+                'clock_rounds': self.stats['rounds'],
+                'clock_last_adjust_ms': self.stats['last_adjust_ms'],
+                'clock_max_skew_ms': self.stats['max_skew_ms'],
+                'clock_mean_rtt_ms': round(sum(rtts) / len(rtts), 3) if rtts else None,
+                'clock_rejected_rtt': self.stats['rejected_rtt'],
+                'clock_rejected_outliers': self.stats['rejected_outliers'],
+                'clock_last_round': self.stats['last_round_time'],
+                'clock_clients': {cid: dict(s) for cid, s in self.client_stats.items()}
+            }
+
+
+class ClockSyncClient:
+    """Client side: periodically measures its offset from the server and applies corrections"""
+
+    def __init__(self, server, client_id, clock, interval=SYNC_INTERVAL):
+        self.server = server
+        self.client_id = client_id
+        self.clock = clock
+        self.interval = interval
+        self.last_offset = None
+        self.last_rtt = None
+        self.thread = None
+
+    def sync_once(self):
+        """One timestamp exchange and report; returns the correction applied"""
+        t0 = self.clock.now()
+        server_time, round_id = self.server.get_clock_time()
+        t1 = self.clock.now()
+        rtt = t1 - t0
+        # Server stamped its time roughly halfway through the round trip
+        offset = t1 - (server_time + rtt / 2)
+        self.last_offset, self.last_rtt = offset, rtt
+        correction = self.server.report_clock_sample(self.client_id, offset, rtt, round_id)
+        if correction:
+            self.clock.adjust(correction)
+            self.clock.synchronized = True
+        return correction
+
+    def start(self):
+        """Keep re-synchronizing in a background thread"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._sync_loop, name=f"ClockSync-{self.client_id}", daemon=True)
+            self.thread.start()
+
+    def _sync_loop(self):
+        while True:
+            try:
+                self.sync_once()
+            except Exception:
+                pass  # Server unreachable - keep free-running on the monotonic clock
+            time.sleep(self.interval)
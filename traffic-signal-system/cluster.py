@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import xmlrpc.client
+
+from bench_multiproc import wait_until_ready
+
+# LOCAL CLUSTER LAUNCHER
+# Brings up the whole system on one box: N server replicas (replica 0 is the
+# PRIMARY / time master, the rest are CLONE-1, CLONE-2, ...), the load balancer in
+# front of them, and M synthetic vehicle / pedestrian clients - all as
+# subprocesses on loopback ports with their own throwaway journals and log
+# files. It waits for every server and the balancer to answer health checks,
+# runs a benchmark scenario (see benchmark.py), reports per-process CPU and
+# memory (Linux /proc; process trees, so pre-fork workers are included) and
+# tears everything down again.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_PORT = 18000      # Replica i listens on SERVER_PORT + i (away from a hand-started 8000/8001)
+BALANCER_PORT = 19000
+OWNER_PORT = 20000       # With --workers, replica i's state owner listens on OWNER_PORT + i
+CLIENT_SETTLE_TIME = 1.0  # Seconds synthetic clients get to register before they must still be running
+
+
+def port_in_use(port):
+    """True if something already listens on the loopback port"""
+    with socket.socket() as sock:
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def _proc_children():
+    """{ppid: [pid, ...]} for every process visible in /proc"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue  # Process exited while scanning
+    return children
+
+
+def read_process_stats(pid):
+    """CPU seconds, RSS and peak RSS (MB) of a process and its descendants; None without /proc"""
+    if not os.path.isdir(f"/proc/{pid}"):
+        return None
+    children = _proc_children()
+    tick = os.sysconf("SC_CLK_TCK")
+    totals = {'cpu_seconds': 0.0, 'rss_mb': 0.0, 'peak_rss_mb': 0.0, 'processes': 0}
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{current}/status") as f:
+                status = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        totals['cpu_seconds'] += (int(fields[11]) + int(fields[12])) / tick  # utime + stime
+        totals['rss_mb'] += int(status.get('VmRSS', '0 kB').split()[0]) / 1024
+        totals['peak_rss_mb'] += int(status.get('VmHWM', '0 kB').split()[0]) / 1024
+        totals['processes'] += 1
+    return totals
+
+
+class Cluster:
+    """Balancer, server replicas and synthetic clients as subprocesses on loopback"""
+
+    def __init__(self, servers=2, vehicles=0, pedestrians=0, workers=0, server_port=SERVER_PORT,
+                 balancer_port=BALANCER_PORT, max_requests=None, log_dir=None, timeout=15, adaptive=False,
+                 owner_port=OWNER_PORT):
+        if servers < 1:
+            raise ValueError("a cluster needs at least one server")
+        self.servers = servers
+        self.vehicles = vehicles
+        self.pedestrians = pedestrians
+        self.workers = workers              # Pre-fork workers per server (0 = single process)
+        self.server_port = server_port
+        self.balancer_port = balancer_port
+        self.owner_port = owner_port        # First pre-fork state owner port (with workers)
+        self.max_requests = max_requests
+        self.log_dir = log_dir              # Keep logs here (default: removed with the cluster)
+        self.timeout = timeout
+        self.adaptive = adaptive            # PRIMARY sizes greens from demand and pushes plans to the replicas
+        self.members = []                   # [{'name', 'role', 'process', 'url', 'log'}]
+        self.work_dir = None
+
+    @property
+    def balancer_url(self):
+        return f"http://127.0.0.1:{self.balancer_port}/"
+
+    def server_urls(self):
+        return [f"http://127.0.0.1:{self.server_port + i}/" for i in range(self.servers)]
+
+    def _launch(self, name, role, args, url=None, env=None):
+        log_path = os.path.join(self.log_dir or self.work_dir, f"{name}.log")
+        log = open(log_path, "w", encoding="utf-8")
+        process = subprocess.Popen([sys.executable, "-u"] + args, cwd=SCRIPT_DIR, stdin=subprocess.DEVNULL,
+                                   stdout=log, stderr=subprocess.STDOUT, env=env)
+        member = {'name': name, 'role': role, 'process': process, 'url': url, 'log': log, 'log_path': log_path}
+        self.members.append(member)
+        return member
+
+    def _wait_healthy(self, member):
+        if not wait_until_ready(member['url'], self.timeout) or member['process'].poll() is not None:
+            raise RuntimeError(f"{member['name']} did not become healthy on {member['url']}\n{self.log_tail(member)}")
+
+    def _wait_balancer(self, member):
+        """Like _wait_healthy, but the answer must come from the balancer itself, fronting every replica"""
+        self._wait_healthy(member)
+        try:
+            server_count = xmlrpc.client.ServerProxy(member['url'], allow_none=True).get_system_stats().get('server_count')
+        except Exception as e:
+            server_count = f"error: {e}"
+        if server_count != self.servers or member['process'].poll() is not None:
+            raise RuntimeError(f"{member['name']} on {member['url']} is not the balancer for {self.servers} servers "
+                               f"(server_count {server_count})\n{self.log_tail(member)}")
+
+    def log_tail(self, member, lines=10):
+        member['log'].flush()
+        with open(member['log_path'], encoding="utf-8", errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+
+    def start(self):
+        """Start servers, balancer and clients; raises RuntimeError if any of them fails"""
+        self.work_dir = tempfile.mkdtemp(prefix="traffic-cluster-")
+        if self.log_dir:
+            os.makedirs(self.log_dir, exist_ok=True)
+        ports = [self.server_port + i for i in range(self.servers)] + [self.balancer_port]
+        if self.workers:
+            ports += [self.owner_port + i for i in range(self.servers)]
+        if len(set(ports)) != len(ports):
+            raise ValueError(f"server, balancer and state owner ports overlap: {sorted(ports)}")
+        busy = [port for port in ports if port_in_use(port)]
+        if busy:
+            raise RuntimeError(f"ports already in use: {busy} - stop the running cluster first")
+
+        base_env = dict(os.environ)
+        base_env.pop("TRAFFIC_SHARED_STATE", None)
+        base_env.pop("TRAFFIC_CONFIG", None)
+        try:
+            for i, url in enumerate(self.server_urls()):
+                env = dict(base_env, TRAFFIC_JOURNAL_DIR=os.path.join(self.work_dir, f"journal-{i}"))
+                args = ["signal_server.py", "--role", "primary" if i == 0 else "clone",
+                        "--node-id", "primary" if i == 0 else f"clone-{i}",
+                        "--port", str(self.server_port + i), "--clock", "host"]
+                if self.workers:
+                    args += ["--workers", str(self.workers), "--owner-port", str(self.owner_port + i)]
+                if self.adaptive and i == 0:
+                    args += ["--adaptive"]
+                    for peer in self.server_urls()[1:]:
+                        args += ["--peer", peer]
+                self._launch(f"server-{i}", "primary" if i == 0 else "replica", args, url, env)
+            for member in self.members:
+                self._wait_healthy(member)
+
+            args = ["loader_t8.py", "--port", str(self.balancer_port)]
+            for url in self.server_urls():
+                args += ["--backend", url]
+            if self.max_requests:
+                args += ["--max-requests", str(self.max_requests)]
+            self._wait_balancer(self._launch("balancer", "balancer", args, self.balancer_url, base_env))
+
+            client_env = dict(base_env, TRAFFIC_BALANCER_URL=self.balancer_url)
+            clients = [("client_t8.py", "vehicle", "Vehicle", i) for i in range(1, self.vehicles + 1)]
+            clients += [("ps_t8.py", "pedestrian", "Pedestrian", i) for i in range(1, self.pedestrians + 1)]
+            for script, role, label, i in clients:
+                self._launch(f"{role}-{i}", role, [script, "--clock", "host", "--name", f"{label}-{i}"],
+                             env=client_env)
+            if clients:
+                time.sleep(CLIENT_SETTLE_TIME)
+                for member in self.members:
+                    if member['process'].poll() is not None:
+                        raise RuntimeError(f"{member['name']} exited with code {member['process'].returncode}\n"
+                                           f"{self.log_tail(member)}")
+        except Exception:
+            self.stop()
+            raise
+        return self
+
+    def stop(self):
+        """Stop clients, then the balancer, then the servers"""
+        for member in reversed(self.members):
+            if member['process'].poll() is None:
+                member['process'].send_signal(signal.SIGINT)
+        for member in reversed(self.members):
+            try:
+                member['process'].wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                member['process'].kill()
+                member['process'].wait()
+            member['log'].close()
+        self.members = []
+        if self.work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def sample_resources(self):
+        """{member name: process-tree stats} right now"""
+        return {member['name']: read_process_stats(member['process'].pid) for member in self.members}
+
+    def resource_report(self, before, after, elapsed):
+        """Per-process CPU % over elapsed seconds and memory, from two sample_resources() calls"""
+        report = {}
+        for member in self.members:
+            start, end = before.get(member['name']), after.get(member['name'])
+            if not start or not end:
+                continue
+            report[member['name']] = {
+                'role': member['role'],
+                'cpu_percent': round((end['cpu_seconds'] - start['cpu_seconds']) / elapsed * 100, 1),
+                'cpu_seconds': round(end['cpu_seconds'] - start['cpu_seconds'], 3),
+                'rss_mb': round(end['rss_mb'], 1),
+                'peak_rss_mb': round(end['peak_rss_mb'], 1),
+                'processes': end['processes']
+            }
+        return report
+
+
+def print_resources(report):
+    print("🖥️ PER-PROCESS RESOURCES (process trees, during the scenario)")
+    for name, stats in report.items():
+        print(f"   {name:<14} {stats['role']:<11} CPU {stats['cpu_percent']:6.1f}% | "
+              f"RSS {stats['rss_mb']:7.1f} MB | peak {stats['peak_rss_mb']:7.1f} MB | {stats['processes']} proc")
+    print("=" * 80)
+
+
+def main():
+    # The benchmark imports this module for --local, so import it only when running the launcher
+    from benchmark import add_benchmark_arguments, export_csv, export_json, print_report, run_benchmark_args
+
+    parser = argparse.ArgumentParser(description="Launch a local cluster, run a benchmark scenario, tear it down")
+    parser.add_argument("--servers", type=int, default=2, help="server replicas (the first is the PRIMARY)")
+    parser.add_argument("--vehicles", type=int, default=0, help="synthetic vehicle clients (client_t8.py)")
+    parser.add_argument("--pedestrians", type=int, default=0, help="synthetic pedestrian clients (ps_t8.py)")
+    parser.add_argument("--workers", type=int, default=0, help="pre-fork workers per server")
+    parser.add_argument("--server-port", type=int, default=SERVER_PORT, help="port of replica 0 (others follow)")
+    parser.add_argument("--balancer-port", type=int, default=BALANCER_PORT, help="load balancer port")
+    parser.add_argument("--max-requests", type=int, help="balancer: active requests per server before overflow")
+    parser.add_argument("--log-dir", help="keep process logs in this directory")
+    parser.add_argument("--hold", action="store_true", help="no benchmark: keep the cluster up until Ctrl+C")
+    parser.add_argument("--adaptive", action="store_true", help="adaptive signal timing on the PRIMARY")
+    add_benchmark_arguments(parser)
+    args = parser.parse_args()
+
+    cluster = Cluster(args.servers, args.vehicles, args.pedestrians, args.workers, args.server_port,
+                      args.balancer_port, args.max_requests, args.log_dir, adaptive=args.adaptive)
+    print("=" * 80)
+    print("🚦 LOCAL TRAFFIC SIGNAL CLUSTER")
+    print(f"   🖥️ Servers: {args.servers} (from port {args.server_port}) | ⚖️ Balancer: {cluster.balancer_url}")
+    print(f"   🚗 Vehicles: {args.vehicles} | 🚶 Pedestrians: {args.pedestrians}")
+    print("=" * 80)
+
+    started = time.perf_counter()
+    try:
+        cluster.start()
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ Cluster failed to start: {e}")
+        sys.exit(1)
+    try:
+        print(f"✅ Cluster healthy in {time.perf_counter() - started:.2f}s")
+        if args.hold:
+            print("⏸️ Holding - press Ctrl+C to tear down")
+            while True:
+                time.sleep(1)
+
+        before, scenario_start = cluster.sample_resources(), time.perf_counter()
+        result = asyncio.run(run_benchmark_args(args, cluster.balancer_url))
+        report = cluster.resource_report(before, cluster.sample_resources(), time.perf_counter() - scenario_start)
+        result['cluster'] = {'servers': args.servers, 'vehicles': args.vehicles, 'pedestrians': args.pedestrians,
+                             'workers': args.workers}
+        result['processes'] = report
+        print_report(result)
+        print_resources(report)
+        if args.json:
+            export_json(result, args.json)
+            print(f"💾 Results written to {args.json}")
+        if args.csv:
+            export_csv(result, args.csv)
+            print(f"💾 Summary row appended to {args.csv}")
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping cluster...")
+    finally:
+        cluster.stop()
+        print("🧹 Cluster torn down")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+import xmlrpc.client
+from urllib.parse import urlsplit
+
+from bootstrap import BALANCER_URL
+from hlc import HybridLogicalClock, HLCTransport
+
+# DETECTOR / SENSOR INGESTION
+# Loop detectors and cameras report vehicles per approach. Events travel as
+# packed binary records, never one RPC per event:
+#   - submit_detections(batch): one XML-RPC call carries a whole batch
+#     (xmlrpc.client.Binary of packed records, or a list of [approach, timestamp, vehicles])
+#   - a TCP stream (signal_server.py --detector-port): detectors write records
+#     back to back on one connection, with no framing or replies
+# Each record is RECORD: timestamp (float64, epoch seconds - 0 = time of
+# arrival), approach (uint8, signals 1-4) and vehicle count (uint16). The
+# server counts them into per-approach buckets of BUCKET_SECONDS and passes
+# each batch's totals to the demand meter adaptive timing sizes greens from.
+
+RECORD = struct.Struct("<dBH")
+BUCKET_SECONDS = 1.0
+RETENTION_SECONDS = 300.0    # How far back the bucketed counts reach
+STREAM_CHUNK = 64 * 1024     # Bytes read from a detector stream at a time
+DEFAULT_BATCH = 5000         # Events per submit_detections call from the load generator
+
+
+def pack_events(events):
+    """Pack (approach, timestamp, vehicles) events into one binary batch"""
+    return b"".join(RECORD.pack(timestamp, approach, vehicles) for approach, timestamp, vehicles in events)
+
+
+class DetectorAggregator:
+    """Per-approach vehicle counts in time buckets, fed from packed detector records"""
+
+    def __init__(self, meter=None, bucket_seconds=BUCKET_SECONDS, retention=RETENTION_SECONDS):
+        self.meter = meter  # DemandMeter that receives each batch's per-approach totals
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        self.lock = threading.Lock()
+        self.buckets = {}   # {bucket number: [vehicles on approach 1, 2, 3, 4]}
+        self.stats = {'events': 0, 'vehicles': 0, 'batches': 0, 'rejected': 0, 'streams': 0}
+
+    def ingest(self, data):
+        """Count the complete records in data (a trailing partial record is ignored); returns the events accepted"""
+        usable = len(data) - len(data) % RECORD.size
+        now = time.time()
+        totals = [0, 0, 0, 0]
+        counted = {}
+        rejected = 0
+        size = self.bucket_seconds
+        for timestamp, approach, vehicles in RECORD.iter_unpack(memoryview(data)[:usable]):
+            if not 1 <= approach <= 4:
+                rejected += 1
+                continue
+            totals[approach - 1] += vehicles
+            key = (int((timestamp or now) // size), approach - 1)
+            counted[key] = counted.get(key, 0) + vehicles
+
+        with self.lock:
+            for (bucket, column), vehicles in counted.items():
+                counts = self.buckets.get(bucket)
+                if counts is None:
+                    counts = self.buckets[bucket] = [0, 0, 0, 0]
+                counts[column] += vehicles
+            oldest = int((now - self.retention) // size)
+            for bucket in [bucket for bucket in self.buckets if bucket < oldest]:
+                del self.buckets[bucket]
+            events = usable // RECORD.size
+            self.stats['events'] += events - rejected
+            self.stats['vehicles'] += sum(totals)
+            self.stats['batches'] += 1
+            self.stats['rejected'] += rejected
+        if self.meter:
+            self.meter.record(totals)
+        return usable // RECORD.size - rejected
+
+    def counts(self, seconds, now=None):
+        """Vehicles per approach over the last seconds"""
+        now = time.time() if now is None else now
+        first = int((now - seconds) // self.bucket_seconds)
+        last = int(now // self.bucket_seconds)
+        totals = [0, 0, 0, 0]
+        with self.lock:
+            for bucket, counts in self.buckets.items():
+                if first < bucket <= last:
+                    for i, vehicles in enumerate(counts):
+                        totals[i] += vehicles
+        return totals
+
+    def get_stats(self):
+        with self.lock:
+            stats = {f"detector_{key}": value for key, value in self.stats.items()}
+        stats['detector_last_minute'] = self.counts(60)
+        return stats
+
+
+class DetectorStreamHandler(socketserver.BaseRequestHandler):
+    """One detector connection: packed records back to back until the detector disconnects"""
+
+    def handle(self):
+        aggregator = self.server.aggregator
+        with aggregator.lock:
+            aggregator.stats['streams'] += 1
+        pending = b""
+        while True:
+            chunk = self.request.recv(STREAM_CHUNK)
+            if not chunk:
+                break
+            pending += chunk
+            aggregator.ingest(pending)
+            pending = pending[len(pending) - len(pending) % RECORD.size:]  # Partial record completes in the next chunk
+
+
+class DetectorStreamServer(socketserver.ThreadingTCPServer):
+    """TCP listener for detector streams, one thread per connected detector"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, aggregator):
+        super().__init__(address, DetectorStreamHandler)
+        self.aggregator = aggregator
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="DetectorStream", daemon=True).start()
+        return self
+
+
+def synthetic_events(count, rates, clock=time.time, rng=random):
+    """count detector events spread over the approaches in proportion to rates"""
+    now = clock()
+    approaches = rng.choices((1, 2, 3, 4), weights=rates, k=count)
+    return [(approach, now, 1) for approach in approaches]
+
+
+def run_feed(args):
+    """Send synthetic detector events at a target rate; returns (events sent, seconds)"""
+    rates = [float(rate) for rate in args.approach_rates.split(",")]
+    if args.stream:
+        host, port = args.stream.rsplit(":", 1)
+        sink = socket.create_connection((host, int(port)))
+        send = sink.sendall
+    else:
+        transport = HLCTransport(HybridLogicalClock())
+        server = xmlrpc.client.ServerProxy(args.url, allow_none=True, transport=transport)
+        send = lambda data: server.submit_detections(xmlrpc.client.Binary(data))
+
+    sent = 0
+    interval = args.batch / args.rate  # Seconds between batches at the target rate
+    start = time.perf_counter()
+    try:
+        while time.perf_counter() - start < args.duration:
+            data = pack_events(synthetic_events(args.batch, rates))
+            send(data)
+            sent += args.batch
+            delay = start + sent / args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(min(delay, interval))
+    finally:
+        if args.stream:
+            sink.close()
+    return sent, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic detector feed: batched RPCs or a TCP stream")
+    parser.add_argument("--url", default=BALANCER_URL, help="server or load balancer for submit_detections")
+    parser.add_argument("--stream", metavar="HOST:PORT", help="stream records to a server's detector port instead")
+    parser.add_argument("--rate", type=float, default=20000, help="detector events per second")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="events per batch")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--approach-rates", default="1,1,1,1", help="relative demand of approaches 1-4")
+    args = parser.parse_args()
+
+    target = args.stream or urlsplit(args.url).netloc
+    print("=" * 80)
+    print(f"📡 DETECTOR FEED → {target} ({'stream' if args.stream else 'batched RPC'})")
+    print(f"🎯 {args.rate:.0f} events/s in batches of {args.batch}")
+    print("=" * 80)
+    try:
+        sent, seconds = run_feed(args)
+        print(f"✅ Sent {sent} events in {seconds:.1f}s - {sent / seconds:.0f} events/s")
+    except KeyboardInterrupt:
+        print("\n🛑 Detector feed stopped manually.")
+    except (OSError, xmlrpc.client.Error) as e:
+        print(f"❌ Detector feed failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
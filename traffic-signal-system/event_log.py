@@ -0,0 +1,100 @@
+import threading
+import time
+
+# APPEND-ONLY EVENT LOG WITH PER-SUBSCRIBER CURSORS
+# Replaces the global current_sequence / pedestrian_sequence lists that every
+# client popped from. Each subscriber keeps its own cursor, so two vehicle
+# controllers (or many pedestrian monitors) each see the complete sequence.
+
+DEFAULT_SUBSCRIBER = "default"
+
+
+class EventLog:
+    """Fixed-capacity ring buffer of (delay, message) entries with per-subscriber cursors"""
+
+    def __init__(self, capacity=1024, idle_timeout=300):
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self.entries = [None] * capacity  # Preallocated ring, slot = seq % capacity
+        self.next_seq = 0                 # Sequence number of the next appended entry
+        self.batch_start = 0              # First sequence of the most recent publish()
+        self.cursors = {}                 # {subscriber_id: next sequence to read}
+        self.last_seen = {}               # {subscriber_id: last read time}
+        self.lock = threading.Lock()
+
+    def oldest_seq(self):
+        """Oldest sequence number still retained in the ring"""
+        return max(0, self.next_seq - self.capacity)
+
+    def publish(self, entries):
+        """Append a batch of (delay, message) entries as one change sequence"""
+        with self.lock:
+            self.batch_start = self.next_seq
+            for entry in entries:
+                self.entries[self.next_seq % self.capacity] = entry
+                self.next_seq += 1
+            return self.batch_start
+
+    def subscribe(self, subscriber_id):
+        """Register a subscriber; new subscribers start at the latest change sequence"""
+        with self.lock:
+            return self._ensure_cursor(subscriber_id)
+
+    def unsubscribe(self, subscriber_id):
+        """Forget a subscriber's cursor"""
+        with self.lock:
+            self.cursors.pop(subscriber_id, None)
+            self.last_seen.pop(subscriber_id, None)
+
+    def _ensure_cursor(self, subscriber_id):
+        """Return the subscriber's cursor, creating it if needed (lock must be held)"""
+        cursor = self.cursors.get(subscriber_id)
+        if cursor is None:
+            self._expire_idle()
+            cursor = self.batch_start
+        # Subscriber fell behind the ring - skip to the oldest retained entry
+        if cursor < self.oldest_seq():
+            cursor = self.oldest_seq()
+        self.cursors[subscriber_id] = cursor
+        self.last_seen[subscriber_id] = time.time()
+        return cursor
+
+    def _expire_idle(self):
+        """Drop cursors of subscribers that have not read for idle_timeout seconds"""
+        cutoff = time.time() - self.idle_timeout
+        for subscriber_id in [s for s, seen in self.last_seen.items() if seen < cutoff]:
+            del self.cursors[subscriber_id]
+            del self.last_seen[subscriber_id]
+
+    def next(self, subscriber_id=DEFAULT_SUBSCRIBER):
+        """Pop the subscriber's next (delay, message) entry in O(1), or None when caught up"""
+        with self.lock:
+            cursor = self._ensure_cursor(subscriber_id)
+            if cursor >= self.next_seq:
+                return None
+            entry = self.entries[cursor % self.capacity]
+            self.cursors[subscriber_id] = cursor + 1
+            return entry
+
+    def next_batch(self, subscriber_id=DEFAULT_SUBSCRIBER, max_entries=256):
+        """Pop up to max_entries of the subscriber's unread entries as [(seq, entry), ...]"""
+        with self.lock:
+            cursor = self._ensure_cursor(subscriber_id)
+            end = min(self.next_seq, cursor + max_entries)
+            batch = [(seq, self.entries[seq % self.capacity]) for seq in range(cursor, end)]
+            self.cursors[subscriber_id] = end
+            return batch
+
+    def pending(self, subscriber_id=DEFAULT_SUBSCRIBER):
+        """Number of entries the subscriber has not read yet"""
+        with self.lock:
+            return self.next_seq - self._ensure_cursor(subscriber_id)
+
+    def get_stats(self):
+        """Return log statistics for monitoring"""
+        with self.lock:
+            return {
+                'log_capacity': self.capacity,
+                'log_total_published': self.next_seq,
+                'log_subscribers': len(self.cursors)
+            }
@@ -0,0 +1,274 @@
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+from bootstrap import parse_clock
+from adaptive_timing import webster_splits
+from phase_plan import CITY_SPACING, GREEN_WAVE_SPEED, PHASES, EPOCH, grid_epoch, make_plan, override_at, override_status
+from workload import APPROACHES, DEFAULT_APPROACH_RATES, TIME_OF_DAY_PROFILES, DemandProfile, seconds_of_day
+
+# VECTORIZED TRAFFIC FLOW SIMULATOR
+# Headless queue model for capacity planning. Every intersection has one
+# vehicle queue per approach (signals 1-4). Each step, Poisson arrivals join
+# the queues and green approaches discharge at the saturation flow. Signal
+# states come from the same timing plans the servers publish (phase_plan.py):
+# the plans of all intersections are packed into arrays and evaluated for the
+# whole city in one NumPy expression, so a step costs a few array operations
+# however many intersections there are. VIP preemptions hold one approach
+# green for VIP_DURATION, like vip_signal_manipulator. Delay is the time
+# vehicles spend queued (vehicle-seconds), so timing plans and preemption
+# policies can be compared offline on identical demand.
+
+SATURATION_FLOW = 0.5     # Vehicles per second an approach discharges while green (1800 veh/h)
+YELLOW_DISCHARGE = 0.5    # Share of the saturation flow still discharging during yellow
+VIP_DURATION = 10.0       # Seconds a VIP preemption holds its approach green (as on the servers)
+
+
+class PhaseTable:
+    """Timing plans of many intersections as arrays; signal states of all of them in one evaluation"""
+
+    def __init__(self, plans):
+        layout = [phase['signals'] for phase in plans[0]['phases']]
+        if any([phase['signals'] for phase in plan['phases']] != layout for plan in plans):
+            raise ValueError("All plans need the same phase order and signals")
+        phase_of = [next((k for k, signals in enumerate(layout) if approach in signals), None)
+                    for approach in APPROACHES]
+        if None in phase_of:
+            raise ValueError(f"Every approach {APPROACHES} needs a phase")
+
+        green = np.array([[phase['green'] for phase in plan['phases']] for plan in plans])
+        yellow = np.array([[phase['yellow'] for phase in plan['phases']] for plan in plans])
+        start = np.cumsum(green + yellow, axis=1) - (green + yellow)
+        self.epoch = np.array([plan['epoch'] for plan in plans])
+        self.cycle = (green + yellow).sum(axis=1)
+        # Per approach (columns 0-3 = signals 1-4): where its phase starts, turns yellow and ends
+        self.green_start = start[:, phase_of]
+        self.yellow_start = (start + green)[:, phase_of]
+        self.phase_end = (start + green + yellow)[:, phase_of]
+
+    def states(self, t):
+        """(green, yellow) boolean arrays of shape (intersections, 4) at plan time t"""
+        offset = ((t - self.epoch) % self.cycle)[:, None]
+        green = (offset >= self.green_start) & (offset < self.yellow_start)
+        yellow = (offset >= self.yellow_start) & (offset < self.phase_end)
+        return green, yellow
+
+
+def grid_epochs(rows, cols, spacing=CITY_SPACING, speed=GREEN_WAVE_SPEED):
+    """Plan epochs of a rows x cols green-wave grid, row by row"""
+    row, col = np.divmod(np.arange(rows * cols), cols)
+    return grid_epoch(row, col, spacing, speed)
+
+
+class FlowSimulator:
+    """Queue lengths, arrivals and discharge per approach for every intersection, stepped together"""
+
+    def __init__(self, plans, profile=None, start=0.0, start_tod=0.0, step=1.0,
+                 saturation_flow=SATURATION_FLOW, demand_spread=0.0, vip_rate=0.0, seed=None):
+        self.plans = plans
+        self.table = PhaseTable(plans)
+        self.profile = profile or DemandProfile()
+        self.count = len(plans)
+        self.t = start                # Plan time (the servers' clock) of the next step
+        self.start_tod = start_tod    # Time of day at start - scales demand along the profile curve
+        self.elapsed = 0.0
+        self.step_seconds = step
+        self.saturation_flow = saturation_flow
+        self.vip_rate = vip_rate      # VIP preemptions per intersection per hour
+        self.rng = np.random.default_rng(seed)
+        # VIPs draw from their own stream, so runs with and without them see identical arrivals
+        self.vip_rng = np.random.default_rng(None if seed is None else seed + 1)
+
+        # Per-intersection demand: the profile's approach rates, scaled by a lognormal factor
+        spread = self.rng.lognormal(0.0, demand_spread, (self.count, 1)) if demand_spread else 1.0
+        self.rates = np.asarray(self.profile.approach_rates) * spread  # Vehicles/s, shape (N, 4)
+
+        self.queue = np.zeros((self.count, 4))
+        self.arrived = np.zeros((self.count, 4))
+        self.departed = np.zeros((self.count, 4))
+        self.queue_seconds = np.zeros((self.count, 4))  # Vehicle-seconds spent queued (total delay)
+        self.max_queue = np.zeros((self.count, 4))
+        self.green_seconds = np.zeros((self.count, 4))
+
+        # Preemptions in effect: green approaches and end time (plan overrides and VIPs)
+        self.preempt_green = np.zeros((self.count, 4), dtype=bool)
+        self.preempt_until = np.full(self.count, -math.inf)
+        self.vip_preemptions = 0
+        for i, plan in enumerate(plans):
+            override = override_at(plan, start)
+            if override:
+                held = override_status(override)
+                self.preempt_green[i] = [held[f"t{a}"] == "green" for a in APPROACHES]
+                self.preempt_until[i] = math.inf if override['until'] is None else override['until']
+
+    def start_vips(self, dt):
+        """Begin VIP preemptions at random intersections not already preempted"""
+        starts = self.vip_rng.random(self.count) < self.vip_rate * dt / 3600
+        starts &= self.preempt_until <= self.t
+        chosen = np.flatnonzero(starts)
+        if chosen.size:
+            approach = self.vip_rng.integers(0, 4, chosen.size)
+            self.preempt_green[chosen] = False
+            self.preempt_green[chosen, approach] = True
+            self.preempt_until[chosen] = self.t + VIP_DURATION
+            self.vip_preemptions += chosen.size
+
+    def step(self):
+        """Advance every intersection by one step"""
+        dt = self.step_seconds
+        if self.vip_rate:
+            self.start_vips(dt)
+        green, yellow = self.table.states(self.t)
+        preempted = (self.preempt_until > self.t)[:, None]
+        green = np.where(preempted, self.preempt_green, green)
+        yellow &= ~preempted
+
+        demand = self.rates * (self.profile.multiplier(self.start_tod + self.elapsed) * dt)
+        arrivals = self.rng.poisson(demand)
+        capacity = (green + YELLOW_DISCHARGE * yellow) * (self.saturation_flow * dt)
+
+        self.queue += arrivals
+        departures = np.minimum(self.queue, capacity)
+        self.queue -= departures
+        self.arrived += arrivals
+        self.departed += departures
+        self.queue_seconds += self.queue * dt
+        np.maximum(self.max_queue, self.queue, out=self.max_queue)
+        self.green_seconds += green * dt
+        self.t += dt
+        self.elapsed += dt
+
+    def run(self, duration):
+        """Simulate duration seconds; returns the wall-clock seconds it took"""
+        started = time.perf_counter()
+        for _ in range(int(round(duration / self.step_seconds))):
+            self.step()
+        return time.perf_counter() - started
+
+    def get_stats(self, wall_seconds=None):
+        """Delay, throughput and queue summary of the run so far"""
+        arrived = self.arrived.sum()
+        hours = self.elapsed / 3600 if self.elapsed else 1.0
+        stats = {
+            'intersections': self.count,
+            'simulated_seconds': self.elapsed,
+            'arrivals': int(arrived),
+            'departures': int(self.departed.sum()),
+            'throughput_vph': self.departed.sum() / hours / self.count,  # Per intersection
+            'mean_delay_s': self.queue_seconds.sum() / arrived if arrived else 0.0,
+            'max_queue': float(self.max_queue.max()),
+            'mean_max_queue': float(self.max_queue.mean()),
+            'residual_queue': float(self.queue.sum()),
+            'degree_of_saturation': float((self.arrived / np.maximum(
+                self.green_seconds * self.saturation_flow, 1e-9)).mean()),
+            'vip_preemptions': self.vip_preemptions,
+        }
+        for a in APPROACHES:
+            column = a - 1
+            approach_arrived = self.arrived[:, column].sum()
+            stats[f"approach_{a}_delay_s"] = (self.queue_seconds[:, column].sum() / approach_arrived
+                                              if approach_arrived else 0.0)
+        if wall_seconds is not None:
+            stats['wall_seconds'] = wall_seconds
+            stats['realtime_factor'] = self.elapsed / wall_seconds if wall_seconds else math.inf
+            stats['intersection_steps_per_s'] = (self.count * self.elapsed / self.step_seconds / wall_seconds
+                                                 if wall_seconds else math.inf)
+        return stats
+
+
+def parse_splits(text):
+    """'5:3,5:3' -> phases with those green:yellow seconds, in PHASES order"""
+    splits = [tuple(float(value) for value in split.split(":")) for split in text.split(",")]
+    if len(splits) != len(PHASES):
+        raise ValueError(f"Need one green:yellow split per phase ({len(PHASES)})")
+    return tuple(dict(phase, green=green, yellow=yellow) for phase, (green, yellow) in zip(PHASES, splits))
+
+
+def build_plans(args):
+    """Timing plans of the simulated city: a green-wave grid or independent intersections"""
+    if args.splits == "webster":
+        rates = [float(r) for r in args.approach_rates.split(",")]
+        phases = webster_splits(rates, PHASES, saturation_flow=args.saturation_flow)
+        print("🧮 Webster splits: " + ", ".join(f"{p['name']} {p['green']:.0f}s green" for p in phases))
+    else:
+        phases = parse_splits(args.splits) if args.splits else PHASES
+    if args.grid:
+        rows, cols = (int(value) for value in args.grid.lower().split("x"))
+        epochs = grid_epochs(rows, cols)
+    else:
+        epochs = np.full(args.intersections, EPOCH)
+    return [make_plan(phases, epoch=float(epoch)) for epoch in epochs]
+
+
+def simulate(args, plans, vip_rate):
+    start_tod = seconds_of_day(parse_clock(args.start_time)) if args.start_time else 0.0
+    profile = DemandProfile([float(r) for r in args.approach_rates.split(",")], args.profile)
+    simulator = FlowSimulator(plans, profile, start=start_tod, start_tod=start_tod, step=args.step,
+                              saturation_flow=args.saturation_flow, demand_spread=args.demand_spread,
+                              vip_rate=vip_rate, seed=args.seed)
+    return simulator.get_stats(simulator.run(args.duration))
+
+
+def print_report(title, stats):
+    print("\n" + "=" * 80)
+    print(f"🚦 {title}")
+    print(f"   🏙️ {stats['intersections']} intersections, {stats['simulated_seconds']:.0f}s simulated "
+          f"in {stats['wall_seconds']:.2f}s ({stats['realtime_factor']:.0f}x real time, "
+          f"{stats['intersection_steps_per_s'] / 1e6:.1f}M intersection-steps/s)")
+    print(f"   🚗 Arrivals: {stats['arrivals']} | Departures: {stats['departures']} | "
+          f"Throughput: {stats['throughput_vph']:.0f} veh/h per intersection")
+    print(f"   ⏱️ Mean delay: {stats['mean_delay_s']:.1f} s/veh | by approach: " +
+          " | ".join(f"{a}: {stats[f'approach_{a}_delay_s']:.1f}s" for a in APPROACHES))
+    print(f"   📏 Max queue: {stats['max_queue']:.1f} veh (mean per approach {stats['mean_max_queue']:.1f}) | "
+          f"Residual: {stats['residual_queue']:.0f} veh | Degree of saturation: {stats['degree_of_saturation']:.2f}")
+    if stats['vip_preemptions']:
+        print(f"   👑 VIP preemptions: {stats['vip_preemptions']}")
+    print("=" * 80)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless vectorized traffic flow simulator for capacity planning")
+    parser.add_argument("--intersections", type=int, default=10000, help="independent intersections to simulate")
+    parser.add_argument("--grid", help="simulate a ROWSxCOLS green-wave grid instead (overrides --intersections)")
+    parser.add_argument("--duration", type=float, default=3600.0, help="simulated seconds")
+    parser.add_argument("--step", type=float, default=1.0, help="seconds per simulation step")
+    parser.add_argument("--splits", help="green:yellow seconds per phase, e.g. 20:3,15:3, or 'webster' to size them "
+                             "from --approach-rates (default: the server plan)")
+    parser.add_argument("--profile", default="flat", choices=sorted(TIME_OF_DAY_PROFILES),
+                        help="time-of-day demand curve")
+    parser.add_argument("--start-time", help="time of day the run starts at, HH:MM:SS (default: midnight)")
+    parser.add_argument("--approach-rates", default=",".join(map(str, DEFAULT_APPROACH_RATES)),
+                        help="arrivals/s for approaches 1-4, comma separated")
+    parser.add_argument("--demand-spread", type=float, default=0.3,
+                        help="lognormal sigma of per-intersection demand (0 = identical intersections)")
+    parser.add_argument("--saturation-flow", type=float, default=SATURATION_FLOW,
+                        help="vehicles/s an approach discharges while green")
+    parser.add_argument("--vip-rate", type=float, default=0.0, help="VIP preemptions per intersection per hour")
+    parser.add_argument("--compare-vip", action="store_true",
+                        help="also run without VIPs on the same arrivals and report the delay they cost")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    args = parser.parse_args()
+    try:
+        plans = build_plans(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = {'vip': simulate(args, plans, args.vip_rate)}
+    print_report("FLOW SIMULATION" + (f" - VIP rate {args.vip_rate}/h" if args.vip_rate else ""), results['vip'])
+    if args.compare_vip and args.vip_rate:
+        results['baseline'] = simulate(args, plans, 0.0)
+        print_report("FLOW SIMULATION - NO VIPs (same arrivals)", results['baseline'])
+        cost = results['vip']['mean_delay_s'] - results['baseline']['mean_delay_s']
+        print(f"👑 VIP preemption cost: {cost:+.2f} s/veh mean delay")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import threading
+import time
+import xmlrpc.client
+from datetime import datetime
+from xmlrpc.server import SimpleXMLRPCRequestHandler
+
+# HYBRID LOGICAL CLOCK (HLC)
+# Request and VIP timestamps used to come from a per-server integer counter, so
+# PRIMARY and CLONE timestamps could not be compared. An HLC timestamp is the
+# physical time in milliseconds plus a logical counter, packed into one integer
+# (wall_ms << LOGICAL_BITS | logical) so ordering is a plain integer compare and
+# the HLC update rules reduce to a max().
+# Every XML-RPC call carries the sender's timestamp in an X-HLC HTTP header on
+# both request and response; receivers merge it, so any event that causally
+# follows another gets a larger timestamp - across clients, balancer and servers.
+# XML-RPC ints are 32-bit, so timestamps travel as "wall_ms.logical" strings.
+
+HLC_HEADER = "X-HLC"
+LOGICAL_BITS = 16
+LOGICAL_MASK = (1 << LOGICAL_BITS) - 1
+MAX_DRIFT_MS = 60_000  # Remote timestamps further ahead than this are ignored
+
+
+def encode(timestamp):
+    """Wire form of a packed timestamp: 'wall_ms.logical'"""
+    return f"{timestamp >> LOGICAL_BITS}.{timestamp & LOGICAL_MASK:05d}"
+
+
+def decode(text):
+    """Packed timestamp from its wire form; raises ValueError if malformed"""
+    wall_ms, logical = text.split('.')
+    return (int(wall_ms) << LOGICAL_BITS) | int(logical)
+
+
+def format_timestamp(timestamp):
+    """Human-readable timestamp: HH:MM:SS.mmm+logical"""
+    wall = datetime.fromtimestamp((timestamp >> LOGICAL_BITS) / 1000)
+    return f"{wall.strftime('%H:%M:%S.%f')[:-3]}+{timestamp & LOGICAL_MASK}"
+
+
+class HybridLogicalClock:
+    """Physical-plus-logical clock; now() for local/send events, update() on receipt"""
+
+    def __init__(self, physical=time.time, max_drift_ms=MAX_DRIFT_MS):
+        self.physical = physical       # Seconds since the epoch (e.g. a Berkeley-synchronized clock)
+        self.max_drift_ms = max_drift_ms
+        self.lock = threading.Lock()   # Tiny dedicated lock - never the server's state lock
+        self.last = 0
+        self.merges = 0
+        self.rejected = 0
+
+    def _physical_packed(self):
+        return int(self.physical() * 1000) << LOGICAL_BITS
+
+    def now(self):
+        """Timestamp a local or send event"""
+        physical = self._physical_packed()
+        with self.lock:
+            self.last = max(physical, self.last + 1)
+            return self.last
+
+    def update(self, remote):
+        """Merge a received timestamp and timestamp the receive event"""
+        physical = self._physical_packed()
+        with self.lock:
+            if (remote >> LOGICAL_BITS) - (physical >> LOGICAL_BITS) > self.max_drift_ms:
+                self.rejected += 1  # Sender's clock is far ahead - don't let it drag ours along
+                self.last = max(physical, self.last + 1)
+            else:
+                self.merges += 1
+                self.last = max(physical, self.last + 1, remote + 1)
+            return self.last
+
+    def restore(self, timestamp):
+        """Never issue a timestamp at or below one already used (journal replay)"""
+        with self.lock:
+            self.last = max(self.last, timestamp)
+
+    def receive_header(self, value):
+        """Merge a timestamp from an X-HLC header, ignoring malformed values"""
+        if value:
+            try:
+                self.update(decode(value))
+            except ValueError:
+                pass
+
+    def get_stats(self):
+        """Return HLC statistics (timestamp in wire form - too large for an XML-RPC int)"""
+        with self.lock:
+            return {
+                'hlc_timestamp': encode(self.last),
+                'hlc_merges': self.merges,
+                'hlc_rejected': self.rejected
+            }
+
+
+class HLCTransport(xmlrpc.client.Transport):
+    """XML-RPC transport that sends our HLC timestamp and merges the reply's"""
+
+    def __init__(self, clock, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.clock = clock
+
+    def send_headers(self, connection, headers):
+        super().send_headers(connection, headers)
+        connection.putheader(HLC_HEADER, encode(self.clock.now()))
+
+    def parse_response(self, response):
+        self.clock.receive_header(response.getheader(HLC_HEADER))
+        return super().parse_response(response)
+
+
+class HLCRequestHandler(SimpleXMLRPCRequestHandler):
+    """XML-RPC request handler that merges the caller's HLC timestamp and stamps the reply"""
+    hlc = None  # Set to the process's HybridLogicalClock
+
+    def parse_request(self):
+        parsed = super().parse_request()
+        if parsed and self.hlc:
+            self.hlc.receive_header(self.headers.get(HLC_HEADER))
+        return parsed
+
+    def end_headers(self):
+        if self.hlc:
+            self.send_header(HLC_HEADER, encode(self.hlc.now()))
+        super().end_headers()
@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+
+# EVENT-SOURCED STATE JOURNAL
+# State-changing server events are appended to a JSON-lines journal and
+# periodically compacted into a snapshot. Writes are buffered and fsync'd in
+# batches by a background flusher, so the request path never waits on disk.
+# A snapshot is taken in two steps: begin_snapshot() rotates the journal aside
+# (cheap - call it where the captured state is consistent), then
+# write_snapshot() serializes the state and drops the rotated file, off the
+# request path. On restart the latest snapshot is loaded and only the journal
+# tail replayed (the rotated file first, if a snapshot was cut short).
+
+JOURNAL_DIR = os.environ.get("TRAFFIC_JOURNAL_DIR") or \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "journal")
+
+
+class StateJournal:
+    """Append-only journal with compact snapshots and a batched fsync policy"""
+
+    def __init__(self, name, directory=JOURNAL_DIR, fsync_interval=0.05,
+                 fsync_batch=512, snapshot_every=10000):
+        self.name = name
+        self.directory = directory
+        self.journal_path = os.path.join(directory, f"{name}.journal")
+        self.snapshot_path = os.path.join(directory, f"{name}.snapshot.json")
+        self.rotated_path = self.journal_path + ".old"  # Events awaiting an in-flight snapshot
+        self.fsync_interval = fsync_interval  # Max seconds an event waits for fsync
+        self.fsync_batch = fsync_batch        # Pending events that force an early fsync
+        self.snapshot_every = snapshot_every  # Journal events between snapshots
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.file = None
+        self.flusher = None
+        self.running = False
+        self.seq = 0                 # Sequence number of the last appended event
+        self.snapshot_seq = 0        # Sequence number covered by the latest snapshot
+        self.snapshotting = False    # Journal rotated, snapshot not yet written
+        self.pending = 0             # Events written but not yet fsync'd
+        self.stats = {'appended': 0, 'fsyncs': 0, 'snapshots': 0, 'replayed': 0}
+
+    def open(self):
+        """Open the journal for appending and start the background fsync thread"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.file = open(self.journal_path, "a", encoding="utf-8")
+        self.running = True
+        self.flusher = threading.Thread(target=self._flush_loop, name=f"Journal-{self.name}", daemon=True)
+        self.flusher.start()
+        return self
+
+    def close(self):
+        """Flush outstanding events and close the journal"""
+        self.running = False
+        self.wakeup.set()
+        if self.flusher:
+            self.flusher.join()
+            self.flusher = None
+        with self.lock:
+            if self.file:
+                self._fsync()
+                self.file.close()
+                self.file = None
+
+    def append(self, event_type, data):
+        """Append one event; durability follows within fsync_interval"""
+        with self.lock:
+            self.seq += 1
+            self.file.write(json.dumps([self.seq, event_type, data], separators=(",", ":")))
+            self.file.write("\n")
+            self.pending += 1
+            self.stats['appended'] += 1
+            if self.pending >= self.fsync_batch:
+                self.wakeup.set()
+            return self.seq
+
+    def sync(self):
+        """Force all appended events to disk now"""
+        with self.lock:
+            self._fsync()
+
+    def _fsync(self):
+        """Flush and fsync the journal file (lock must be held)"""
+        if self.file and self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+            self.stats['fsyncs'] += 1
+
+    def _flush_loop(self):
+        """Background thread: group-commit pending events every fsync_interval"""
+        while self.running:
+            self.wakeup.wait(self.fsync_interval)
+            self.wakeup.clear()
+            try:
+                with self.lock:
+                    self._fsync()
+            except Exception as e:
+                print(f"❌ Journal {self.name}: fsync failed: {e}")
+
+    def should_snapshot(self):
+        """True once enough events have accumulated since the last snapshot (and none is in flight)"""
+        return not self.snapshotting and self.seq - self.snapshot_seq >= self.snapshot_every
+
+    def begin_snapshot(self):
+        """Rotate the journal aside for a snapshot of the state as of now; returns the seq it covers"""
+        with self.lock:
+            self._fsync()
+            if self.file:
+                self.file.close()
+                if os.path.exists(self.rotated_path):
+                    # An earlier snapshot never completed - its events stay ahead of ours
+                    with open(self.rotated_path, "a", encoding="utf-8") as rotated, \
+                            open(self.journal_path, encoding="utf-8") as current:
+                        rotated.write(current.read())
+                        rotated.flush()
+                        os.fsync(rotated.fileno())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self.rotated_path)
+                self.file = open(self.journal_path, "a", encoding="utf-8")
+            self.snapshotting = True
+            return self.seq
+
+    def write_snapshot(self, state, seq):
+        """Write the snapshot of state covering events up to seq atomically, then drop the rotated journal"""
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "time": time.time(), "state": state}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        with self.lock:
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+            self.snapshot_seq = seq
+            self.snapshotting = False
+            self.stats['snapshots'] += 1
+        return seq
+
+    def abort_snapshot(self):
+        """Give up an in-flight snapshot; its events stay in the rotated journal for replay"""
+        with self.lock:
+            self.snapshotting = False
+
+    def snapshot(self, state):
+        """Write a compact snapshot of state and start a fresh journal (both steps at once)"""
+        return self.write_snapshot(state, self.begin_snapshot())
+
+    def replay(self, apply_snapshot, apply_event):
+        """Load the latest snapshot, then replay newer journal events; returns events replayed"""
+        replayed = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.seq = self.snapshot_seq = snapshot["seq"]
+            apply_snapshot(snapshot["state"])
+
+        for path in (self.rotated_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        seq, event_type, data = json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail from a crash - nothing after it is valid
+                        print(f"⚠️ Journal {self.name}: ignoring truncated entry after seq {self.seq}")
+                        break
+                    if seq <= self.snapshot_seq:
+                        continue  # Already covered by the snapshot
+                    apply_event(event_type, data)
+                    self.seq = seq
+                    replayed += 1
+
+        self.stats['replayed'] = replayed
+        return replayed
+
+    def get_stats(self):
+        """Return journal statistics for monitoring"""
+        with self.lock:
+            return {
+                'journal_seq': self.seq,
+                'journal_snapshot_seq': self.snapshot_seq,
+                'journal_pending_fsync': self.pending,
+                'journal_appended': self.stats['appended'],
+                'journal_fsyncs': self.stats['fsyncs'],
+                'journal_snapshots': self.stats['snapshots'],
+                'journal_replayed': self.stats['replayed']
+            }
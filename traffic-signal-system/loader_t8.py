@@ -1,38 +1,50 @@
+import argparse
 import xmlrpc.client
-from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+from xmlrpc.server import SimpleXMLRPCServer
 import threading
 import time
 import socket
+import socketserver
 from collections import defaultdict
+from shared_state import attach_from_env
+from hlc import HybridLogicalClock, HLCRequestHandler, HLCTransport, encode
 
-class ThreadedXMLRPCRequestHandler(SimpleXMLRPCRequestHandler):
+class ThreadedXMLRPCRequestHandler(HLCRequestHandler):
     """Custom request handler with timeout handling"""
     timeout = 60
+    protocol_version = "HTTP/1.1"  # Keep-alive: clients can reuse and pipeline one connection
     
     def setup(self):
         """Setup with socket timeout"""
-        SimpleXMLRPCRequestHandler.setup(self)
+        HLCRequestHandler.setup(self)
         self.request.settimeout(self.timeout)
 
+class ThreadedXMLRPCServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    """XML-RPC server with one thread per connection, so keep-alive clients don't block others"""
+    daemon_threads = True
+
+# Balancer's hybrid logical clock - merges client and server timestamps in both directions
+hlc = HybridLogicalClock()
+ThreadedXMLRPCRequestHandler.hlc = hlc
+
+# Backends in priority order: PRIMARY first, then clones/replicas
+DEFAULT_BACKENDS = ["http://127.0.0.1:8000/", "http://127.0.0.1:8001/"]
+MAX_REQUESTS_PER_SERVER = 10
+REPLICATION_RETRY_INTERVAL = 2.0  # Seconds between attempts to catch up backends that missed a state change
+
 class LoadBalancer:
-    def __init__(self):
+    def __init__(self, backend_urls=DEFAULT_BACKENDS, max_requests=MAX_REQUESTS_PER_SERVER):
         self.servers = [
             {
-                "url": "http://127.0.0.1:8000/", 
-                "active_requests": 0, 
-                "max_requests": 10,
-                "connection_pool": [],
-                "failed_attempts": 0,
-                "last_failure": None
-            },
-            {
-                "url": "http://127.0.0.1:8001/", 
+                "url": url, 
                 "active_requests": 0, 
-                "max_requests": 10,
+                "max_requests": max_requests,
+                "requests": 0,
                 "connection_pool": [],
                 "failed_attempts": 0,
                 "last_failure": None
             }
+            for url in backend_urls
         ]
         self.lock = threading.Lock()
         self.total_requests = 0
@@ -40,6 +52,9 @@ class LoadBalancer:
         self.failed_requests = 0
         self.timeout_requests = 0
         self.retry_attempts = 0
+        self.shared_state_reads = 0
+        self.pending_replication = {}  # {server_index: (method_name, args)} - latest state change it missed
+        self.replication_retries = 0
         
     def create_server_connection(self, server_index, timeout=60):
         """Create a new server connection with proper timeout"""
@@ -47,7 +62,7 @@ class LoadBalancer:
             server_url = self.servers[server_index]["url"]
             
             # Create transport with timeout
-            transport = xmlrpc.client.Transport(use_datetime=True)
+            transport = HLCTransport(hlc, use_datetime=True)
             transport.timeout = timeout
             
             proxy = xmlrpc.client.ServerProxy(
@@ -73,16 +88,18 @@ class LoadBalancer:
             return None
         
         # Try to reuse existing connection from pool
-        if server_info["connection_pool"]:
-            return server_info["connection_pool"].pop()
+        with self.lock:
+            if server_info["connection_pool"]:
+                return server_info["connection_pool"].pop()
         
         # Create new connection
         return self.create_server_connection(server_index)
     
     def return_connection_to_pool(self, server_index, connection):
         """Return connection to pool for reuse"""
-        if connection and len(self.servers[server_index]["connection_pool"]) < 5:
-            self.servers[server_index]["connection_pool"].append(connection)
+        with self.lock:
+            if connection and len(self.servers[server_index]["connection_pool"]) < 5:
+                self.servers[server_index]["connection_pool"].append(connection)
     
     def mark_server_failure(self, server_index, error):
         """Mark server as failed temporarily"""
@@ -99,14 +116,12 @@ class LoadBalancer:
             self.servers[server_index]["last_failure"] = None
     
     def get_available_server(self):
-        """Simple logic: Use primary server unless it's overloaded, then use secondary"""
+        """Simple logic: Use primary server unless it's overloaded, then the next replica with capacity"""
         with self.lock:
             primary_load = self.servers[0]["active_requests"]
             primary_max = self.servers[0]["max_requests"]
             primary_healthy = self.servers[0]["failed_attempts"] <= 3
             
-            secondary_healthy = self.servers[1]["failed_attempts"] <= 3
-            
             print(f"🔍 Primary server: {primary_load}/{primary_max} requests")
             
             # Use primary server if it has capacity and is healthy
@@ -114,21 +129,27 @@ class LoadBalancer:
                 print(f"✅ Using PRIMARY server")
                 return 0
             
-            # Primary is overloaded or unhealthy - use secondary if available
-            elif secondary_healthy:
-                print(f"🔄 PRIMARY OVERLOADED ({primary_load}/{primary_max}) - Using SECONDARY server")
+            # Primary is overloaded or unhealthy - use the first healthy replica with capacity,
+            # or failing that the first healthy one (with a single replica: the SECONDARY)
+            healthy = [i for i in range(1, len(self.servers)) if self.servers[i]["failed_attempts"] <= 3]
+            with_capacity = [i for i in healthy
+                             if self.servers[i]["active_requests"] < self.servers[i]["max_requests"]]
+            if healthy:
+                server_index = (with_capacity or healthy)[0]
+                print(f"🔄 PRIMARY OVERLOADED ({primary_load}/{primary_max}) - Using server {server_index}")
                 self.load_balanced_requests += 1
-                return 1
+                return server_index
             
-            # Both servers have issues - try primary anyway
+            # All servers have issues - try primary anyway
             else:
-                print(f"⚠️ Both servers have issues - trying PRIMARY")
+                print(f"⚠️ All servers have issues - trying PRIMARY")
                 return 0
     
     def increment_server_load(self, server_index):
         """Increment active request count for a server"""
         with self.lock:
             self.servers[server_index]["active_requests"] += 1
+            self.servers[server_index]["requests"] += 1
             self.total_requests += 1
             current_load = self.servers[server_index]["active_requests"]
             max_load = self.servers[server_index]["max_requests"]
@@ -219,26 +240,158 @@ class LoadBalancer:
         print(f"❌ {method_name} failed after {max_retries} attempts")
         return None
     
+    def route_clock_request(self, method_name, *args):
+        """Send clock sync RPCs to the PRIMARY (time master) so one coordinator sees every sample"""
+        connection = self.get_server_connection(0)
+        if connection:
+            try:
+                result = getattr(connection, method_name)(*args)
+                self.return_connection_to_pool(0, connection)
+                return result
+            except Exception as e:
+                self.mark_server_failure(0, f"clock sync error: {e}")
+        # PRIMARY down - the clone runs its own Berkeley rounds
+        return self.route_request_with_retry(method_name, *args)
+    
+    def broadcast_request(self, method_name, *args, replicate=None):
+        """Apply a state change on the first backend that answers, then replicate it to the others.
+        
+        A refusal (a reply with 'accepted' False) from the deciding backend is returned without
+        touching the others. Otherwise replicate(result) gives the arguments that reproduce the
+        deciding backend's resulting state elsewhere (default: the same arguments). Backends that
+        refuse them or cannot be reached are listed in the result's 'replica_errors' (when it is a
+        dict) and caught up in the background once they answer again.
+        """
+        decision = decider = None
+        replica_errors = {}
+        for server_index in range(len(self.servers)):
+            url = self.servers[server_index]["url"]
+            call_args = args if decider is None else replicate_args
+            connection = self.get_server_connection(server_index)
+            if not connection:
+                if decider is not None:
+                    replica_errors[url] = "unreachable"
+                    self.queue_replication(server_index, method_name, call_args)
+                continue
+            try:
+                result = getattr(connection, method_name)(*call_args)
+                self.mark_server_success(server_index)
+                self.return_connection_to_pool(server_index, connection)
+            except Exception as e:
+                self.mark_server_failure(server_index, f"{method_name} replication error: {e}")
+                if decider is not None:
+                    replica_errors[url] = f"unreachable: {e}"
+                    self.queue_replication(server_index, method_name, call_args)
+                continue
+            if decider is None:
+                decision, decider = result, server_index
+                if not replication_accepted(result):
+                    break
+                replicate_args = replicate(result) if replicate else args
+                # Backends before the decider were down when it answered
+                for missed in range(server_index):
+                    replica_errors[self.servers[missed]["url"]] = "unreachable"
+                    self.queue_replication(missed, method_name, replicate_args)
+            elif replication_accepted(result):
+                with self.lock:
+                    self.pending_replication.pop(server_index, None)
+            else:
+                error = result.get('error') if isinstance(result, dict) else result
+                replica_errors[url] = f"refused: {error}"
+                self.queue_replication(server_index, method_name, call_args)
+        for url, error in replica_errors.items():
+            print(f"⚠️ {method_name} not applied on {url} ({error}) - retrying in the background")
+        if replica_errors and isinstance(decision, dict):
+            decision['replica_errors'] = replica_errors
+        with self.lock:
+            self.total_requests += 1
+        return decision
+    
+    def queue_replication(self, server_index, method_name, args):
+        """Remember the latest state change a backend missed (it supersedes any earlier one)"""
+        with self.lock:
+            self.pending_replication[server_index] = (method_name, args)
+    
+    def retry_replication(self):
+        """Re-send each missed state change to its backend; returns how many are still pending"""
+        with self.lock:
+            pending = list(self.pending_replication.items())
+        for server_index, call in pending:
+            method_name, args = call
+            connection = self.get_server_connection(server_index)
+            if not connection:
+                continue
+            try:
+                result = getattr(connection, method_name)(*args)
+                self.mark_server_success(server_index)
+                self.return_connection_to_pool(server_index, connection)
+            except Exception as e:
+                self.mark_server_failure(server_index, f"{method_name} catch-up error: {e}")
+                continue
+            with self.lock:
+                self.replication_retries += 1
+                if not replication_accepted(result) or self.pending_replication.get(server_index) is not call:
+                    continue  # Still refused, or a newer change replaced this one meanwhile
+                del self.pending_replication[server_index]
+            print(f"✅ {method_name} caught up on {self.servers[server_index]['url']}")
+        with self.lock:
+            return len(self.pending_replication)
+    
+    def replication_loop(self):
+        """Background thread: catch up backends that missed a replicated state change"""
+        while True:
+            time.sleep(REPLICATION_RETRY_INTERVAL)
+            if self.pending_replication:
+                self.retry_replication()
+    
     def get_load_balancer_stats(self):
         """Return load balancer statistics"""
         with self.lock:
-            return {
+            stats = {
                 "total_requests": self.total_requests,
                 "load_balanced_requests": self.load_balanced_requests,
                 "failed_requests": self.failed_requests,
                 "timeout_requests": self.timeout_requests,
                 "retry_attempts": self.retry_attempts,
-                "server_0_load": f"{self.servers[0]['active_requests']}/{self.servers[0]['max_requests']}",
-                "server_1_load": f"{self.servers[1]['active_requests']}/{self.servers[1]['max_requests']}",
-                "server_0_failures": self.servers[0]["failed_attempts"],
-                "server_1_failures": self.servers[1]["failed_attempts"],
-                "server_0_url": self.servers[0]["url"],
-                "server_1_url": self.servers[1]["url"]
+                "shared_state_reads": self.shared_state_reads,
+                "pending_replication": len(self.pending_replication),
+                "replication_retries": self.replication_retries,
+                "balancer_hlc": encode(hlc.last),
+                "server_count": len(self.servers)
             }
+            for i, server_info in enumerate(self.servers):
+                stats[f"server_{i}_load"] = f"{server_info['active_requests']}/{server_info['max_requests']}"
+                stats[f"server_{i}_requests"] = server_info["requests"]
+                stats[f"server_{i}_failures"] = server_info["failed_attempts"]
+                stats[f"server_{i}_url"] = server_info["url"]
+            return stats
+
+def replication_accepted(result):
+    """True if a backend applied a replicated state change ({'accepted': True, ...} or True)"""
+    return result.get('accepted', False) if isinstance(result, dict) else bool(result)
 
-# Global load balancer instance
+# Global load balancer instance (rebuilt in main if --backend is given)
 load_balancer = LoadBalancer()
 
+# Shared-memory mode: answer signal reads straight from the co-located servers' segment
+shared_state = attach_from_env()
+SHARED_STATE_MAX_AGE = 2.0  # Fall back to RPC if no server has refreshed the segment recently
+
+def read_shared_snapshot():
+    """Return a fresh lock-free snapshot of the shared signal state, or None"""
+    if shared_state is None:
+        return None
+    try:
+        snapshot = shared_state.read(0)
+    except Exception as e:
+        print(f"⚠️ Shared state read failed: {e}")
+        return None
+    if not snapshot['version'] or time.time() - snapshot['updated_at'] > SHARED_STATE_MAX_AGE:
+        return None
+    with load_balancer.lock:
+        load_balancer.shared_state_reads += 1
+    return snapshot
+
 # Wrapper functions for all the original server methods
 def signal_manipulator(requested_signal):
     result = load_balancer.route_request_with_retry("signal_manipulator", requested_signal)
@@ -248,18 +401,37 @@ def vip_signal_manipulator(requested_signal):
     result = load_balancer.route_request_with_retry("vip_signal_manipulator", requested_signal)
     return result if result is not None else False
 
+def set_manual_override(changes, operator=None):
+    # The first backend resolves the operator's changes against its own status; the others get
+    # that full status, so a replica a phase behind still ends up holding the same states
+    result = load_balancer.broadcast_request("set_manual_override", changes, operator,
+                                             replicate=lambda decision: (decision['signal_status'], operator))
+    return result if result is not None else {'accepted': False, 'error': "no server reachable", 'signal_status': {}}
+
+def release_manual_override(operator=None):
+    result = load_balancer.broadcast_request("release_manual_override", operator)
+    return result if result is not None else False
+
+def submit_detections(batch):
+    result = load_balancer.route_request_with_retry("submit_detections", batch)
+    return result if result is not None else 0
+
 def submit_vip_requests(vip_data):
     result = load_balancer.route_request_with_retry("submit_vip_requests", vip_data)
     return result if result is not None else False
 
-def get_next_message():
-    result = load_balancer.route_request_with_retry("get_next_message")
+def get_next_message(subscriber_id="default"):
+    result = load_balancer.route_request_with_retry("get_next_message", subscriber_id)
     return result
 
-def get_next_pedestrian_message():
-    result = load_balancer.route_request_with_retry("get_next_pedestrian_message")
+def get_next_pedestrian_message(subscriber_id="default"):
+    result = load_balancer.route_request_with_retry("get_next_pedestrian_message", subscriber_id)
     return result
 
+def get_pedestrian_events(subscriber_id="default", max_events=256):
+    result = load_balancer.route_request_with_retry("get_pedestrian_events", subscriber_id, max_events)
+    return result if result is not None else []
+
 def register_client_time(client_id, time_input):
     result = load_balancer.route_request_with_retry("register_client_time", client_id, time_input)
     return result if result is not None else False
@@ -272,7 +444,17 @@ def get_synchronized_time():
     result = load_balancer.route_request_with_retry("get_synchronized_time")
     return result
 
+def get_clock_time():
+    return load_balancer.route_clock_request("get_clock_time")
+
+def report_clock_sample(client_id, offset, rtt=None, round_id=None):
+    result = load_balancer.route_clock_request("report_clock_sample", client_id, offset, rtt, round_id)
+    return result if result is not None else 0.0
+
 def get_active_signal():
+    snapshot = read_shared_snapshot()
+    if snapshot:
+        return snapshot['current_active_signal']
     result = load_balancer.route_request_with_retry("get_active_signal")
     return result if result is not None else 1
 
@@ -287,6 +469,9 @@ def get_system_stats():
         return lb_stats
 
 def get_signal_status():
+    snapshot = read_shared_snapshot()
+    if snapshot:
+        return snapshot['signal_status']
     result = load_balancer.route_request_with_retry("get_signal_status")
     if result is None:
         return {
@@ -295,6 +480,13 @@ def get_signal_status():
         }
     return result
 
+def get_timing_plan(known_version=0):
+    result = load_balancer.route_request_with_retry("get_timing_plan", known_version)
+    if result is None:
+        # No backend answered - version-only reply keeps the client's current plan
+        return {'version': known_version, 'server_time': time.time()}
+    return result
+
 def get_countdown_info():
     result = load_balancer.route_request_with_retry("get_countdown_info")
     if result is None:
@@ -311,16 +503,28 @@ def get_countdown_info():
     return result
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load balancer for the traffic signal servers")
+    parser.add_argument("--port", type=int, default=9000, help="XML-RPC port")
+    parser.add_argument("--backend", action="append", metavar="URL",
+                        help="backend server URL, PRIMARY first (repeat for each replica; default 8000 and 8001)")
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS_PER_SERVER,
+                        help="active requests per server before overflowing to the next")
+    args = parser.parse_args()
+    load_balancer = LoadBalancer(args.backend or DEFAULT_BACKENDS, args.max_requests)
+
     print("=" * 60)
     print("🔄 SIMPLE LOAD BALANCER - TRAFFIC SIGNAL SYSTEM")
     print("📊 Logic: Use PRIMARY server until overloaded, then use SECONDARY")
-    print("🔀 PRIMARY: http://127.0.0.1:8000/ (Max: 10 requests)")
-    print("🔀 SECONDARY: http://127.0.0.1:8001/ (Max: 10 requests)")
+    for i, server_info in enumerate(load_balancer.servers):
+        role = "PRIMARY" if i == 0 else ("SECONDARY" if len(load_balancer.servers) == 2 else f"REPLICA {i}")
+        print(f"🔀 {role}: {server_info['url']} (Max: {server_info['max_requests']} requests)")
+    if shared_state:
+        print(f"🧠 Shared-memory reads: segment '{shared_state.name}' (signal status served locally)")
     print("=" * 60)
     
     try:
-        server = SimpleXMLRPCServer(
-            ("127.0.0.1", 9000), 
+        server = ThreadedXMLRPCServer(
+            ("127.0.0.1", args.port), 
             allow_none=True,
             requestHandler=ThreadedXMLRPCRequestHandler
         )
@@ -333,15 +537,24 @@ if __name__ == "__main__":
         server.register_function(submit_vip_requests, "submit_vip_requests")
         server.register_function(get_next_message, "get_next_message")
         server.register_function(get_next_pedestrian_message, "get_next_pedestrian_message")
+        server.register_function(get_pedestrian_events, "get_pedestrian_events")
         server.register_function(register_client_time, "register_client_time")
         server.register_function(berkeley_synchronization, "berkeley_synchronization")
         server.register_function(get_synchronized_time, "get_synchronized_time")
+        server.register_function(get_clock_time, "get_clock_time")
+        server.register_function(report_clock_sample, "report_clock_sample")
         server.register_function(get_active_signal, "get_active_signal")
         server.register_function(get_system_stats, "get_system_stats")
         server.register_function(get_signal_status, "get_signal_status")
         server.register_function(get_countdown_info, "get_countdown_info")
+        server.register_function(get_timing_plan, "get_timing_plan")
+        server.register_function(set_manual_override, "set_manual_override")
+        server.register_function(release_manual_override, "release_manual_override")
+        server.register_function(submit_detections, "submit_detections")
+        
+        threading.Thread(target=load_balancer.replication_loop, name="Replication", daemon=True).start()
         
-        print("🚀 Simple Load Balancer ready on port 9000!")
+        print(f"🚀 Simple Load Balancer ready on port {args.port}!")
         print("💡 Send 11+ concurrent requests to see load balancing!")
         
         server.serve_forever()
@@ -352,7 +565,7 @@ if __name__ == "__main__":
         print(f"\n📈 STATS:")
         print(f"   Total requests: {stats['total_requests']}")
         print(f"   Load balanced: {stats['load_balanced_requests']}")
-        print(f"   Current loads: P={stats['server_0_load']}, S={stats['server_1_load']}")
+        print("   Current loads: " + ", ".join(stats[f"server_{i}_load"] for i in range(stats['server_count'])))
     except Exception as e:
         print(f"❌ Load Balancer error: {e}")
-        print("💡 Check that servers are running on ports 8000 and 8001")
\ No newline at end of file
+        print("💡 Check that the backend servers are running: " + ", ".join(s["url"] for s in load_balancer.servers))
\ No newline at end of file
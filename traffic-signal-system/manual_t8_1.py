@@ -1,9 +1,24 @@
+import asyncio
 import xmlrpc.client
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor
 import random
-import socket
+import os
+from clock_sync import SyncClock, ClockSyncClient
+from bootstrap import BALANCER_URL, parse_clock, parse_startup_args, startup_clock
+from hlc import HybridLogicalClock, HLCTransport, encode, format_timestamp
+from benchmark import print_report, run_benchmark
+from signal_events import from_wire, render_event
+
+# Local clock kept in step with the servers by continuous Berkeley re-synchronization
+local_clock = SyncClock()
+# Default clock-sync ID - unique per process, since samples and corrections are keyed by it
+CLIENT_ID = f"Manual VIP Controller-{os.getpid()}"
+clock_client = ClockSyncClient(xmlrpc.client.ServerProxy(BALANCER_URL, allow_none=True),
+                               CLIENT_ID, local_clock)
+
+# Hybrid logical clock carried on every RPC (X-HLC header); VIP requests are stamped with it
+client_hlc = HybridLogicalClock(physical=local_clock.now)
 
 # UPDATED TO CONNECT TO LOAD BALANCER ON PORT 9000 WITH TIMEOUT HANDLING
 def create_server_connection():
@@ -11,9 +26,9 @@ def create_server_connection():
     try:
         # Create connection with extended timeout for load testing
         server = xmlrpc.client.ServerProxy(
-            "http://127.0.0.1:9000/", 
+            BALANCER_URL, 
             allow_none=True,
-            transport=xmlrpc.client.Transport(use_datetime=True),
+            transport=HLCTransport(client_hlc, use_datetime=True),
             verbose=False  # Disable verbose logging during load test
         )
         # Set socket timeout to 60 seconds for load testing
@@ -25,7 +40,15 @@ def create_server_connection():
 
 server = create_server_connection()
 
-def register_time_and_sync():
+# Load test settings (menu option) - benchmark.py runs longer/open-loop scenarios
+LOAD_TEST_CONCURRENCY = 15
+LOAD_TEST_DURATION = 10.0
+LOAD_TEST_WARMUP = 1.0
+
+# Own message cursor so VIP sequences are not consumed by other controllers
+SUBSCRIBER_ID = f"Manual VIP Controller-{os.getpid()}"
+
+def register_time_and_sync(config):
     """Register this client's time and trigger Berkeley synchronization"""
     print("=" * 80)
     print("🔧 MANUAL VIP CONTROLLER - WITH ENHANCED LOAD TESTING")
@@ -35,29 +58,34 @@ def register_time_and_sync():
     print("🚨 VIP VEHICLES GET HIGHEST PRIORITY!")
     print("=" * 80)
 
-    while True:
+    # Startup clock from config/env/CLI (host clock + offset); prompt only if none is configured
+    clock_time = startup_clock(config)
+    while clock_time is None:
         controller_time = input("🕐 Enter Manual Controller time (HH:MM:SS): ")
         try:
-            hour, minute, second = map(int, controller_time.split(':'))
-            if 0 <= hour <= 23 and 0 <= minute <= 59 and 0 <= second <= 59:
-                break
-            else:
-                print("❌ Invalid time values. Please use valid HH:MM:SS format.")
-        except:
-            print("❌ Invalid time format. Please use HH:MM:SS")
+            clock_time = parse_clock(controller_time)
+        except ValueError:
+            print("❌ Invalid time format. Please use valid HH:MM:SS format.")
     
+    controller_time = clock_time.strftime('%H:%M:%S')
+    client_name = config['name'] or CLIENT_ID
+    clock_client.client_id = client_name
+    local_clock.set_time(clock_time)
     print("🔗 Connecting to Load Balancer...")
     
     try:
-        success = server.register_client_time("Manual VIP Controller", controller_time)
+        success = server.register_client_time(client_name, controller_time)
         if success:
             print("✅ Manual VIP Controller time registered successfully!")
         else:
             print("❌ Failed to register time")
             return False
         
+        # RTT-compensated clock sample refines the typed time for the next Berkeley round
+        clock_client.sync_once()
+        
         print("⏳ Waiting for Berkeley Algorithm synchronization...")
-        time.sleep(2)
+        time.sleep(2 if config['sync_wait'] is None else config['sync_wait'])
 
         sync_time = server.get_synchronized_time()
         if sync_time:
@@ -66,6 +94,10 @@ def register_time_and_sync():
         else:
             print("⏳ Synchronization pending - waiting for all clients...")
         
+        clock_client.sync_once()  # Pick up this client's correction from the round
+        clock_client.start()
+        print(f"🕐 Local clock: {local_clock.strftime('%H:%M:%S.%f')[:-3]} "
+              f"(re-synchronizing every {clock_client.interval:.0f}s)")
         return True
         
     except Exception as e:
@@ -101,6 +133,7 @@ def display_system_stats():
         print("\n📈 SYSTEM STATISTICS:")
         if sync_time:
             print(f"   ⏰ Synchronized time: {sync_time}")
+        print(f"   🕐 Local clock: {local_clock.strftime('%H:%M:%S.%f')[:-3]}")
         
         print(f"   📊 Total requests processed: {stats.get('total_requests_processed', 0)}")
         print(f"   👑 VIP requests processed: {stats.get('vip_requests_processed', 0)}")
@@ -126,16 +159,14 @@ def display_system_stats():
 def create_vip_request(route_number):
     """Create a VIP request for the specified route"""
     try:
-        # Create timestamp for VIP request
-        current_time = int(time.time())
-        base_time = 1700000000  # Base timestamp to keep numbers smaller
-        relative_timestamp = current_time - base_time
+        # HLC timestamp - comparable with VIPs from any other controller or server
+        timestamp = client_hlc.now()
         
-        vip_data = [(route_number, relative_timestamp)]
+        vip_data = [(route_number, encode(timestamp))]
         
         print(f"\n🚨 CREATING VIP EMERGENCY REQUEST:")
         print(f"   🚑 Emergency Vehicle Route: {route_number}")
-        print(f"   ⏰ Request Timestamp: {relative_timestamp}")
+        print(f"   ⏰ Request Timestamp: {format_timestamp(timestamp)}")
         print(f"   🚨 Priority Level: HIGHEST")
         print(f"   🔗 Routing through Load Balancer")
         
@@ -157,11 +188,11 @@ def create_vip_request(route_number):
                 print(f"\n🚑 VIP SIGNAL CHANGE SEQUENCE FOR ROUTE {route_number}:")
                 
                 while True:
-                    msg = server.get_next_message()
-                    if msg is None:
+                    values = server.get_next_message(SUBSCRIBER_ID)
+                    if values is None:
                         break
                     message_count += 1
-                    print(f"   👑 VIP: {msg}")
+                    print(f"   👑 VIP: {render_event(from_wire(values))}")
                 
                 if message_count == 0:
                     print(f"   ℹ️ VIP: Route {route_number} was already active or no change needed")
@@ -180,172 +211,33 @@ def create_vip_request(route_number):
     except Exception as e:
         print(f"❌ Error creating VIP request: {e}")
 
-def single_load_test_request(request_id):
-    """Execute a single signal status request for load testing with proper error handling"""
-    # Create a separate server connection for this thread to avoid conflicts
-    thread_server = create_server_connection()
-    if not thread_server:
-        return f"Request #{request_id}: CONNECTION FAILED"
-    
-    try:
-        print(f"🧪 Load Test Request #{request_id}: Signal Status Query")
-        
-        # Submit with timeout handling
-        start_time = time.time()
-        
-        # Request signal status (lightweight operation)
-        signal_status = thread_server.get_signal_status()
-        if not signal_status:
-            return f"Request #{request_id}: SIGNAL STATUS FAILED"
-        
-        # Also get system stats for comprehensive testing
-        system_stats = thread_server.get_system_stats()
-        
-        # Get active signal
-        active_signal = thread_server.get_active_signal()
-        
-        # Get synchronized time
-        sync_time = thread_server.get_synchronized_time()
-        
-        end_time = time.time()
-        duration = end_time - start_time
-        
-        # Verify we got valid responses
-        if signal_status and system_stats and active_signal:
-            return f"Request #{request_id}: STATUS SUCCESS - Active:{active_signal}, Time:{sync_time} ({duration:.2f}s)"
-        else:
-            return f"Request #{request_id}: PARTIAL SUCCESS - Some data missing ({duration:.2f}s)"
-            
-    except xmlrpc.client.Fault as e:
-        return f"Request #{request_id}: XML-RPC FAULT - {str(e)}"
-    except socket.timeout:
-        return f"Request #{request_id}: TIMEOUT - Server response too slow"
-    except ConnectionError:
-        return f"Request #{request_id}: CONNECTION ERROR - Server unreachable"
-    except Exception as e:
-        return f"Request #{request_id}: UNEXPECTED ERROR - {str(e)}"
-
 def run_enhanced_load_test():
-    """Run enhanced load test with signal status queries instead of VIP requests"""
-    print("\n🧪 STARTING ENHANCED SIGNAL STATUS LOAD TEST")
+    """Run a short closed-loop benchmark of signal status queries through the load balancer"""
+    print("\n🧪 STARTING SIGNAL STATUS LOAD TEST")
     print("=" * 60)
-    print("📊 Enhanced Load Test Parameters:")
-    print("   📢 Number of requests: 15 simultaneous signal status queries")
-    print("   ⚖️ Server capacity per instance: 10 requests")
-    print("   🎯 Expected behavior: 10 -> Primary, 5 -> Clone")
-    print("   🔄 Each request uses separate connection")
-    print("   ⏱️ Timeout handling: 60 seconds per request")
-    print("   🛡️ Error handling: Connection, timeout, XML-RPC faults")
-    print("   📊 Test type: Signal status queries (lightweight operations)")
-    print("   ✅ Operations: get_signal_status, get_system_stats, get_active_signal")
-    print("=" * 60)
-    
-    # Show initial server stats
-    print("\n📊 PRE-TEST SERVER STATUS:")
-    display_system_stats()
-    
-    start_time = time.time()
-    
-    # Execute 15 requests simultaneously with better concurrency handling
-    with ThreadPoolExecutor(max_workers=15) as executor:
-        futures = []
-        
-        print(f"\n🚀 LAUNCHING 15 SIMULTANEOUS SIGNAL STATUS QUERIES...")
-        
-        # Submit all 15 requests at once with staggered timing
-        for i in range(1, 16):
-            # Small delay between request submissions to avoid overwhelming
-            if i > 1:
-                time.sleep(0.1)
-            
-            future = executor.submit(single_load_test_request, i)
-            futures.append(future)
-        
-        # Collect results as they complete with timeout
-        results = []
-        successful_count = 0
-        failed_count = 0
-        timeout_count = 0
-        
-        for i, future in enumerate(futures, 1):
-            try:
-                # Wait for result with timeout
-                result = future.result(timeout=70)  # 70 second timeout per request
-                results.append(result)
-                
-                # Categorize results
-                if "SUCCESS" in result:
-                    successful_count += 1
-                    print(f"✅ {result}")
-                elif "TIMEOUT" in result:
-                    timeout_count += 1
-                    print(f"⏱️ {result}")
-                else:
-                    failed_count += 1
-                    print(f"❌ {result}")
-                    
-            except Exception as e:
-                error_result = f"Request #{i}: EXECUTOR ERROR - {str(e)}"
-                results.append(error_result)
-                failed_count += 1
-                print(f"💥 {error_result}")
-    
-    end_time = time.time()
-    duration = end_time - start_time
-    
-    print(f"\n📈 ENHANCED LOAD TEST RESULTS:")
+    print("📊 Load Test Parameters (see benchmark.py for the full harness):")
+    print(f"   📢 {LOAD_TEST_CONCURRENCY} concurrent callers for {LOAD_TEST_DURATION:.0f}s "
+          f"after a {LOAD_TEST_WARMUP:.0f}s warm-up")
+    print("   ⚖️ Server capacity per instance: 10 requests - overflow goes to the clone")
+    print("   ✅ Mix: get_signal_status, get_active_signal, get_system_stats, get_synchronized_time, "
+          "get_countdown_info")
     print("=" * 60)
-    print(f"⏱️  Total duration: {duration:.2f} seconds")
-    print(f"✅ Successful requests: {successful_count}")
-    print(f"❌ Failed requests: {failed_count}")
-    print(f"⏱️ Timeout requests: {timeout_count}")
-    print(f"📊 Total requests: {len(results)}")
-    print(f"🎯 Success rate: {(successful_count/len(results)*100):.1f}%")
-    if successful_count > 0:
-        print(f"📊 Successful requests per second: {successful_count/duration:.2f}")
     
-    # Show final server stats
-    print(f"\n📊 POST-TEST SERVER STATUS:")
-    display_system_stats()
-    
-    print("=" * 60)
-    print("🔄 LOAD BALANCING ANALYSIS:")
     try:
-        stats = server.get_system_stats()
-        if stats:
-            total_routed = stats.get('total_requests', 0)
-            load_balanced = stats.get('load_balanced_requests', 0)
-            
-            print(f"   📡 Total requests routed by load balancer: {total_routed}")
-            print(f"   ⚖️ Requests sent to clone server: {load_balanced}")
-            print(f"   🟦 Requests handled by primary server: {total_routed - load_balanced}")
-            
-            if load_balanced > 0:
-                print("   ✅ LOAD BALANCING SUCCESSFUL!")
-                print("   🎯 Clone server activated when primary reached capacity")
-            else:
-                print("   ℹ️ All requests handled by primary server")
-                print("   💡 Primary server had sufficient capacity")
-        
+        result = asyncio.run(run_benchmark(
+            BALANCER_URL, mode="closed", concurrency=LOAD_TEST_CONCURRENCY, duration=LOAD_TEST_DURATION,
+            warmup=LOAD_TEST_WARMUP, mix="status", clock=client_hlc, label="manual-load-test"))
     except Exception as e:
-        print(f"   ❌ Could not retrieve load balancing stats: {e}")
+        print(f"❌ Load test failed: {e}")
+        return
+    
+    print_report(result)
     
     # Error analysis
-    if failed_count > 0 or timeout_count > 0:
+    if result['errors']:
         print(f"\n🔍 ERROR ANALYSIS:")
-        print(f"   🚨 Issues detected in {failed_count + timeout_count} requests")
-        print(f"   💡 Common causes:")
-        print(f"      - Server overload (too many simultaneous connections)")
-        print(f"      - XML-RPC transport limitations")
-        print(f"      - Network timeout issues")
-        print(f"      - Load balancer routing delays")
-        print(f"   🛠️ Recommendations:")
-        print(f"      - Increase server timeout settings")
-        print(f"      - Implement connection pooling")
-        print(f"      - Add retry logic for failed requests")
-        print(f"      - Monitor server resource usage")
-    
-    print("=" * 60)
+        print(f"   🚨 Issues detected in {result['errors']} requests: {result['error_breakdown']}")
+        print(f"   💡 Check the load balancer and server consoles; rerun benchmark.py for a longer test")
 
 def show_menu():
     """Display the main menu"""
@@ -435,7 +327,8 @@ if __name__ == "__main__":
         print("❌ Failed to create initial server connection. Exiting...")
         exit(1)
         
-    if not register_time_and_sync():
+    config = parse_startup_args("Manual VIP controller", "manual")
+    if not register_time_and_sync(config):
         print("❌ Failed to initialize. Exiting...")
         exit(1)
     
@@ -452,7 +345,7 @@ if __name__ == "__main__":
     print("   📊 Real-time signal status monitoring")
     print("   🚑 Highest priority processing for VIP requests")
     print("   🔒 Enhanced Ricart-Agrawala with VIP priority")
-    print("   🧪 Robust load testing (15 simultaneous requests)")
+    print("   🧪 Load testing via benchmark harness (latency percentiles, backend distribution)")
     print("   🛡️ Enhanced error handling and timeout management")
     print("   🔄 Per-thread connection handling")
     print("📊 SIGNAL STATUS ARRAY: Synchronized across all servers")
@@ -0,0 +1,190 @@
+import os
+import signal
+import socket
+import threading
+import time
+import xmlrpc.client
+from xmlrpc.server import SimpleXMLRPCServer
+
+from shared_state import ENV_SEGMENT, SharedSignalState
+from hlc import HLCTransport
+
+# PRE-FORK MULTI-PROCESS SERVER MODE
+# One process is GIL-bound, so XML parsing/marshalling of every RPC competes on
+# one core. In pre-fork mode the parent binds the public port once and forks:
+#   - one STATE OWNER process running the normal server functions on a loopback
+#     port - the single authority for all state-changing calls
+#   - N WORKER processes sharing the public listening socket; reads are answered
+#     from the shared-memory signal segment, everything else is proxied to the owner
+
+OWNER_PORT_OFFSET = 1000     # Owner listens on 127.0.0.1:<port + offset> unless given a port
+SHARED_STATE_MAX_AGE = 2.0   # Workers proxy reads if the owner stopped refreshing the segment
+
+# Every RPC the servers expose - workers register the same names
+RPC_FUNCTIONS = (
+    "signal_manipulator",
+    "vip_signal_manipulator",
+    "submit_vip_requests",
+    "get_next_message",
+    "get_next_pedestrian_message",
+    "get_pedestrian_events",
+    "register_client_time",
+    "berkeley_synchronization",
+    "get_synchronized_time",
+    "get_clock_time",
+    "report_clock_sample",
+    "get_active_signal",
+    "get_system_stats",
+    "get_signal_status",
+    "get_countdown_info",
+    "get_timing_plan",
+    "set_manual_override",
+    "release_manual_override",
+    "install_timing_plan",
+    "submit_detections",
+)
+
+
+def register_rpc_functions(server, module):
+    """Register the module's RPC functions on an XML-RPC server"""
+    for name in RPC_FUNCTIONS:
+        server.register_function(getattr(module, name), name)
+
+
+def run_state_owner(module, port, segment, role):
+    """Serve the authoritative server functions on a loopback port (runs in a forked child)"""
+    module.journal.open()
+    module.shared_state = SharedSignalState(segment)
+    module.publish_shared_state()
+    threading.Thread(target=module.shared_state_ticker, name="SharedStateTicker", daemon=True).start()
+    module.clock_sync.start()
+
+    owner = SimpleXMLRPCServer(("127.0.0.1", port), allow_none=True,
+                               requestHandler=module.EnhancedXMLRPCRequestHandler, logRequests=False)
+    register_rpc_functions(owner, module)
+    print(f"👑 {role} - State owner process {os.getpid()} on internal port {port}")
+    try:
+        owner.serve_forever()
+    finally:
+        module.journal.close()
+
+
+class WorkerFunctions:
+    """RPC functions of a worker: shared-memory reads, everything else proxied to the owner"""
+
+    def __init__(self, owner_url, segment, clock=None):
+        self.owner_url = owner_url
+        self.shared_state = SharedSignalState(segment)
+        self.clock = clock  # Worker's HLC - forwarded calls carry the caller's causality to the owner
+        self.owner = None
+
+    def owner_proxy(self):
+        """Lazily create this worker's connection to the state owner"""
+        if self.owner is None:
+            transport = HLCTransport(self.clock) if self.clock else xmlrpc.client.Transport()
+            transport.timeout = 60
+            self.owner = xmlrpc.client.ServerProxy(self.owner_url, allow_none=True, transport=transport)
+        return self.owner
+
+    def fresh_snapshot(self):
+        """Shared-segment snapshot if the owner refreshed it recently, else None"""
+        snapshot = self.shared_state.read(0)
+        if snapshot['version'] and time.time() - snapshot['updated_at'] <= SHARED_STATE_MAX_AGE:
+            return snapshot
+        return None
+
+    def get_signal_status(self):
+        snapshot = self.fresh_snapshot()
+        if snapshot:
+            return snapshot['signal_status']
+        return self.owner_proxy().get_signal_status()
+
+    def get_active_signal(self):
+        snapshot = self.fresh_snapshot()
+        if snapshot:
+            return snapshot['current_active_signal']
+        return self.owner_proxy().get_active_signal()
+
+    def register(self, server):
+        """Register worker RPCs: local reads plus owner proxies for all other functions"""
+        for name in RPC_FUNCTIONS:
+            if name in ("get_signal_status", "get_active_signal"):
+                server.register_function(getattr(self, name), name)
+            else:
+                server.register_function(self.make_proxy(name), name)
+
+    def make_proxy(self, name):
+        """Build a function that forwards one RPC to the state owner"""
+        def proxy(*args):
+            return getattr(self.owner_proxy(), name)(*args)
+        proxy.__name__ = name
+        return proxy
+
+
+def run_worker(server, owner_url, segment, clock=None):
+    """Serve requests from the shared listening socket (runs in a forked child)"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    WorkerFunctions(owner_url, segment, clock).register(server)
+    server.serve_forever()
+
+
+def fork_child(target, *args):
+    """Fork a child that runs target(*args) and never returns; returns the child's pid"""
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            target(*args)
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print(f"💥 Child process {os.getpid()} failed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def run_prefork_server(module, host, port, workers, role, owner_port=None):
+    """Run the server as one state owner plus N workers sharing the listening socket"""
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Multi-process mode needs os.fork (Linux/macOS)")
+
+    segment = os.environ.get(ENV_SEGMENT) or f"traffic_{role.lower()}_{port}"
+    owner_port = owner_port or port + OWNER_PORT_OFFSET
+    owner_url = f"http://127.0.0.1:{owner_port}/"
+
+    # Segment is created before forking so every child maps the same memory
+    shared = SharedSignalState(segment)
+    module.journal.close()  # Owner reopens it - threads do not survive fork
+    children = [fork_child(run_state_owner, module, owner_port, segment, role)]
+
+    server = SimpleXMLRPCServer((host, port), allow_none=True,
+                                requestHandler=module.EnhancedXMLRPCRequestHandler, logRequests=False)
+    server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.socket.setblocking(False)  # Workers that lose the accept race return to select()
+
+    for _ in range(workers):
+        children.append(fork_child(run_worker, server, owner_url, segment, module.hlc))
+    server.server_close()  # Parent only supervises
+
+    print(f"🚀 {role} - Multi-process mode: {workers} workers on port {port}, "
+          f"state owner on {owner_port}, shared segment '{segment}'")
+    try:
+        while children:
+            pid, _ = os.wait()
+            if pid in children:
+                children.remove(pid)
+                print(f"⚠️ {role} - Child process {pid} exited")
+    except KeyboardInterrupt:
+        print(f"\n🛑 {role} - Stopping {len(children)} child processes...")
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        shared.close()
+        if shared.created:
+            shared.unlink()
@@ -0,0 +1,163 @@
+import json
+import time
+import zlib
+
+# SIGNAL TIMING PLAN
+# The fixed-time cycle every server runs - phase order, green/yellow splits and
+# the epoch the cycle is counted from - plus any override in effect (VIP
+# emergency, manual hold or an RTO operator's manual override). Servers publish it with a content version; clients
+# compute countdowns and signal states locally at any frame rate with
+# CountdownClock and re-fetch only when the version changes.
+
+PHASES = (
+    {'name': "North-South", 'signals': [1, 3], 'green': 5.0, 'yellow': 3.0},
+    {'name': "East-West", 'signals': [2, 4], 'green': 5.0, 'yellow': 3.0},
+)
+EPOCH = 0.0  # Cycle origin (Unix time) - every server derives the same phase from its clock
+CITY_SPACING = 200.0      # Metres between neighbouring intersections of a grid city
+GREEN_WAVE_SPEED = 13.9   # m/s (50 km/h) - grid plans are offset so greens follow traffic
+
+
+def plan_version(plan):
+    """Content version: identical plans on any replica get the same (XML-RPC int sized) version"""
+    body = json.dumps({key: plan[key] for key in ('epoch', 'phases', 'override')}, sort_keys=True)
+    return zlib.crc32(body.encode()) & 0x7FFFFFFF
+
+
+def grid_epoch(row, col, spacing=CITY_SPACING, speed=GREEN_WAVE_SPEED):
+    """Plan epoch of the intersection at (row, col) of a green-wave grid (also elementwise on arrays)
+
+    Greens follow traffic travelling east / south: each block further on starts its cycle later
+    by the time a vehicle takes to drive it.
+    """
+    return EPOCH + (row + col) * spacing / speed
+
+
+def make_plan(phases=PHASES, epoch=EPOCH, override=None):
+    """Timing plan dict; override is None or {'kind', 'signal', 'until'} (until None = open-ended)
+
+    An RTO override also carries the operator-set 'signal_status' it holds.
+    """
+    plan = {
+        'epoch': epoch,
+        'cycle_length': sum(phase['green'] + phase['yellow'] for phase in phases),
+        'phases': [dict(phase) for phase in phases],
+        'override': override
+    }
+    plan['version'] = plan_version(plan)
+    return plan
+
+
+def override_at(plan, t):
+    """The plan's override if it is still in effect at time t, else None"""
+    override = plan['override']
+    if override and (override['until'] is None or t < override['until']):
+        return override
+    return None
+
+
+def override_status(override):
+    """Signal status array an override holds: the operator-set states, or its one signal green"""
+    if override.get('signal_status'):
+        return dict(override['signal_status'])
+    status = {}
+    for i in range(1, 5):
+        status[f"t{i}"] = "green" if i == override['signal'] else "red"
+        status[f"p{i}"] = "red" if i == override['signal'] else "green"
+    return status
+
+
+def phase_at(plan, t):
+    """(phase index, 'green' or 'yellow', seconds left in that state) of the fixed cycle at time t"""
+    offset = (t - plan['epoch']) % plan['cycle_length']
+    for index, phase in enumerate(plan['phases']):
+        if offset < phase['green']:
+            return index, "green", phase['green'] - offset
+        offset -= phase['green']
+        if offset < phase['yellow']:
+            return index, "yellow", phase['yellow'] - offset
+        offset -= phase['yellow']
+    return len(plan['phases']) - 1, "yellow", 0.0  # Float rounding at the very end of the cycle
+
+
+def signal_status_at(plan, t):
+    """Signal status array (t1-t4, p1-p4) the plan prescribes at time t"""
+    override = override_at(plan, t)
+    if override:
+        return override_status(override)
+    index, state, _ = phase_at(plan, t)
+    green = plan['phases'][index]['signals']
+    status = {}
+    for i in range(1, 5):
+        status[f"t{i}"] = state if i in green else "red"
+        status[f"p{i}"] = "red" if i in green else "green"  # Pedestrians opposite to vehicles
+    return status
+
+
+def countdown_at(plan, t):
+    """Countdown info at time t - same shape as the server's get_countdown_info"""
+    phases = plan['phases']
+    override = override_at(plan, t)
+    if override:
+        current = next((p for p in phases if override['signal'] in p['signals']), phases[0])
+        held = override_status(override)
+        current_green = [i for i in range(1, 5) if held[f"t{i}"] == "green"]
+        if override['until'] is None:
+            time_remaining, upcoming = 0.0, current
+        else:
+            time_remaining = override['until'] - t
+            upcoming = phases[phase_at(plan, override['until'])[0]]
+    else:
+        index, state, left = phase_at(plan, t)
+        current = phases[index]
+        current_green = current['signals']
+        time_remaining = left + (current['yellow'] if state == "green" else 0.0)
+        upcoming = phases[(index + 1) % len(phases)]
+    return {
+        "time_remaining": round(max(time_remaining, 0.0), 1),
+        "current_pair": current['name'],
+        "next_pair": upcoming['name'],
+        "current_green_signals": list(current_green),
+        "next_green_signals": list(upcoming['signals']),
+        "cycle_interval": current['green'] + current['yellow'],
+        "signal_status": signal_status_at(plan, t),
+        "override": override['kind'] if override else None
+    }
+
+
+class CountdownClock:
+    """Client-side countdowns from the server's timing plan, re-fetched only on version change"""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.plan = None
+        self.offset = 0.0  # Server clock minus local clock, estimated from each refresh
+        self.fetches = 0   # Full plans received
+
+    @property
+    def version(self):
+        return self.plan['version'] if self.plan else 0
+
+    def refresh(self, server):
+        """Check the server's plan version; True when a new plan was installed"""
+        sent = self.clock()
+        reply = server.get_timing_plan(self.version)
+        received = self.clock()
+        self.offset = reply['server_time'] + (received - sent) / 2 - received
+        if 'phases' not in reply:
+            return False  # Version unchanged - the server sent only the version
+        self.plan = reply
+        self.fetches += 1
+        return True
+
+    def now(self):
+        """Current time on the server's clock"""
+        return self.clock() + self.offset
+
+    def countdown(self):
+        """Countdown info right now, or None before the first plan arrives"""
+        return countdown_at(self.plan, self.now()) if self.plan else None
+
+    def signal_status(self):
+        """Signal status array right now, or None before the first plan arrives"""
+        return signal_status_at(self.plan, self.now()) if self.plan else None
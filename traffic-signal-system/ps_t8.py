@@ -1,11 +1,41 @@
+import argparse
 import xmlrpc.client
 import time
+import os
+from clock_sync import SyncClock, ClockSyncClient
+from bootstrap import BALANCER_URL, add_bootstrap_arguments, load_config, parse_clock, startup_clock
+from hlc import HybridLogicalClock, HLCTransport
+from signal_events import VIP, from_wire, render_event
+
+# Local clock kept in step with the servers by continuous Berkeley re-synchronization
+local_clock = SyncClock()
+# Default clock-sync ID - unique per process, since samples and corrections are keyed by it
+CLIENT_ID = f"Pedestrian Signal-{os.getpid()}"
+clock_client = ClockSyncClient(xmlrpc.client.ServerProxy(BALANCER_URL, allow_none=True),
+                               CLIENT_ID, local_clock)
+
+# Hybrid logical clock carried on every RPC (X-HLC header) for causal ordering
+client_hlc = HybridLogicalClock(physical=local_clock.now)
 
 # UPDATED TO CONNECT TO LOAD BALANCER ON PORT 9000
 # server = xmlrpc.client.ServerProxy("http://192.168.1.200:9000/", allow_none=True)
-server = xmlrpc.client.ServerProxy("http://127.0.0.1:9000/", allow_none=True)
+server = xmlrpc.client.ServerProxy(BALANCER_URL, allow_none=True, transport=HLCTransport(client_hlc))
+
+# Each pedestrian monitor follows its own cursor - any number can run side by side
+SUBSCRIBER_ID = f"Pedestrian Signal-{os.getpid()}"
+
+# Intersections followed by this monitor: {name: ServerProxy}; --intersection adds more
+intersections = {"main": server}
+POLL_INTERVAL = 0.5       # Seconds between event polls when every intersection is idle
 
-def register_time_and_sync():
+def parse_intersection(text):
+    """NAME=URL command-line value -> (name, url)"""
+    name, sep, url = text.partition("=")
+    if not sep or not name or not url:
+        raise argparse.ArgumentTypeError(f"expected NAME=URL, got {text!r}")
+    return name, url
+
+def register_time_and_sync(config):
     """Register this client's time and trigger Berkeley synchronization"""
     print("=" * 80)
     print("🚶‍♂️ FOUR-WAY PEDESTRIAN CONTROLLER - LOAD BALANCED VERSION 🚶‍♀️")
@@ -18,29 +48,34 @@ def register_time_and_sync():
     print("📊 Shows real-time signal status array (on request)")
     print("=" * 80)
     
-    while True:
+    # Startup clock from config/env/CLI (host clock + offset); prompt only if none is configured
+    clock_time = startup_clock(config)
+    while clock_time is None:
         pedestrian_time = input("🕕 Enter Pedestrian Signal time (HH:MM:SS): ")
         try:
-            hour, minute, second = map(int, pedestrian_time.split(':'))
-            if 0 <= hour <= 23 and 0 <= minute <= 59 and 0 <= second <= 59:
-                break
-            else:
-                print("❌ Invalid time values. Please use valid HH:MM:SS format.")
-        except:
-            print("❌ Invalid time format. Please use HH:MM:SS")
+            clock_time = parse_clock(pedestrian_time)
+        except ValueError:
+            print("❌ Invalid time format. Please use valid HH:MM:SS format.")
     
+    pedestrian_time = clock_time.strftime('%H:%M:%S')
+    client_name = config['name'] or CLIENT_ID
+    clock_client.client_id = client_name
+    local_clock.set_time(clock_time)
     print("🔗 Connecting to Load Balancer...")
     
     try:
-        success = server.register_client_time("Pedestrian Signal", pedestrian_time)
+        success = server.register_client_time(client_name, pedestrian_time)
         if success:
             print("✅ Pedestrian Signal time registered successfully!")
         else:
             print("❌ Failed to register time")
             return False
         
+        # RTT-compensated clock sample refines the typed time for the next Berkeley round
+        clock_client.sync_once()
+        
         print("⏳ Waiting for Berkeley Algorithm synchronization...")
-        time.sleep(2)
+        time.sleep(2 if config['sync_wait'] is None else config['sync_wait'])
 
         sync_time = server.get_synchronized_time()
         if sync_time:
@@ -49,6 +84,10 @@ def register_time_and_sync():
         else:
             print("⏳ Synchronization pending - waiting for all clients...")
         
+        clock_client.sync_once()  # Pick up this client's correction from the round
+        clock_client.start()
+        print(f"🕐 Local clock: {local_clock.strftime('%H:%M:%S.%f')[:-3]} "
+              f"(re-synchronizing every {clock_client.interval:.0f}s)")
         return True
         
     except Exception as e:
@@ -75,42 +114,36 @@ def p_signal():
     print("🚨 VIP crossing = Pedestrians must IMMEDIATELY stop for emergency vehicles")
     print("🎯 KEY: Signal trying to turn GREEN = Pedestrian crossing turns RED")
     print("📡 All signals routed through Load Balancer for high availability")
+    print(f"🗺️ Following {len(intersections)} intersection(s): {', '.join(intersections)}")
     
     try:
-        message_count = 0
         vip_alert_shown = False
+        show_names = len(intersections) > 1
         
         while True:
-            msg = server.get_next_pedestrian_message()
-            if msg is None:
-                # Sleep briefly and check again, but don't print anything
-                time.sleep(0.5)
-                continue
-            
-            message_count += 1
-            
-            # Enhanced display for VIP-related messages - only show VIP was involved in processing
-            if "VIP" in msg or "👑" in msg:
-                if not vip_alert_shown:
-                    print(f"\n🚨 VIP PRIORITY PROCESSING DETECTED!")
-                    print(f"🚶‍♂️ VIP requests were processed with higher priority!")
-                    print(f"📡 Load Balancer routed VIP emergency request!")
-                    vip_alert_shown = True
-                
-                # Remove VIP-specific content, show normal pedestrian messages
-                clean_msg = msg.replace("VIP PRIORITY: ", "").replace("👑 VIP PRIORITY: ", "").replace("🚨 VIP PRIORITY: ", "").replace("🚶‍♂️ VIP PRIORITY: ", "").replace("🚶‍♀️ VIP PRIORITY: ", "")
-                # Remove clone server identifiers for clean display
-                clean_msg = clean_msg.replace("CLONE - ", "")
-                print(f"🚶‍♂️ PEDESTRIAN: {clean_msg}")
+            received = 0
+            for name, proxy in intersections.items():
+                try:
+                    events = proxy.get_pedestrian_events(SUBSCRIBER_ID)
+                except Exception as e:
+                    print(f"❌ Intersection {name}: error fetching pedestrian events: {e}")
+                    continue
+                received += len(events)
                 
-                # Reset VIP alert after processing VIP messages
-                if "VIP" not in msg and "👑" not in msg:
-                    vip_alert_shown = False
-            else:
-                # Remove clone server identifiers for clean display
-                clean_msg = msg.replace("CLONE - ", "")
-                print(f"🚶‍♂️ PEDESTRIAN: {clean_msg}")
-                vip_alert_shown = False
+                for values in events:
+                    event = from_wire(values)
+                    is_vip = event.reason == VIP
+                    # Only announce that VIP priority was involved, once per VIP burst
+                    if is_vip and not vip_alert_shown:
+                        print(f"\n🚨 VIP PRIORITY PROCESSING DETECTED{f' AT {name}' if show_names else ''}!")
+                        print(f"🚶‍♂️ VIP requests were processed with higher priority!")
+                        print(f"📡 Load Balancer routed VIP emergency request!")
+                    vip_alert_shown = is_vip
+                    print(f"🚶‍♂️ PEDESTRIAN: {render_event(event, name if show_names else None)}")
+            
+            if not received:
+                # Sleep briefly and check again, but don't print anything
+                time.sleep(POLL_INTERVAL)
 
     except Exception as e:
         print("❌ Error communicating with load balancer:", e)
@@ -124,6 +157,7 @@ def display_status():
         
         if sync_time:
             print(f"⏰ Current synchronized time: {sync_time}")
+        print(f"🕐 Local clock: {local_clock.strftime('%H:%M:%S.%f')[:-3]}")
         if active_signal:
             print(f"🚗 Vehicle signal currently GREEN: {active_signal}")
             print(f"🚶‍♀️ Pedestrian crossing currently RED: {active_signal}")
@@ -164,7 +198,18 @@ def display_status():
         print(f"❌ Status check failed: {e}")
 
 if __name__ == "__main__":
-    if not register_time_and_sync():
+    parser = add_bootstrap_arguments(argparse.ArgumentParser(description="Four-way pedestrian signal monitor"))
+    parser.add_argument("--intersection", action="append", type=parse_intersection, metavar="NAME=URL",
+                        help="follow this intersection's balancer (repeatable; default: this load balancer)")
+    args = parser.parse_args()
+    try:
+        config = load_config("pedestrian", args)
+    except (OSError, ValueError) as e:
+        parser.error(f"invalid startup configuration: {e}")
+    if args.intersection:
+        intersections = {name: xmlrpc.client.ServerProxy(url, allow_none=True, transport=HLCTransport(client_hlc))
+                         for name, url in args.intersection}
+    if not register_time_and_sync(config):
         print("❌ Failed to initialize. Exiting...")
         exit(1)
     
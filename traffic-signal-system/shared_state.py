@@ -0,0 +1,162 @@
+import os
+import struct
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import fcntl  # Cross-process writer lock (Linux/macOS)
+except ImportError:
+    fcntl = None  # Windows: run a single writer per segment
+
+# SHARED-MEMORY SIGNAL STATE SEGMENT
+# Co-located primary/clone servers (and the load balancer) map the same segment,
+# so they read one authoritative signal state instead of drifting dict copies.
+# Each intersection record is guarded by a seqlock: the writer makes the sequence
+# odd, writes, then makes it even again; readers retry until they see the same
+# even sequence before and after reading. Readers never take a lock.
+
+ENV_SEGMENT = "TRAFFIC_SHARED_STATE"   # Set to a segment name to enable shared mode
+DEFAULT_SEGMENT = "traffic_signal_state"
+
+MAGIC = b"TSIG"
+HEADER = struct.Struct("<4sII")         # magic, layout version, intersection count
+LAYOUT_VERSION = 1
+# seq, version, updated_at, vip_start_time, active_signal, vip_signal, t1..t4 p1..p4
+RECORD = struct.Struct("<QQddBB8s")
+RECORD_SIZE = (RECORD.size + 7) // 8 * 8  # Keep every seq counter 8-byte aligned
+SEQ = struct.Struct("<Q")
+
+SIGNAL_KEYS = ("t1", "t2", "t3", "t4", "p1", "p2", "p3", "p4")
+STATE_CODES = {"red": 0, "yellow": 1, "green": 2}
+STATE_NAMES = ("red", "yellow", "green")
+
+
+def encode_status(signal_status):
+    """Pack a signal status dict into 8 state bytes"""
+    return bytes(STATE_CODES.get(signal_status.get(key, "red"), 0) for key in SIGNAL_KEYS)
+
+
+def decode_status(packed):
+    """Unpack 8 state bytes into a signal status dict"""
+    return {key: STATE_NAMES[code] for key, code in zip(SIGNAL_KEYS, packed)}
+
+
+class SharedSignalState:
+    """Packed per-intersection signal state in shared memory with seqlock versioning"""
+
+    def __init__(self, name=DEFAULT_SEGMENT, intersections=1):
+        size = HEADER.size + RECORD_SIZE * intersections
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            HEADER.pack_into(self.shm.buf, 0, MAGIC, LAYOUT_VERSION, intersections)
+            self.created = True
+        except FileExistsError:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.created = False
+        # Segment outlives any single process - don't let the tracker unlink it on exit
+        if os.name == "posix":
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        magic, layout, count = HEADER.unpack_from(self.shm.buf, 0)
+        for _ in range(100):
+            if magic != bytes(4):
+                break
+            time.sleep(0.01)  # Creator has not written the header yet
+            magic, layout, count = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or layout != LAYOUT_VERSION:
+            raise ValueError(f"Shared segment {name} has an incompatible layout")
+        self.name = name
+        self.intersections = count
+        self.buf = self.shm.buf
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self.lock_file = None
+
+    def _offset(self, index):
+        """Byte offset of an intersection record"""
+        if not 0 <= index < self.intersections:
+            raise IndexError(f"Intersection {index} not in shared segment")
+        return HEADER.size + RECORD_SIZE * index
+
+    def _acquire_writer(self):
+        """Serialize writers across processes (readers stay lock-free)"""
+        if fcntl:
+            if self.lock_file is None:
+                self.lock_file = open(self.lock_path, "a")
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+
+    def _release_writer(self):
+        if fcntl and self.lock_file:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def write(self, index, signal_status, active_signal, vip_signal=None, vip_start_time=None):
+        """Publish an intersection's state; returns the new version, or None if unchanged"""
+        offset = self._offset(index)
+        packed = encode_status(signal_status)
+        self._acquire_writer()
+        try:
+            seq, version, _, old_vip_start, old_active, old_vip, old_packed = RECORD.unpack_from(self.buf, offset)
+            if seq & 1:
+                seq += 1  # Previous writer died mid-update - its lock is gone, repair the sequence
+            changed = not (version and old_packed == packed and old_active == active_signal and
+                           old_vip == (vip_signal or 0) and old_vip_start == (vip_start_time or 0.0))
+            # Unchanged state only refreshes updated_at (writer heartbeat) - version stays put
+            new_version = version + 1 if changed else version
+            SEQ.pack_into(self.buf, offset, seq + 1)          # Odd: write in progress
+            RECORD.pack_into(self.buf, offset, seq + 1, new_version, time.time(),
+                             vip_start_time or 0.0, active_signal, vip_signal or 0, packed)
+            SEQ.pack_into(self.buf, offset, seq + 2)          # Even: consistent again
+            return new_version if changed else None
+        finally:
+            self._release_writer()
+
+    def read(self, index=0):
+        """Return a consistent snapshot of an intersection without locking"""
+        offset = self._offset(index)
+        spins = 0
+        while True:
+            before = SEQ.unpack_from(self.buf, offset)[0]
+            if not before & 1:
+                _, version, updated_at, vip_start_time, active_signal, vip_signal, packed = RECORD.unpack_from(self.buf, offset)
+                if SEQ.unpack_from(self.buf, offset)[0] == before:
+                    return {
+                        'version': version,
+                        'updated_at': updated_at,
+                        'signal_status': decode_status(packed),
+                        'current_active_signal': active_signal,
+                        'vip_signal': vip_signal or None,
+                        'vip_start_time': vip_start_time or None
+                    }
+            spins += 1
+            if spins % 100 == 0:
+                time.sleep(0)  # Writer preempted mid-update - yield the CPU
+
+    def version(self, index=0):
+        """Current version counter of an intersection (0 = never written)"""
+        return self.read(index)['version']
+
+    def close(self):
+        """Unmap the segment from this process"""
+        self.buf = None
+        if self.lock_file:
+            self.lock_file.close()
+            self.lock_file = None
+        self.shm.close()
+
+    def unlink(self):
+        """Remove the segment from the system once no process needs it"""
+        if os.name == "posix":
+            resource_tracker.register(self.shm._name, "shared_memory")  # unlink() unregisters it
+        self.shm.unlink()
+
+
+def attach_from_env(intersections=1):
+    """Attach to the segment named by TRAFFIC_SHARED_STATE, or None when shared mode is off"""
+    name = os.environ.get(ENV_SEGMENT)
+    if not name:
+        return None
+    try:
+        return SharedSignalState(name, intersections)
+    except Exception as e:
+        print(f"⚠️ Shared state segment {name} unavailable: {e}")
+        return None
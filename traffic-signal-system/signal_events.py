@@ -0,0 +1,84 @@
+from collections import namedtuple
+
+from hlc import decode, format_timestamp
+
+# STRUCTURED SIGNAL EVENTS
+# Vehicle and pedestrian message sequences carry compact event records instead
+# of pre-formatted emoji strings. On the wire an event is one packed string -
+# the SignalEvent fields joined by WIRE_SEPARATOR, with states and reasons as
+# one-character codes - so it costs a single XML-RPC <string> rather than a
+# seven-member array. Clients rebuild it with from_wire() and format it only
+# when they display it, with render_event().
+
+SignalEvent = namedtuple("SignalEvent", "intersection signal from_state to_state reason timestamp node")
+
+# Why an event was published
+CHANGE = "change"        # Regular signal change inside the critical section
+VIP = "vip"              # VIP-priority change (VIP request or emergency override)
+NO_CHANGE = "no_change"  # Requested signal was already in the target state
+DENIED = "denied"        # Critical section busy - request refused
+WAITING = "waiting"      # Request queued behind the critical section
+FAILED = "failed"        # Change could not be carried out
+MANUAL = "manual"        # RTO operator override set or released
+OVERRIDE = "override"    # Request refused - an RTO manual override holds the signals
+
+WIRE_SEPARATOR = "|"  # Intersection and node names must not contain it
+STATE_CODES = {None: "", "green": "g", "yellow": "y", "red": "r"}
+REASON_CODES = {CHANGE: "c", VIP: "v", NO_CHANGE: "n", DENIED: "d", WAITING: "w", FAILED: "f", MANUAL: "m", OVERRIDE: "o"}
+STATES_BY_CODE = {code: state for state, code in STATE_CODES.items()}
+REASONS_BY_CODE = {code: reason for reason, code in REASON_CODES.items()}
+
+STATE_ICONS = {"green": "🟢", "yellow": "🟡", "red": "🔴"}
+VEHICLE_ADVICE = {"green": "Vehicles can go.", "yellow": "", "red": "Vehicles must stop."}
+PEDESTRIAN_ADVICE = {"green": "Safe to cross.", "yellow": "Finish crossing.", "red": "Do not cross."}
+
+
+def to_wire(event):
+    """Event as one packed string (XML-RPC cannot marshal namedtuples, and arrays cost ~2.5x the bytes)"""
+    return WIRE_SEPARATOR.join((event.intersection, event.signal, STATE_CODES[event.from_state],
+                                STATE_CODES[event.to_state], REASON_CODES[event.reason], event.timestamp, event.node))
+
+
+def from_wire(values):
+    """Rebuild a SignalEvent from the packed string an RPC returned (or the array older servers sent)"""
+    if not isinstance(values, str):
+        return SignalEvent(*values)
+    intersection, signal, from_state, to_state, reason, timestamp, node = values.split(WIRE_SEPARATOR)
+    return SignalEvent(intersection, signal, STATES_BY_CODE[from_state], STATES_BY_CODE[to_state],
+                       REASONS_BY_CODE[reason], timestamp, node)
+
+
+def is_pedestrian(event):
+    return event.signal.startswith("p")
+
+
+def signal_number(event):
+    return int(event.signal[1:])
+
+
+def event_time(event):
+    """HH:MM:SS.mmm+logical rendering of the event's HLC timestamp"""
+    return format_timestamp(decode(event.timestamp))
+
+
+def render_event(event, where=None):
+    """Display text for one event; where prefixes an intersection label"""
+    number = signal_number(event)
+    subject = f"Pedestrian crossing {number}" if is_pedestrian(event) else f"Junction {number}"
+    prefix = f"[{where}] " if where else ""
+    priority = {VIP: "VIP PRIORITY: ", MANUAL: "RTO OVERRIDE: "}.get(event.reason, "")
+
+    if event.reason == NO_CHANGE:
+        return f"ℹ️ {prefix}{event.node} - {subject} already {event.to_state.upper()}. No change needed."
+    if event.reason == DENIED:
+        return f"⚠️ {prefix}{event.node} - Critical section busy. Request denied for signal {number}."
+    if event.reason == OVERRIDE:
+        return f"🛂 {prefix}{event.node} - RTO manual override in effect. Request refused for signal {number}."
+    if event.reason == WAITING:
+        return f"⏳ {prefix}{event.node} - Waiting for critical section access for signal {number}..."
+    if event.reason == FAILED:
+        return f"❌ {prefix}{event.node} - {subject} could not be set {event.to_state.upper()}."
+
+    advice = (PEDESTRIAN_ADVICE if is_pedestrian(event) else VEHICLE_ADVICE).get(event.to_state, "")
+    text = f"{STATE_ICONS.get(event.to_state, '⚪')} {prefix}{event.node} - {priority}{subject} is now {event.to_state.upper()}."
+    return f"{text} {advice}" if advice else text
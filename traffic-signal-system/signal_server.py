@@ -0,0 +1,1424 @@
+import time
+from xmlrpc.server import SimpleXMLRPCServer
+from datetime import datetime, timedelta
+import threading
+import random
+import socket
+import sys
+from collections import defaultdict, deque
+from event_log import EventLog, DEFAULT_SUBSCRIBER
+from journal import StateJournal
+from shared_state import attach_from_env
+from multiproc_server import run_prefork_server
+from clock_sync import SyncClock, BerkeleyCoordinator
+from bootstrap import add_bootstrap_arguments, load_config, parse_clock, startup_clock
+from hlc import HybridLogicalClock, HLCRequestHandler, HLCTransport, decode, encode, format_timestamp
+from signal_events import SignalEvent, CHANGE, VIP, NO_CHANGE, DENIED, WAITING, FAILED, MANUAL, OVERRIDE, to_wire
+from phase_plan import countdown_at, make_plan, phase_at
+from adaptive_timing import AdaptiveTimingEngine, DemandMeter
+from detectors import DetectorAggregator, DetectorStreamServer, pack_events
+import argparse
+import xmlrpc.client
+
+# Enhanced request handler with timeout and error handling
+class EnhancedXMLRPCRequestHandler(HLCRequestHandler):
+    """Enhanced request handler with timeout, HLC propagation and better error handling"""
+    timeout = 60
+    
+    def setup(self):
+        """Setup with socket timeout"""
+        try:
+            HLCRequestHandler.setup(self)
+            self.request.settimeout(self.timeout)
+        except Exception as e:
+            print(f"⚠️ {NODE}: Setup error for client connection: {e}")
+    
+    def handle(self):
+        """Handle request with error catching"""
+        try:
+            HLCRequestHandler.handle(self)
+        except socket.timeout:
+            print(f"⏱️ {NODE}: Client request timed out")
+        except ConnectionResetError:
+            print(f"🔌 {NODE}: Client connection reset")
+        except Exception as e:
+            print(f"💥 {NODE}: Request handling error: {e}")
+
+# TRAFFIC SIGNAL SERVER - ENHANCED FOR LOAD BALANCING WITH ERROR HANDLING
+# One implementation for every replica: server_t8_1.py runs it as the PRIMARY
+# (port 8000), sever_clone_t8_1.py as the CLONE (port 8001), and the cluster
+# launcher starts further replicas with --role/--port/--node-id.
+ROLES = {
+    "primary": {'port': 8000, 'banner': "🟦", 'status': "📊", 'peer': "clone server"},
+    "clone": {'port': 8001, 'banner': "🔄", 'status': "🔄", 'peer': "primary server"},
+}
+ROLE = "primary"
+NODE = "PRIMARY"  # Log prefix and server tag: the node ID in capitals (PRIMARY, CLONE, CLONE-2, ...)
+INTERSECTION = "main"  # Intersection this server controls - tagged on every published event
+
+# Traffic signal state - North-South (1,3) initially active
+current_active_signal = 1  # North-South pair active
+
+# Append-only message logs of (delay, SignalEvent) - every subscriber reads its own complete sequence
+vehicle_log = EventLog()
+pedestrian_log = EventLog()
+PEDESTRIAN_BATCH_MAX = 256  # Most events one get_pedestrian_events call returns
+
+# Shared signal status array - synchronized across all clients
+signal_status = {
+    "t1": "green",   # Traffic signal 1 (North) - GREEN
+    "t2": "red",     # Traffic signal 2 (East) - RED
+    "t3": "green",   # Traffic signal 3 (South) - GREEN  
+    "t4": "red",     # Traffic signal 4 (West) - RED
+    "p1": "red",     # Pedestrian crossing 1 (North) - RED (opposite to vehicle)
+    "p2": "green",   # Pedestrian crossing 2 (East) - GREEN
+    "p3": "red",     # Pedestrian crossing 3 (South) - RED (opposite to vehicle)
+    "p4": "green"    # Pedestrian crossing 4 (West) - GREEN
+}
+
+# Time synchronization
+server_time = None
+client_times = {}  
+# Offsets (seconds) of the entered clocks from the host clock, recorded once when they are set -
+# the datetimes above stand still, so offsets derived from them later would be off by the uptime
+server_time_offset = None
+client_time_offsets = {}
+sync_clock = SyncClock()  # Server clock: monotonic time plus the Berkeley-adjusted offset
+# Continuous Berkeley rounds over client clock samples; each new offset is journaled
+clock_sync = BerkeleyCoordinator(sync_clock, name=NODE,
+                                 on_adjust=lambda offset: journal_event("sync_time", {'offset': offset}))
+
+# Ricart-Agrawala Algorithm variables with thread safety
+# Hybrid logical clock on the synchronized clock - merged from every incoming RPC
+hlc = HybridLogicalClock(physical=sync_clock.now)
+EnhancedXMLRPCRequestHandler.hlc = hlc
+pending_requests = {}  # {request_id: (timestamp, requesting_client, requested_signal, is_vip)}
+replies_received = {}  # {request_id: set of clients that replied}
+request_queue = []
+current_request_id = 0
+lock = threading.RLock()  # Use RLock for nested locking
+clients_in_system = set()  # Track connected clients
+in_critical_section = None  # Which client is currently in critical section
+
+# Enhanced tracking for multiple concurrent requests
+active_requests = defaultdict(list)  # Track requests by signal
+REQUEST_HISTORY_LIMIT = 1000  # Recent requests kept (and snapshotted); totals are counted separately
+request_history = deque(maxlen=REQUEST_HISTORY_LIMIT)  # Keep recent requests for analysis
+request_totals = {'requests': 0, 'vip': 0}  # Every request since the state began
+failed_requests = []  # Track failed requests
+
+# VIP Vehicle System
+vip_requests = {}  # {request_id: (timestamp, signal, vip_count)}
+vip_pending_queue = []  # Queue for VIP requests with priority
+
+# Performance and error tracking
+server_stats = {
+    'total_processed': 0,
+    'successful_requests': 0,
+    'failed_requests': 0,
+    'timeout_requests': 0,
+    'vip_processed': 0,
+    'start_time': time.time()
+}
+
+# Auto-cycling timer for traffic simulation
+auto_cycle_enabled = True
+auto_cycle_initialized = False  # Track if auto-cycle has been properly initialized
+last_signal_change = time.time()
+signal_cycle_interval = 8  # Change signal every 8 seconds
+FIXED_PLAN = make_plan()   # Fixed-time cycle: phase order and green/yellow splits (see phase_plan.py)
+base_plan = FIXED_PLAN     # Cycle in effect without overrides - replaced each cycle in adaptive mode
+MANUAL_HOLD_SECONDS = 10.0  # Auto-cycle stays off this long after a manual signal change
+manual_hold_until = None    # When the current manual hold ends (None = no hold scheduled)
+
+# VIP mode control - stops auto-cycle when VIP is active
+vip_mode_active = False
+vip_active_signal = None
+vip_start_time = None
+vip_duration = 10  # VIP lasts 10 seconds
+
+# RTO manual override - operator-set states held until released (auto-cycle and VIP suspended)
+manual_override = None  # {'signal_status', 'operator', 'since'} while an operator holds the intersection
+SIGNAL_STATES = {"t": ("green", "yellow", "red"), "p": ("green", "red")}  # Allowed states by signal type
+
+# Adaptive signal timing - demand per approach, measured on every replica
+demand = DemandMeter()
+adaptive = None      # AdaptiveTimingEngine on the PRIMARY when started with --adaptive
+timing_peers = []    # Replica URLs the PRIMARY pushes each new plan to (--peer)
+PEER_PUSH_TIMEOUT = 2.0
+detections = DetectorAggregator(demand)  # Detector events: bucketed per approach, totals into the demand meter
+
+# Durable state journal - restarts replay from the latest snapshot
+journal = StateJournal("primary")
+
+def configure_node(role, node_id=None, intersection=None):
+    """Set this process's role and node ID before it serves (journal name, log prefix, server tag)"""
+    global ROLE, NODE, INTERSECTION, journal
+    ROLE = role
+    INTERSECTION = intersection or INTERSECTION
+    node_id = node_id or role
+    NODE = node_id.upper()
+    journal = StateJournal(node_id)
+    clock_sync.name = NODE
+
+# Optional shared-memory state for co-located servers (TRAFFIC_SHARED_STATE=<segment>)
+shared_state = None
+shared_version_seen = 0
+SHARED_TICK_INTERVAL = 0.25  # Keep the segment fresh for lock-free readers
+
+def load_shared_state():
+    """Adopt newer signal state published to the shared segment by another local process"""
+    global current_active_signal, vip_mode_active, vip_active_signal, vip_start_time, shared_version_seen
+    if not shared_state:
+        return
+    snapshot = shared_state.read(0)
+    if snapshot['version'] <= shared_version_seen:
+        return
+    with lock:
+        shared_version_seen = snapshot['version']
+        signal_status.update(snapshot['signal_status'])
+        current_active_signal = snapshot['current_active_signal'] or current_active_signal
+        vip_active_signal = snapshot['vip_signal']
+        vip_start_time = snapshot['vip_start_time']
+        vip_mode_active = vip_active_signal is not None
+
+def publish_shared_state():
+    """Publish local signal state to the shared segment"""
+    global shared_version_seen
+    if not shared_state:
+        return
+    with lock:
+        version = shared_state.write(0, signal_status, current_active_signal,
+                                     vip_active_signal if vip_mode_active else None,
+                                     vip_start_time if vip_mode_active else None)
+        if version:
+            shared_version_seen = version
+
+def shared_state_ticker():
+    """Advance the auto-cycle in the background so shared-segment readers never see stale state"""
+    while True:
+        auto_cycle_traffic_signals()
+        time.sleep(SHARED_TICK_INTERVAL)
+
+def time_offset(clock_time):
+    """Offset in seconds of an operator-entered clock from this host's clock"""
+    return (clock_time - datetime.now()).total_seconds()
+
+def from_offset(offset):
+    """Rebuild a clock time from a journaled offset"""
+    return (datetime.now() + timedelta(seconds=offset)).replace(microsecond=0)
+
+def capture_state():
+    """Capture all durable server state as a JSON-serializable snapshot"""
+    with lock:
+        return {
+            'current_active_signal': current_active_signal,
+            'signal_status': dict(signal_status),
+            'server_time_offset': server_time_offset,
+            'client_time_offsets': dict(client_time_offsets),
+            'synchronized_time_offset': sync_clock.offset if sync_clock.synchronized else None,
+            'clients_in_system': sorted(clients_in_system),
+            'current_request_id': current_request_id,
+            'logical_clock': hlc.last,
+            'request_history': list(request_history),
+            'request_totals': dict(request_totals),
+            'vip_mode_active': vip_mode_active,
+            'vip_active_signal': vip_active_signal,
+            'vip_start_time': vip_start_time,
+            'manual_override': manual_override,
+            'timing_plan': base_plan
+        }
+
+def apply_snapshot(state):
+    """Restore server state from a snapshot produced by capture_state"""
+    global current_active_signal, server_time, server_time_offset, current_request_id
+    global vip_mode_active, vip_active_signal, vip_start_time, manual_override
+    with lock:
+        current_active_signal = state['current_active_signal']
+        if state.get('timing_plan'):
+            adopt_timing_plan(state['timing_plan'])
+        signal_status.update(state['signal_status'])
+        if state['server_time_offset'] is not None:
+            server_time_offset = state['server_time_offset']
+            server_time = from_offset(server_time_offset)
+            sync_clock.set_offset(server_time_offset)
+        for client_id, offset in state['client_time_offsets'].items():
+            client_time_offsets[client_id] = offset
+            client_times[client_id] = from_offset(offset)
+        if state['synchronized_time_offset'] is not None:
+            sync_clock.set_offset(state['synchronized_time_offset'])
+            sync_clock.synchronized = True
+        clients_in_system.update(state['clients_in_system'])
+        current_request_id = state['current_request_id']
+        hlc.restore(state['logical_clock'])
+        request_history.clear()
+        request_history.extend(state['request_history'])
+        # Snapshots of older servers held the whole history instead of totals
+        request_totals.update(state.get('request_totals') or {
+            'requests': len(state['request_history']),
+            'vip': sum(1 for req in state['request_history'] if req.get('is_vip', False))})
+        vip_mode_active = state['vip_mode_active']
+        vip_active_signal = state['vip_active_signal']
+        vip_start_time = state['vip_start_time']
+        manual_override = state.get('manual_override')  # Absent from snapshots of older servers
+
+def apply_journal_event(event_type, data):
+    """Re-apply one journaled event to in-memory state"""
+    global current_active_signal, server_time, server_time_offset, current_request_id
+    global vip_mode_active, vip_active_signal, vip_start_time, manual_override
+    with lock:
+        if event_type == "server_time":
+            server_time_offset = data['offset']
+            server_time = from_offset(data['offset'])
+            if not sync_clock.synchronized:
+                sync_clock.set_offset(data['offset'])
+        elif event_type == "client_time":
+            client_time_offsets[data['client_id']] = data['offset']
+            client_times[data['client_id']] = from_offset(data['offset'])
+            clients_in_system.add(data['client_id'])
+        elif event_type == "sync_time":
+            sync_clock.set_offset(data['offset'])
+            sync_clock.synchronized = True
+        elif event_type == "request":
+            record_request(data)
+            current_request_id = max(current_request_id, data['request_id'])
+            hlc.restore(data['timestamp'])
+        elif event_type == "signal_change":
+            current_active_signal = data['signal']
+            update_signal_status(data['signal'], "green", quiet=True)
+        elif event_type == "vip_activated":
+            vip_mode_active = True
+            vip_active_signal = data['signal']
+            vip_start_time = data['start_time']
+            current_active_signal = data['signal']
+            update_signal_status(data['signal'], "green", quiet=True)
+        elif event_type == "manual_override":
+            manual_override = data
+            signal_status.update(data['signal_status'])
+        elif event_type == "manual_release":
+            manual_override = None
+        elif event_type == "timing_plan":
+            adopt_timing_plan(data)
+
+def record_request(request_info):
+    """Add a request to the recent history and the running totals (lock must be held)"""
+    request_history.append(request_info)
+    request_totals['requests'] += 1
+    if request_info.get('is_vip', False):
+        request_totals['vip'] += 1
+
+def journal_event(event_type, data):
+    """Record a state-changing event, compacting into a snapshot when due"""
+    if not journal.file:
+        return  # Journal not opened (module imported, not running as server)
+    try:
+        with lock:
+            journal.append(event_type, data)
+            if not journal.should_snapshot():
+                return
+            # Capture and rotate under the lock (a consistent cut); serialize outside it
+            state = capture_state()
+            seq = journal.begin_snapshot()
+        threading.Thread(target=write_snapshot, args=(state, seq), name="Snapshot", daemon=True).start()
+    except Exception as e:
+        print(f"⚠️ {NODE}: Journal write failed: {e}")
+
+def write_snapshot(state, seq):
+    """Background thread: write a captured snapshot without holding the server lock"""
+    try:
+        journal.write_snapshot(state, seq)
+    except Exception as e:
+        journal.abort_snapshot()
+        print(f"⚠️ {NODE}: Snapshot write failed: {e}")
+
+def restore_state():
+    """Replay the journal on startup; returns True if prior state was found"""
+    try:
+        replayed = journal.replay(apply_snapshot, apply_journal_event)
+        journal.open()
+        restored = journal.snapshot_seq > 0 or replayed > 0
+        if restored:
+            print(f"💾 {NODE} - Restored state from journal (snapshot seq {journal.snapshot_seq}, {replayed} events replayed)")
+        return restored
+    except Exception as e:
+        print(f"❌ {NODE}: Error restoring journal state: {e}")
+        if not journal.file:
+            journal.open()
+        return False
+
+def adopt_timing_plan(plan):
+    """Make plan the cycle in effect (one reference swap - readers see the old plan or the new one)"""
+    global base_plan
+    base_plan = make_plan(plan['phases'], plan['epoch'])  # Rebuilt: the version is recomputed locally
+    if adaptive:
+        adaptive.adopt(base_plan)
+    return base_plan
+
+def advance_adaptive_plan(now):
+    """Adaptive mode: at each cycle boundary size the next cycle from measured demand and publish it"""
+    if not adaptive or not adaptive.due(now):
+        return
+    with lock:
+        if not adaptive.due(now):
+            return  # Another request thread got here first
+        plan = adopt_timing_plan(adaptive.next_plan(now))
+        journal_event("timing_plan", plan)
+    if timing_peers:
+        threading.Thread(target=push_timing_plan, args=(plan,), name="PlanPush", daemon=True).start()
+
+def push_timing_plan(plan):
+    """Install the PRIMARY's new plan on every replica; their demand counts feed the next cycle"""
+    for url in timing_peers:
+        try:
+            transport = HLCTransport(hlc)
+            transport.timeout = PEER_PUSH_TIMEOUT
+            peer = xmlrpc.client.ServerProxy(url, allow_none=True, transport=transport)
+            demand.add_counts(peer.install_timing_plan(plan))
+        except Exception as e:
+            print(f"⚠️ {NODE}: Timing plan push to {url} failed: {e}")
+
+def install_timing_plan(plan):
+    """Adopt a timing plan pushed by the PRIMARY; returns the demand counted here since the last push"""
+    try:
+        with lock:
+            if plan['epoch'] >= base_plan['epoch']:  # A late push never replaces a newer plan
+                journal_event("timing_plan", adopt_timing_plan(plan))
+        return demand.take_counts()
+    except Exception as e:
+        print(f"❌ {NODE}: Error installing timing plan: {e}")
+        return [0, 0, 0, 0]
+
+def auto_cycle_traffic_signals():
+    """Automatically cycle through traffic signals with yellow transitions - SYNCHRONIZED"""
+    global current_active_signal, last_signal_change, signal_cycle_interval, auto_cycle_enabled, auto_cycle_initialized
+    global vip_mode_active, vip_active_signal, vip_start_time, vip_duration
+    
+    try:
+        load_shared_state()
+        advance_adaptive_plan(time.time())  # Cycle boundaries pass under overrides and manual holds too
+        
+        # RTO manual override - hold the operator's states until released
+        if manual_override:
+            with lock:
+                signal_status.update(manual_override['signal_status'])
+                publish_shared_state()
+            return
+        
+        if not auto_cycle_enabled:
+            return
+            
+        # Check if VIP mode should be ended
+        if vip_mode_active and vip_start_time:
+            current_time = time.time()
+            if current_time - vip_start_time >= vip_duration:
+                # VIP timeout - resume auto-cycle
+                print(f"⏰ VIP timeout reached, resuming auto-cycle")
+                vip_mode_active = False
+                vip_active_signal = None
+                vip_start_time = None
+                
+        # Skip auto-cycling if VIP is active
+        if vip_mode_active and vip_active_signal:
+            # Keep VIP signal green, others red
+            with lock:
+                for i in range(1, 5):
+                    if i == vip_active_signal:
+                        signal_status[f"t{i}"] = "green"
+                        signal_status[f"p{i}"] = "red"
+                    else:
+                        signal_status[f"t{i}"] = "red"
+                        signal_status[f"p{i}"] = "green"
+                publish_shared_state()
+            return
+        
+        current_time = time.time()
+        
+        # Use absolute time-based synchronization to keep servers in sync
+        # Every server (and every client holding the plan) derives the same phase from the clock
+        plan = base_plan
+        index, state, _ = phase_at(plan, current_time)
+        phase = plan['phases'][index]
+        active_signals = phase['signals']
+        current_active_signal = active_signals[0]
+        current_pair = phase['name']
+        
+        # Always update signal status to ensure synchronization
+        with lock:
+            # Active pair green or yellow, all others red; pedestrians opposite (stopped during yellow)
+            for i in range(1, 5):
+                signal_status[f"t{i}"] = state if i in active_signals else "red"
+                signal_status[f"p{i}"] = "red" if i in active_signals else "green"
+            signal_state = state.upper()
+            
+            # Only print on actual changes to avoid spam
+            if not auto_cycle_initialized:
+                print(f"🔄 AUTO-CYCLE SYNCHRONIZED: {current_pair} signals {signal_state}")
+                print(f"📊 SYNC STATUS: {signal_status}")
+                auto_cycle_initialized = True
+            elif current_time - last_signal_change >= signal_cycle_interval - 1:  # Print near cycle changes
+                print(f"� SYNC UPDATE: {current_pair} active, signals {active_signals} GREEN")
+                last_signal_change = current_time
+            
+            publish_shared_state()
+                
+    except Exception as e:
+        print(f"❌ Auto-cycle error: {e}")
+        return False
+    
+    return True
+
+def safe_execute(func, *args, **kwargs):
+    """Safely execute function with error handling"""
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        print(f"⚠️ {NODE}: Error in {func.__name__}: {e}")
+        server_stats['failed_requests'] += 1
+        return None
+
+def update_signal_status(signal_num, new_status, quiet=False):
+    """Update the shared signal status array and notify all clients"""
+    global signal_status
+    
+    try:
+        with lock:
+            if new_status == "green":
+                # Only one traffic signal can be green at a time
+                for i in range(1, 5):
+                    signal_status[f"t{i}"] = "red"
+                    signal_status[f"p{i}"] = "green"  # Pedestrians opposite to vehicles
+                
+                # Set requested signal to green
+                signal_status[f"t{signal_num}"] = "green"
+                signal_status[f"p{signal_num}"] = "red"  # Pedestrian crossing goes red
+            
+            publish_shared_state()
+            if not quiet:
+                print(f"{ROLES[ROLE]['status']} {NODE} SERVER - SIGNAL STATUS UPDATED: {signal_status}")
+            return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error updating signal status: {e}")
+        return False
+
+def get_signal_status():
+    """Return current signal status array with error handling"""
+    try:
+        # Check if signals need to auto-cycle
+        auto_cycle_traffic_signals()
+        
+        with lock:
+            return dict(signal_status)  # Return copy to avoid reference issues
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting signal status: {e}")
+        # Return safe default
+        return {
+            "t1": "green", "t2": "red", "t3": "red", "t4": "red",
+            "p1": "red", "p2": "green", "p3": "green", "p4": "green"
+        }
+
+def current_timing_plan():
+    """Timing plan in effect now: the fixed cycle plus any RTO, VIP or manual override"""
+    override = None
+    if manual_override:
+        held = manual_override['signal_status']
+        green = [i for i in range(1, 5) if held[f"t{i}"] == "green"]
+        override = {'kind': "rto", 'signal': green[0] if green else None, 'until': None,
+                    'signal_status': dict(held)}
+    elif vip_mode_active and vip_active_signal:
+        override = {'kind': "vip", 'signal': vip_active_signal, 'until': vip_start_time + vip_duration}
+    elif not auto_cycle_enabled:
+        override = {'kind': "manual", 'signal': current_active_signal, 'until': manual_hold_until}
+    if override is None:
+        return base_plan
+    return make_plan(base_plan['phases'], base_plan['epoch'], override=override)
+
+def get_timing_plan(known_version=0):
+    """Return the timing plan with its version - only the version if the caller already holds it"""
+    try:
+        plan = current_timing_plan()
+        if plan['version'] == known_version:
+            return {'version': plan['version'], 'server_time': time.time()}
+        return dict(plan, server_time=time.time())
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting timing plan: {e}")
+        return dict(FIXED_PLAN, server_time=time.time())
+
+def get_countdown_info():
+    """Return countdown information for traffic signal changes (computed from the timing plan)"""
+    try:
+        # Check if signals need to auto-cycle first
+        auto_cycle_traffic_signals()
+        return countdown_at(current_timing_plan(), time.time())
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting countdown info: {e}")
+        return countdown_at(FIXED_PLAN, time.time())
+
+def set_server_time(time_input):
+    """Set the server's clock time (Signal Manipulator time) from HH:MM:SS or a datetime"""
+    global server_time, server_time_offset
+    try:
+        server_time = time_input if isinstance(time_input, datetime) else parse_clock(time_input)
+        server_time_offset = time_offset(server_time)
+        sync_clock.set_time(server_time)
+        journal_event("server_time", {'offset': server_time_offset})
+        print(f"🕐 {NODE} - Server time set to: {server_time.strftime('%H:%M:%S')}")
+        return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error setting server time: {e}")
+        return False
+
+def register_client_time(client_id, time_input):
+    """Register a client's clock time with error handling"""
+    global client_times, clients_in_system
+    try:
+        with lock:
+            hour, minute, second = map(int, time_input.split(':'))
+            client_time = datetime.now().replace(hour=hour, minute=minute, second=second, microsecond=0)
+            client_times[client_id] = client_time
+            client_time_offsets[client_id] = time_offset(client_time)
+            clients_in_system.add(client_id)
+            # Typed time is the client's first (second-resolution) clock sample; its
+            # ClockSyncClient refines it with RTT-compensated samples afterwards
+            clock_sync.add_sample(client_id, client_time_offsets[client_id] - sync_clock.offset)
+            journal_event("client_time", {'client_id': client_id, 'offset': client_time_offsets[client_id]})
+            print(f"🕐 {NODE} - {client_id} time registered: {client_time.strftime('%H:%M:%S')}")
+            return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error registering client time: {e}")
+        return False
+
+def berkeley_synchronization():
+    """Run a Berkeley round now over the latest client clock samples (rounds also run periodically)"""
+    try:
+        print(f"\n🔄 {NODE} - Starting Berkeley Algorithm Synchronization...")
+        print(f"📊 {NODE} Server (Signal Manipulator): {sync_clock.strftime('%H:%M:%S.%f')[:-3]}")
+        adjustment = clock_sync.run_round()
+        if adjustment is not None:
+            clock_stats = clock_sync.get_stats()
+            for client_id, sample in clock_stats['clock_clients'].items():
+                status = "✅" if sample['accepted'] else "🚫 outlier"
+                print(f"📊 {NODE} - {client_id}: offset {sample['offset_ms']:+.3f} ms {status}")
+            print(f"📊 {NODE} - Server clock adjusted by {adjustment * 1000:+.3f} ms "
+                  f"(max skew {clock_stats['clock_max_skew_ms']:.3f} ms)")
+        
+        if not sync_clock.synchronized:
+            return None
+        sync_time = sync_clock.strftime('%H:%M:%S')
+        print(f"\n⏰ {NODE} - SYNCHRONIZED TIME: {sync_time}")
+        print(f"✅ {NODE} - Berkeley Algorithm completed successfully!")
+        return sync_time
+    except Exception as e:
+        print(f"❌ {NODE}: Error in Berkeley synchronization: {e}")
+        return None
+
+def get_synchronized_time():
+    """Return the current synchronized time with error handling"""
+    try:
+        if sync_clock.synchronized:
+            return sync_clock.strftime('%H:%M:%S')
+        return None
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting synchronized time: {e}")
+        return None
+
+def get_clock_time():
+    """Timestamp exchange for continuous clock sync: [server clock in epoch seconds, round id]"""
+    try:
+        return clock_sync.clock_exchange()
+    except Exception as e:
+        print(f"❌ {NODE}: Error reading clock: {e}")
+        return [time.time(), -1]
+
+def report_clock_sample(client_id, offset, rtt=None, round_id=None):
+    """Accept a client's measured clock offset; returns the correction it must apply"""
+    try:
+        return clock_sync.add_sample(client_id, offset, rtt, round_id)
+    except Exception as e:
+        print(f"❌ {NODE}: Error recording clock sample from {client_id}: {e}")
+        return 0.0
+
+def handle_vip_deadlock(vip_list):
+    """Handle VIP deadlock scenarios with enhanced error handling"""
+    global current_active_signal
+    
+    try:
+        if len(vip_list) < 2:
+            return vip_list  # No deadlock with single VIP
+        
+        print(f"⚠️ {NODE} - VIP DEADLOCK DETECTED:")
+        print(f"   🚨 Multiple VIPs requesting different routes: {[vip[0] for vip in vip_list]}")
+        
+        # Separate VIPs based on current signal state
+        active_signal_vips = []
+        other_vips = []
+        
+        for route, timestamp in vip_list:
+            if route == current_active_signal:
+                active_signal_vips.append((route, timestamp))
+            else:
+                other_vips.append((route, timestamp))
+        
+        # Case 1: One VIP route is already GREEN
+        if active_signal_vips:
+            print(f"   📋 {NODE} - DEADLOCK RESOLUTION CASE 1:")
+            print(f"   ✅ VIP in route {current_active_signal} has priority (signal already GREEN)")
+            print(f"   ⏳ Other VIPs queued by timestamp")
+            
+            # Sort others by timestamp (earlier timestamp = higher priority)
+            other_vips.sort(key=lambda x: x[1])
+            return active_signal_vips + other_vips
+        
+        # Case 2: Both VIP routes are RED - use timestamps
+        else:
+            print(f"   📋 {NODE} - DEADLOCK RESOLUTION CASE 2:")
+            print(f"   🕐 All VIP routes are RED - using timestamps to resolve")
+            vip_list.sort(key=lambda x: x[1])  # Sort by timestamp
+            
+            for i, (route, timestamp) in enumerate(vip_list):
+                print(f"   {i+1}. {NODE} - VIP Route {route} (timestamp: {format_timestamp(timestamp)})")
+            
+            return vip_list
+    except Exception as e:
+        print(f"❌ {NODE}: Error handling VIP deadlock: {e}")
+        return vip_list  # Return original list if error
+
+def vip_timestamp(timestamp):
+    """HLC timestamp for a VIP request: the client's HLC stamp, or ours for legacy integer stamps"""
+    if isinstance(timestamp, str):
+        try:
+            remote = decode(timestamp)
+            hlc.update(remote)
+            return remote
+        except ValueError:
+            pass
+    return hlc.now()  # Legacy per-client integers are not comparable - order by arrival
+
+def submit_vip_requests(vip_data):
+    """Submit VIP requests to the server with error handling"""
+    global vip_pending_queue
+    
+    try:
+        if not vip_data:
+            return True
+        
+        vip_data = [(route, vip_timestamp(timestamp)) for route, timestamp in vip_data]
+        with lock:
+            print(f"\n🚨 {NODE} - VIP VEHICLES DETECTED!")
+            print(f"   📋 VIP Routes: {[vip[0] for vip in vip_data]}")
+            print(f"   🚗 Total VIPs: {len(vip_data)}")
+            
+            # Handle VIP deadlock if multiple VIPs
+            if len(vip_data) > 1:
+                vip_data = handle_vip_deadlock(vip_data)
+            
+            # Add VIPs to pending queue with priority
+            for route, timestamp in vip_data:
+                vip_pending_queue.append((route, timestamp))
+                print(f"   👑 {NODE} - VIP added to priority queue: Route {route}")
+            
+            print(f"   ✅ {NODE} - All VIP requests queued with HIGH PRIORITY")
+            server_stats['total_processed'] += 1
+            return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error submitting VIP requests: {e}")
+        server_stats['failed_requests'] += 1
+        return False
+
+def request_critical_section(client_id, requested_signal, is_vip=False):
+    """Ricart-Agrawala: Request access to critical section with enhanced error handling"""
+    global current_request_id, pending_requests, replies_received, in_critical_section, active_requests, request_history, vip_requests
+    
+    try:
+        # Check if already in critical section
+        if in_critical_section and in_critical_section != client_id and not is_vip:
+            print(f"🚫 {NODE} - DENIED: {client_id} request for signal {requested_signal} - Critical section busy with {in_critical_section}")
+            return None, None
+        
+        timestamp = hlc.now()  # Globally ordered across servers, no shared lock
+        
+        with lock:
+            current_request_id += 1
+            request_id = current_request_id
+            
+            # Enhanced logging for requests
+            request_info = {
+                'request_id': request_id,
+                'timestamp': timestamp,
+                'client_id': client_id,
+                'requested_signal': requested_signal,
+                'is_vip': is_vip,
+                'time': datetime.now().strftime('%H:%M:%S.%f')[:-3],
+                'server': NODE
+            }
+            record_request(request_info)
+            journal_event("request", request_info)
+            active_requests[requested_signal].append(request_id)
+            
+            if is_vip:
+                vip_requests[request_id] = (timestamp, requested_signal, 1)
+                print(f"👑 {NODE} - VIP REQUEST #{request_id}:")
+                print(f"   🎯 VIP Route: {requested_signal}")
+                print(f"   ⏰ Timestamp: {format_timestamp(timestamp)}")
+                print(f"   🚨 PRIORITY: HIGH")
+                server_stats['vip_processed'] += 1
+            else:
+                print(f"📋 {NODE} - REGULAR REQUEST #{request_id}:")
+                print(f"   👤 Client: {client_id}")
+                print(f"   🎯 Signal: {requested_signal}")
+                print(f"   ⏰ Timestamp: {format_timestamp(timestamp)}")
+            
+            pending_requests[request_id] = (timestamp, client_id, requested_signal, is_vip)
+            replies_received[request_id] = set()
+            server_stats['total_processed'] += 1
+        
+        return request_id, timestamp
+    except Exception as e:
+        print(f"❌ {NODE}: Error requesting critical section: {e}")
+        server_stats['failed_requests'] += 1
+        return None, None
+
+def send_reply(request_id, replying_client, can_reply=True):
+    """Ricart-Agrawala: Send reply to a request with error handling"""
+    global replies_received
+    
+    try:
+        with lock:
+            if request_id in replies_received and can_reply:
+                replies_received[request_id].add(replying_client)
+                return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error sending reply: {e}")
+    return False
+
+def can_enter_critical_section(request_id):
+    """Check if client can enter critical section with VIP priority and error handling"""
+    global pending_requests, replies_received, clients_in_system, in_critical_section
+    
+    try:
+        with lock:
+            if request_id not in pending_requests:
+                return False
+            
+            timestamp, requesting_client, requested_signal, is_vip = pending_requests[request_id]
+            
+            # VIP requests get immediate priority
+            if is_vip:
+                print(f"👑 {NODE} - VIP PRIORITY ACCESS GRANTED:")
+                print(f"   🎫 Request ID: {request_id}")
+                print(f"   🚨 VIP Route: {requested_signal}")
+                return True
+            
+            # Regular Ricart-Agrawala logic
+            if in_critical_section:
+                return False
+                
+            # Check if we have replies from all other clients
+            other_clients = clients_in_system.copy()
+            other_clients.discard(requesting_client)
+            
+            received_replies = replies_received[request_id]
+            
+            # For demonstration, simulate that all clients reply immediately
+            if len(other_clients) <= len(received_replies) + 1:  # +1 for auto-replies
+                print(f"✅ {NODE} - CRITICAL SECTION ACCESS GRANTED:")
+                print(f"   🎫 Request ID: {request_id}")
+                print(f"   👤 Client: {requesting_client}")  
+                print(f"   🎯 Signal: {requested_signal}")
+                return True
+            
+            return False
+    except Exception as e:
+        print(f"❌ {NODE}: Error checking critical section access: {e}")
+        return False
+
+def enter_critical_section(request_id):
+    """Enter critical section with error handling"""
+    global in_critical_section, pending_requests
+    
+    try:
+        with lock:
+            if request_id in pending_requests:
+                timestamp, client_id, requested_signal, is_vip = pending_requests[request_id]
+                in_critical_section = client_id
+                
+                if is_vip:
+                    print(f"👑 {NODE} - VIP ENTERING CRITICAL SECTION:")
+                    print(f"   🚨 VIP has exclusive access")
+                    print(f"   🎯 Processing VIP route: {requested_signal}")
+                else:
+                    print(f"🔒 {NODE} - ENTERING CRITICAL SECTION:")
+                    print(f"   📋 Client {client_id} has exclusive access")
+                    print(f"   🎯 Processing signal change: {requested_signal}")
+                return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error entering critical section: {e}")
+    return False
+
+def exit_critical_section(request_id):
+    """Exit critical section with error handling"""
+    global in_critical_section, pending_requests, replies_received, active_requests, vip_requests
+    
+    try:
+        with lock:
+            if request_id in pending_requests and in_critical_section:
+                timestamp, client_id, requested_signal, is_vip = pending_requests[request_id]
+                
+                if is_vip:
+                    print(f"🎯 {NODE} - VIP EXITING CRITICAL SECTION:")
+                    print(f"   ✅ VIP route {requested_signal} completed")
+                    print(f"   🔓 Critical section now available")
+                    
+                    # Clean up VIP request
+                    if request_id in vip_requests:
+                        del vip_requests[request_id]
+                else:
+                    print(f"🔓 {NODE} - EXITING CRITICAL SECTION:")
+                    print(f"   ✅ Signal change to {requested_signal} completed")
+                    print(f"   🔓 Critical section now available")
+                
+                in_critical_section = None
+                
+                # Clean up this request
+                del pending_requests[request_id]
+                if request_id in replies_received:
+                    del replies_received[request_id]
+                
+                # Remove from active requests
+                if requested_signal in active_requests:
+                    if request_id in active_requests[requested_signal]:
+                        active_requests[requested_signal].remove(request_id)
+                    if not active_requests[requested_signal]:
+                        del active_requests[requested_signal]
+                
+                server_stats['successful_requests'] += 1
+                return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error exiting critical section: {e}")
+    return False
+
+def end_manual_hold():
+    """Timer callback: resume auto-cycling unless a later manual change extended the hold"""
+    global auto_cycle_enabled
+    if manual_hold_until is None or time.time() >= manual_hold_until - 0.05:
+        auto_cycle_enabled = True
+
+def signal_manipulator(requested_signal):
+    """Handle regular signal changes with Ricart-Agrawala mutual exclusion and error handling"""
+    global current_active_signal, auto_cycle_enabled, last_signal_change, manual_hold_until
+    
+    try:
+        if manual_override:
+            print(f"🚫 {NODE} - DENIED: signal {requested_signal} request - RTO manual override in effect")
+            vehicle_log.publish([(0, signal_event(f"t{requested_signal}", None, "green", OVERRIDE))])
+            return False
+        
+        demand.add(requested_signal)  # Each request is a vehicle waiting on that approach
+        
+        # Temporarily disable auto-cycling when manual request is made
+        auto_cycle_enabled = False
+        
+        if sync_clock.synchronized:
+            sync_time_str = sync_clock.strftime('%H:%M:%S')
+            print(f"⏰ {NODE} - Operating at synchronized time: {sync_time_str}")
+        
+        # Determine client
+        client_id = f"{NODE}-Vehicle Controller (Thread-{threading.current_thread().ident % 1000})"
+        
+        # Create regular request
+        request_id, timestamp = request_critical_section(client_id, requested_signal, is_vip=False)
+        
+        if request_id is None:
+            vehicle_log.publish([(0, signal_event(f"t{requested_signal}", None, "green", DENIED))])
+            # Re-enable auto-cycling
+            auto_cycle_enabled = True
+            return False
+        
+        # Simulate replies from other clients
+        for client in clients_in_system:
+            if client != client_id:
+                send_reply(request_id, client, True)
+        
+        # Check if we can enter critical section
+        if not can_enter_critical_section(request_id):
+            vehicle_log.publish([(0, signal_event(f"t{requested_signal}", None, "green", WAITING))])
+            # Re-enable auto-cycling
+            auto_cycle_enabled = True
+            return False
+        
+        # Enter critical section
+        if not enter_critical_section(request_id):
+            vehicle_log.publish([(0, signal_event(f"t{requested_signal}", None, "green", FAILED))])
+            # Re-enable auto-cycling
+            auto_cycle_enabled = True
+            return False
+        
+        # Execute signal change
+        result = execute_signal_change(requested_signal, request_id)
+        exit_critical_section(request_id)
+        
+        # Reset auto-cycle timer and re-enable after delay
+        last_signal_change = time.time()
+        # Re-enable auto-cycling after 10 seconds to allow manual control
+        manual_hold_until = last_signal_change + MANUAL_HOLD_SECONDS
+        threading.Timer(MANUAL_HOLD_SECONDS, end_manual_hold).start()
+        
+        return result
+    except Exception as e:
+        print(f"❌ {NODE}: Error in signal_manipulator: {e}")
+        server_stats['failed_requests'] += 1
+        # Re-enable auto-cycling on error
+        auto_cycle_enabled = True
+        return False
+
+def vip_signal_manipulator(requested_signal):
+    """Handle VIP signal changes - stops auto-cycle and makes only VIP signal green"""
+    global current_active_signal
+    global vip_mode_active, vip_active_signal, vip_start_time
+    
+    try:
+        if manual_override:
+            print(f"🚫 {NODE} - VIP signal {requested_signal} refused - RTO manual override in effect")
+            vehicle_log.publish([(0, signal_event(f"t{requested_signal}", None, "green", OVERRIDE))])
+            return False
+        
+        print(f"🚨 VIP EMERGENCY: Activating signal {requested_signal}")
+        
+        # Activate VIP mode - this stops auto-cycling
+        vip_mode_active = True
+        vip_active_signal = requested_signal
+        vip_start_time = time.time()
+        
+        # Immediately set signal states: VIP green, others red
+        changes = []  # (signal key, old state, new state)
+        with lock:
+            for i in range(1, 5):
+                if i == requested_signal:
+                    new_states = {f"t{i}": "green", f"p{i}": "red"}
+                    print(f"✅ VIP: Signal {i} set to GREEN")
+                else:
+                    new_states = {f"t{i}": "red", f"p{i}": "green"}
+                    print(f"🔴 VIP: Signal {i} set to RED")
+                for key, new_state in new_states.items():
+                    if signal_status[key] != new_state:
+                        changes.append((key, signal_status[key], new_state))
+                    signal_status[key] = new_state
+            
+            # Update current active signal, then journal - a snapshot taken here sees the new status
+            current_active_signal = requested_signal
+            journal_event("vip_activated", {'signal': requested_signal, 'start_time': vip_start_time})
+        publish_shared_state()
+        
+        # Publish the override as VIP events - one timestamp for the whole change
+        timestamp = encode(hlc.now())
+        events = [signal_event(key, old, new, VIP, timestamp) for key, old, new in changes]
+        vehicle_log.publish([(0, event) for event in events if event.signal.startswith("t")])
+        pedestrian_log.publish([(0, event) for event in events if event.signal.startswith("p")])
+        
+        print(f"🚨 VIP Mode Active: Signal {requested_signal} priority for {vip_duration} seconds")
+        return True
+        
+    except Exception as e:
+        print(f"❌ {NODE}: Error in vip_signal_manipulator: {e}")
+        vip_mode_active = False
+        vip_active_signal = None
+        vip_start_time = None
+        vehicle_log.publish([(0, signal_event(f"t{requested_signal}", None, "green", FAILED))])
+        server_stats['failed_requests'] += 1
+        return False
+        return False
+
+def manual_status_conflict(status):
+    """Why an operator-set signal status array is unsafe, or None if it can be applied"""
+    for key in ("t1", "t2", "t3", "t4", "p1", "p2", "p3", "p4"):
+        if status.get(key) not in SIGNAL_STATES[key[0]]:
+            return f"invalid state {status.get(key)!r} for {key}"
+    # Crossing movements: North-South (1, 3) and East-West (2, 4) may not both be moving
+    moving = [i for i in range(1, 5) if status[f"t{i}"] != "red"]
+    if any(i in (1, 3) for i in moving) and any(i in (2, 4) for i in moving):
+        return f"conflicting vehicle signals {moving} not red"
+    # A crossing may only walk while its own approach is stopped
+    for i in moving:
+        if status[f"p{i}"] == "green":
+            return f"pedestrian crossing {i} WALK while signal {i} is {status[f't{i}'].upper()}"
+    return None
+
+def publish_manual_changes(old_status, new_status):
+    """Push the signals an RTO override (or its release) changed to every subscriber as one batch"""
+    timestamp = encode(hlc.now())
+    events = [signal_event(key, old_status[key], state, MANUAL, timestamp)
+              for key, state in sorted(new_status.items()) if old_status[key] != state]
+    vehicle_log.publish([(0, event) for event in events if event.signal.startswith("t")])
+    pedestrian_log.publish([(0, event) for event in events if event.signal.startswith("p")])
+
+def set_manual_override(changes, operator=None):
+    """RTO manual override: validate and apply operator-set signal states atomically, suspending the auto-cycle.
+    
+    changes maps status keys (t1-t4, p1-p4) to states; unnamed signals keep their current state.
+    Returns {'accepted', 'signal_status'} plus 'error' when the resulting states conflict.
+    """
+    global manual_override, current_active_signal
+    
+    try:
+        with lock:
+            proposed = dict(manual_override['signal_status'] if manual_override else signal_status)
+            proposed.update(changes)
+            error = manual_status_conflict(proposed)
+            if error:
+                print(f"🚫 {NODE} - RTO OVERRIDE REJECTED: {error}")
+                return {'accepted': False, 'error': error, 'signal_status': dict(signal_status)}
+            
+            since = manual_override['since'] if manual_override else time.time()
+            manual_override = {'signal_status': proposed, 'operator': operator or "RTO", 'since': since}
+            journal_event("manual_override", manual_override)
+            old_status = dict(signal_status)
+            signal_status.update(proposed)
+            green = [i for i in range(1, 5) if proposed[f"t{i}"] == "green"]
+            if green:
+                current_active_signal = green[0]
+            publish_shared_state()
+            publish_manual_changes(old_status, proposed)
+            print(f"🛂 {NODE} - RTO OVERRIDE by {manual_override['operator']}: {proposed}")
+            return {'accepted': True, 'signal_status': dict(proposed)}
+    except Exception as e:
+        print(f"❌ {NODE}: Error in set_manual_override: {e}")
+        server_stats['failed_requests'] += 1
+        return {'accepted': False, 'error': str(e), 'signal_status': dict(signal_status)}
+
+def release_manual_override(operator=None):
+    """End the RTO manual override and resume the auto-cycle from the current phase"""
+    global manual_override
+    
+    try:
+        with lock:
+            if not manual_override:
+                return True
+            manual_override = None
+            journal_event("manual_release", {'operator': operator or "RTO"})
+            old_status = dict(signal_status)
+            auto_cycle_traffic_signals()
+            publish_manual_changes(old_status, dict(signal_status))
+            print(f"🔄 {NODE} - RTO override released by {operator or 'RTO'}, auto-cycle resumed")
+            return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error releasing manual override: {e}")
+        return False
+
+def signal_event(signal, from_state, to_state, reason, timestamp=None):
+    """Event record for the message logs, tagged with this intersection and node"""
+    return SignalEvent(INTERSECTION, signal, from_state, to_state, reason,
+                       timestamp or encode(hlc.now()), NODE)
+
+def execute_signal_change(requested_signal, request_id):
+    """Execute the actual signal change logic - SAME for VIP and regular with error handling"""
+    global current_active_signal
+    
+    try:
+        # Check if signal is already active
+        if requested_signal == current_active_signal:
+            timestamp = encode(hlc.now())
+            vehicle_log.publish([(0, signal_event(f"t{requested_signal}", "green", "green", NO_CHANGE, timestamp))])
+            pedestrian_log.publish([(0, signal_event(f"p{requested_signal}", "red", "red", NO_CHANGE, timestamp))])
+            return True
+        
+        print(f"🚦 {NODE} - EXECUTING SIGNAL CHANGE:")
+        print(f"   🔄 Changing from signal {current_active_signal} to {requested_signal}")
+        print(f"   📋 Mutual exclusion ensures atomic operation")
+        
+        old_signal = current_active_signal
+        current_active_signal = requested_signal
+        reason = VIP if request_id in vip_requests else CHANGE
+        
+        # Update the shared signal status array
+        if not update_signal_status(requested_signal, "green"):
+            print(f"⚠️ {NODE}: Warning - Signal status update failed")
+        journal_event("signal_change", {'signal': requested_signal})
+        
+        # Create signal change sequence - IDENTICAL for VIP and regular (reason tells them apart)
+        timestamp = encode(hlc.now())
+        vehicle_log.publish([
+            (3, signal_event(f"t{old_signal}", "green", "yellow", reason, timestamp)),
+            (2, signal_event(f"t{old_signal}", "yellow", "red", reason, timestamp)),
+            (2, signal_event(f"t{requested_signal}", "red", "green", reason, timestamp))
+        ])
+        
+        # Pedestrian signals (opposite to vehicle signals) - IDENTICAL for VIP and regular
+        pedestrian_log.publish([
+            (1, signal_event(f"p{old_signal}", "red", "green", reason, timestamp)),
+            (1, signal_event(f"p{requested_signal}", "green", "red", reason, timestamp))
+        ])
+        
+        return True
+    except Exception as e:
+        print(f"❌ {NODE}: Error executing signal change: {e}")
+        return False
+
+def get_next_message(subscriber_id=DEFAULT_SUBSCRIBER):
+    """Return the subscriber's next vehicle event in sequence (after its delay) as a SignalEvent tuple, or None."""
+    try:
+        entry = vehicle_log.next(subscriber_id)
+        if entry is None:
+            return None
+        
+        delay, event = entry
+        if delay > 0:
+            time.sleep(delay)  
+        
+        return to_wire(event)
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting next message: {e}")
+        return None
+
+def get_next_pedestrian_message(subscriber_id=DEFAULT_SUBSCRIBER):
+    """Return the subscriber's next pedestrian event in sequence (after its delay) as a SignalEvent tuple, or None."""
+    try:
+        entry = pedestrian_log.next(subscriber_id)
+        if entry is None:
+            return None
+        
+        delay, event = entry
+        if delay > 0:
+            time.sleep(delay)   
+
+        return to_wire(event)
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting next pedestrian message: {e}")
+        return None
+
+def get_pedestrian_events(subscriber_id=DEFAULT_SUBSCRIBER, max_events=PEDESTRIAN_BATCH_MAX):
+    """Return the subscriber's unread pedestrian events as a batch of SignalEvent tuples (no delays)"""
+    try:
+        batch = pedestrian_log.next_batch(subscriber_id, min(max_events, PEDESTRIAN_BATCH_MAX))
+        return [to_wire(event) for seq, (delay, event) in batch]
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting pedestrian events: {e}")
+        return []
+
+def submit_detections(batch):
+    """Ingest a batch of detector events (packed records or [approach, timestamp, vehicles] lists); returns the count"""
+    try:
+        if isinstance(batch, xmlrpc.client.Binary):
+            data = batch.data
+        elif isinstance(batch, (bytes, bytearray)):
+            data = batch
+        else:
+            data = pack_events(batch)
+        accepted = detections.ingest(data)
+        advance_adaptive_plan(time.time())  # Detector-only sites have no status readers to pass the boundary
+        return accepted
+    except Exception as e:
+        print(f"❌ {NODE}: Error ingesting detections: {e}")
+        return 0
+
+def get_active_signal():
+    """Return currently active signal with error handling"""
+    try:
+        global current_active_signal
+        return current_active_signal
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting active signal: {e}")
+        return 1  # Default to signal 1
+
+def get_system_stats():
+    """Return comprehensive system statistics for monitoring with error handling"""
+    global request_history, active_requests, current_active_signal, vip_requests, server_stats
+    
+    try:
+        with lock:
+            total_requests = request_totals['requests']
+            vip_total = request_totals['vip']
+            pending_count = sum(len(requests) for requests in active_requests.values())
+            vip_pending = len(vip_requests)
+            uptime = time.time() - server_stats['start_time']
+            
+            stats = {
+                'server_type': NODE,
+                'current_active_signal': current_active_signal,
+                'total_requests_processed': total_requests,
+                'vip_requests_processed': vip_total,
+                'pending_requests': pending_count,
+                'vip_pending_requests': vip_pending,
+                'in_critical_section': in_critical_section,
+                'active_requests_by_signal': dict(active_requests),
+                'signal_status': dict(signal_status),
+                'successful_requests': server_stats['successful_requests'],
+                'failed_requests': server_stats['failed_requests'],
+                'timeout_requests': server_stats['timeout_requests'],
+                'uptime_seconds': uptime,
+                'requests_per_minute': (total_requests / (uptime / 60)) if uptime > 0 else 0,
+                'vehicle_subscribers': vehicle_log.get_stats()['log_subscribers'],
+                'pedestrian_subscribers': pedestrian_log.get_stats()['log_subscribers'],
+                'manual_override': manual_override['operator'] if manual_override else None
+            }
+            stats.update(journal.get_stats())
+            stats.update(clock_sync.get_stats())
+            stats.update(hlc.get_stats())
+            stats['timing_plan_version'] = base_plan['version']
+            stats.update(detections.get_stats())
+            if adaptive:
+                stats.update(adaptive.get_stats())
+            stats['synchronized_time'] = get_synchronized_time()
+            
+            return stats
+    except Exception as e:
+        print(f"❌ {NODE}: Error getting system stats: {e}")
+        return {
+            'server_type': NODE,
+            'current_active_signal': 1,
+            'total_requests_processed': 0,
+            'error': str(e)
+        }
+
+def main(default_role="primary"):
+    """Parse the command line, configure this node and serve until interrupted"""
+    global shared_state, adaptive
+    parser = argparse.ArgumentParser(description="Traffic signal server (PRIMARY, CLONE or further replicas)")
+    parser.add_argument("--role", choices=sorted(ROLES), default=default_role, help="replica role")
+    parser.add_argument("--port", type=int, help="XML-RPC port (default: 8000 PRIMARY, 8001 CLONE)")
+    parser.add_argument("--node-id", help="node ID: journal name and log prefix (default: the role)")
+    parser.add_argument("--intersection", help=f"intersection name tagged on events (default: {INTERSECTION})")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="worker processes sharing the port (0 = single-process mode)")
+    parser.add_argument("--owner-port", type=int,
+                        help="loopback port of the state owner with --workers (default: port + 1000)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="recompute green splits every cycle from measured demand (Webster's method)")
+    parser.add_argument("--peer", action="append", default=[], metavar="URL",
+                        help="replica to push adaptive timing plans to (repeat for each)")
+    parser.add_argument("--detector-port", type=int,
+                        help="TCP port for streamed detector records (single-process mode)")
+    add_bootstrap_arguments(parser)
+    args = parser.parse_args()
+    if args.port is None:
+        args.port = ROLES[args.role]['port']
+    configure_node(args.role, args.node_id, args.intersection)
+    if args.adaptive:
+        adaptive = AdaptiveTimingEngine(base_plan, demand)
+        timing_peers[:] = args.peer
+    try:
+        config = load_config(args.role, args)
+    except (OSError, ValueError) as e:
+        parser.error(f"invalid startup configuration: {e}")
+
+    print("=" * 80)
+    print(f"{ROLES[ROLE]['banner']} ENHANCED {NODE} SERVER - FOUR-WAY INTERSECTION VIP PRIORITY SYSTEM")
+    print(f"📡 RUNNING ON PORT {args.port} ({NODE} FOR LOAD BALANCING)")
+    print("⚖️ WORKS WITH ENHANCED LOAD BALANCER ON PORT 9000")
+    print("⚡ VIP VEHICLES GET HIGHER PRIORITY IN PROCESSING QUEUE!")
+    print("🚨 VIP Deadlock Handling: Timestamp-based & Signal-state Resolution")
+    print("🎯 TWO SEPARATE INPUTS: Regular signals + VIP vehicles")
+    print("👑 VIPs processed first, then regular requests")
+    print("📊 SHARED SIGNAL STATUS ARRAY: Real-time status updates")
+    print("🛡️ ENHANCED ERROR HANDLING: Timeout, connection, XML-RPC faults")
+    print("🔧 THREAD SAFETY: RLock protection for concurrent requests")
+    print("📈 PERFORMANCE MONITORING: Request success/failure tracking")
+    print("=" * 80)
+
+    try:
+        # Replay journal first - a restart with known time skips the prompt
+        restore_state()
+        
+        # Shared-memory mode: co-located servers and the balancer share one signal state
+        shared_state = attach_from_env() if not args.workers else None
+        if shared_state:
+            print(f"🧠 {NODE} - Shared-memory state segment '{shared_state.name}' attached")
+            threading.Thread(target=shared_state_ticker, name="SharedStateTicker", daemon=True).start()
+        
+        # Config/env/CLI startup clock (host clock + offset) - prompt only if none is configured
+        startup_time = startup_clock(config) if server_time is None else None
+        if startup_time:
+            set_server_time(startup_time)
+        while server_time is None:
+            server_time_input = input(f"🕐 Enter {NODE} Signal Manipulator time (HH:MM:SS): ")
+            if set_server_time(server_time_input):
+                break
+            else:
+                print("❌ Invalid time format. Please use HH:MM:SS")
+        
+        print(f"📊 {NODE} - Enhanced server starting with robust error handling...")
+        print(f"📊 {NODE} - Berkeley synchronization runs every {clock_sync.interval:.0f}s once clients report clock samples.")
+        print(f"📋 {NODE} - Using Enhanced Ricart-Agrawala algorithm with VIP PRIORITY")
+        print(f"🚦 {NODE} - Four-way intersection: Signals 1, 2, 3, 4")
+        print(f"🟢 {NODE} - Currently active signal: {current_active_signal} (Only ONE can be GREEN)")
+        print(f"👑 {NODE} - VIP vehicles get priority processing!")
+        print(f"🎲 {NODE} - VIP generation: Manual control via manual_t8.py")
+        print(f"📊 {NODE} - Initial signal status: {signal_status}")
+        print(f"⚖️ {NODE} - Ready for load balancing with {ROLES[ROLE]['peer']}!")
+        print(f"🛡️ {NODE} - Enhanced with timeout handling and error recovery!")
+        print("=" * 80)
+        
+        if args.workers:
+            # Multi-process mode: one state owner plus N workers sharing the listening socket
+            run_prefork_server(sys.modules[__name__], "127.0.0.1", args.port, args.workers, NODE, args.owner_port)
+            sys.exit(0)
+        
+        # Create enhanced server with timeout handling
+        server = SimpleXMLRPCServer(
+            ("127.0.0.1", args.port), 
+            allow_none=True,
+            requestHandler=EnhancedXMLRPCRequestHandler
+        )
+        
+        # Set server socket timeout
+        server.socket.settimeout(60)
+        server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        
+        # Continuous Berkeley re-synchronization in the background
+        clock_sync.start()
+        
+        if args.detector_port:
+            DetectorStreamServer(("127.0.0.1", args.detector_port), detections).start()
+            print(f"📡 {NODE} - Detector streams accepted on port {args.detector_port}")
+        
+        # Register functions with error handling wrappers
+        server.register_function(signal_manipulator, "signal_manipulator")
+        server.register_function(vip_signal_manipulator, "vip_signal_manipulator")
+        server.register_function(submit_vip_requests, "submit_vip_requests")
+        server.register_function(get_next_message, "get_next_message")
+        server.register_function(get_next_pedestrian_message, "get_next_pedestrian_message")
+        server.register_function(get_pedestrian_events, "get_pedestrian_events")
+        server.register_function(register_client_time, "register_client_time")
+        server.register_function(berkeley_synchronization, "berkeley_synchronization")
+        server.register_function(get_synchronized_time, "get_synchronized_time")
+        server.register_function(get_clock_time, "get_clock_time")
+        server.register_function(report_clock_sample, "report_clock_sample")
+        server.register_function(get_active_signal, "get_active_signal")
+        server.register_function(get_system_stats, "get_system_stats")
+        server.register_function(get_signal_status, "get_signal_status")
+        server.register_function(get_countdown_info, "get_countdown_info")
+        server.register_function(get_timing_plan, "get_timing_plan")
+        server.register_function(set_manual_override, "set_manual_override")
+        server.register_function(release_manual_override, "release_manual_override")
+        server.register_function(install_timing_plan, "install_timing_plan")
+        server.register_function(submit_detections, "submit_detections")
+        
+        print(f"👑 {NODE} Enhanced VIP-Priority Four-Way Signal Server running on port {args.port}...")
+        print(f"🚨 {NODE} - Ready to handle VIP priority requests and deadlock resolution!")
+        print(f"📊 {NODE} - Signal status array synchronized across all clients!")
+        print(f"⚖️ {NODE} - Load balancing ready with {ROLES[ROLE]['peer']}!")
+        print(f"🛡️ {NODE} - Enhanced error handling and timeout management active!")
+        print(f"🚀 {NODE} - Ready for high-load testing scenarios!")
+        
+        server.serve_forever()
+        
+    except KeyboardInterrupt:
+        print(f"\n🛑 {NODE} Enhanced Server stopped manually.")
+        print(f"\n📈 {NODE} - FINAL SYSTEM STATISTICS:")
+        stats = get_system_stats()
+        print(f"   {NODE} - Total requests processed: {stats['total_requests_processed']}")
+        print(f"   {NODE} - Successful requests: {stats['successful_requests']}")
+        print(f"   {NODE} - Failed requests: {stats['failed_requests']}")
+        print(f"   {NODE} - VIP requests processed: {stats['vip_requests_processed']}")
+        print(f"   {NODE} - Final active signal: {stats['current_active_signal']}")
+        print(f"   {NODE} - Uptime: {stats['uptime_seconds']:.1f} seconds")
+        if stats['uptime_seconds'] > 0:
+            print(f"   {NODE} - Requests per minute: {stats['requests_per_minute']:.2f}")
+    except Exception as e:
+        print(f"❌ {NODE} Server error: {e}")
+        print("💡 Check network settings and port availability")
+    finally:
+        journal.close()
+        print(f"🔄 {NODE} Server shutdown complete.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,120 @@
+import asyncio
+import queue
 import sys
 import xmlrpc.client
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QPushButton, QTextEdit, 
-                            QGroupBox, QSplitter, QStatusBar, QGridLayout, QFrame)
+                            QGroupBox, QSplitter, QStatusBar, QGridLayout, QFrame, QTabWidget)
 from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QRect, QPoint
-from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QPolygon, QFont, QLinearGradient
+from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QPolygon, QFont, QLinearGradient, QPixmap
+import os
 import time
 import random
 import math
 from datetime import datetime
+from benchmark import print_report, run_benchmark
+from bootstrap import BALANCER_URL
+from city_map import CITY_GRID, CityMapWidget, grid_city, parse_grid
+from phase_plan import CountdownClock
+
+COUNTDOWN_REFRESH_MS = 100  # Countdown redraw interval - computed locally from the timing plan
+LIVE_INTERSECTION = "main"  # City map intersection driven by the server's timing plan
+COMMAND_SHUTDOWN_MS = 3000  # How long closing the window waits for an in-flight UI command
+RTO_OPERATOR = "UI"         # Operator name the server records for this window's RTO overrides
+RTO_DIRECTIONS = ("north", "east", "south", "west")  # Signals 1-4
+RTO_TRAFFIC_LABELS = {"green": "GREEN", "yellow": "CAUTION", "red": "STOP"}
+RTO_PEDESTRIAN_LABELS = {"green": "WALK", "red": "STOP"}
+PAINT_PROFILE = os.environ.get("TRAFFIC_UI_PROFILE", "")  # "1": print paint times, "alloc": also count allocations
+PAINT_REPORT_FRAMES = 100   # Frames per paint-time report
+LIGHT_SPACING = 220         # Traffic light distance from the intersection centre
+ANIMATION_FRAME_MS = 100    # Animation tick while anything moves; the timer stops when idle
+VIP_FLASH_TICKS = 5         # Animation ticks per VIP indicator flash phase
+DIRECTION_SIGNALS = {"north": 1, "east": 2, "south": 3, "west": 4}
+CAR_WIDTH = 20
+CAR_LENGTH = 40
+PED_SIZE = 10
+ZEBRA_WIDTH = 40
+LED_SIZE = 32               # Traffic lamp diameter
+PED_LED_SIZE = 28           # Pedestrian lamp diameter
+LED_GLOW = 8 * 3            # Glow rings extend this far beyond a lamp
+LED_COLORS = {"red": (255, 80, 80), "yellow": (255, 255, 80), "green": (80, 255, 80)}
+PROFILED_TYPES = ("QPen", "QBrush", "QColor", "QLinearGradient", "QFont", "QPixmap")
+# Per-state styles of status labels and RTO buttons, parsed once with the window
+# stylesheet; widgets switch between them through their "state" property
+STATE_STYLESHEET = """
+    QLabel#connectionStatus { font-weight: bold; padding: 12px; border-radius: 6px; }
+    QLabel#rtoStatus { font-weight: bold; padding: 10px; border-radius: 6px; }
+    QLabel#vipStatus { font-weight: bold; padding: 8px; border-radius: 4px; }
+    QLabel#connectionStatus[state="connected"], QLabel#rtoStatus[state="auto"] {
+        color: #00ff88;
+        background: rgba(0, 255, 136, 0.1);
+        border: 1px solid rgba(0, 255, 136, 0.3);
+    }
+    QLabel#connectionStatus[state="connecting"], QLabel#connectionStatus[state="offline"] {
+        color: #ffa500;
+        background: rgba(255, 165, 0, 0.1);
+        border: 1px solid rgba(255, 165, 0, 0.3);
+    }
+    QLabel#rtoStatus[state="manual"] {
+        color: #ff4444;
+        background: rgba(255, 68, 68, 0.1);
+        border: 1px solid rgba(255, 68, 68, 0.3);
+    }
+    QLabel#vipStatus[state="normal"] {
+        background: rgba(0, 255, 136, 0.1);
+        border: 1px solid rgba(0, 255, 136, 0.3);
+    }
+    QLabel#vipStatus[state="emergency"] {
+        color: #ff4444;
+        background: rgba(255, 68, 68, 0.2);
+        border: 2px solid rgba(255, 68, 68, 0.5);
+    }
+    QPushButton#rtoSignal { font-weight: bold; min-height: 30px; border-radius: 8px; padding: 6px; }
+    QPushButton#rtoSignal[state="green"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(68, 255, 68, 0.8), stop:1 rgba(68, 255, 68, 0.4));
+        border: 2px solid #44ff44;
+        color: black;
+    }
+    QPushButton#rtoSignal[state="green"]:hover { background: rgba(68, 255, 68, 0.9); }
+    QPushButton#rtoSignal[state="yellow"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(255, 255, 68, 0.8), stop:1 rgba(255, 255, 68, 0.4));
+        border: 2px solid #ffff44;
+        color: black;
+    }
+    QPushButton#rtoSignal[state="yellow"]:hover { background: rgba(255, 255, 68, 0.9); }
+    QPushButton#rtoSignal[state="red"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(255, 68, 68, 0.8), stop:1 rgba(255, 68, 68, 0.4));
+        border: 2px solid #ff4444;
+        color: white;
+    }
+    QPushButton#rtoSignal[state="red"]:hover { background: rgba(255, 68, 68, 0.9); }
+"""
+paint_allocations = 0       # Painter resources constructed - counted only after install_allocation_counter()
+
+def install_allocation_counter():
+    """Profiling hook: count constructions of painter resource types made through this module"""
+    module = globals()
+    for name in PROFILED_TYPES:
+        base = module[name]
+        if getattr(base, "counted", False):
+            continue
+        def __init__(self, *args, _base=base, **kwargs):
+            global paint_allocations
+            paint_allocations += 1
+            _base.__init__(self, *args, **kwargs)
+        module[name] = type(name, (base,), {'__init__': __init__, 'counted': True})
+
+def set_widget_state(widget, state, text=None):
+    """Switch a widget to one of its STATE_STYLESHEET states and text; no-op for what is unchanged"""
+    if text is not None and widget.text() != text:
+        widget.setText(text)
+    if widget.property("state") != state:
+        widget.setProperty("state", state)
+        widget.style().unpolish(widget)  # Re-match the already parsed rules - no stylesheet parse
+        widget.style().polish(widget)
 
 class TrafficLight:
     """Traffic light class with position and state"""
@@ -31,6 +137,57 @@ class TrafficLight:
         self.pedestrian_red = not green
         self.pedestrian_green = green
 
+class RenderResources:
+    """Pens, brushes, fonts and pre-rendered lamp / VIP halo sprites shared by every frame"""
+    
+    def __init__(self):
+        self.no_pen = QPen(Qt.NoPen)
+        self.car_pen = QPen(QColor(40, 40, 40), 2)
+        car_gradient = QLinearGradient(0, 0, 0, CAR_LENGTH)
+        car_gradient.setColorAt(0, QColor(100, 100, 120))
+        car_gradient.setColorAt(0.5, QColor(60, 60, 80))
+        car_gradient.setColorAt(1, QColor(40, 40, 60))
+        self.car_brush = QBrush(car_gradient)
+        self.pedestrian_pen = QPen(QColor(0, 0, 0), 1)
+        self.pedestrian_brush = QBrush(QColor(200, 200, 255))
+        self.housing_pen = QPen(QColor(100, 100, 120, 150), 2)
+        self.ped_housing_pen = QPen(QColor(80, 80, 100, 150), 2)
+        self.vip_text_pen = QPen(QColor(255, 255, 255), 3)
+        self.vip_font = QFont("Arial", 16, QFont.Bold)
+        self.led_colors = {name: QColor(*rgb) for name, rgb in LED_COLORS.items()}
+        self.sprites = {}  # {(lamp colour, size, on, VIP): QPixmap} plus the VIP halo
+    
+    def sprite(self, key, width, height, draw):
+        """Cached transparent pixmap; draw(painter) renders it once on first use"""
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = QPixmap(width, height)
+            sprite.fill(Qt.transparent)
+            painter = QPainter(sprite)
+            painter.setRenderHint(QPainter.Antialiasing)
+            draw(painter)
+            painter.end()
+            self.sprites[key] = sprite
+        return sprite
+    
+    def led(self, light_type, size, is_on, is_vip, render):
+        """Lamp sprite centred at (extent // 2, extent // 2); render draws one lamp at a given centre"""
+        extent = size + 2 * LED_GLOW + 4
+        centre = extent // 2
+        return self.sprite((light_type, size, is_on, is_vip), extent, extent,
+                           lambda painter: render(painter, centre, centre, size, is_on,
+                                                  self.led_colors[light_type], light_type, is_vip))
+    
+    def vip_halo(self):
+        """Neon VIP glow around a light housing; sprite origin is (light.x - 72, light.y - 152)"""
+        def draw(painter):
+            for i in range(10, 0, -1):
+                alpha = int(30 * (i / 10))
+                painter.setBrush(QBrush(QColor(255, 0, 100, alpha)))
+                painter.setPen(QPen(QColor(255, 0, 100, alpha), 2))
+                painter.drawRoundedRect(72 - 60 - i, 152 - 140 - i, 120 + 2*i, 150 + 2*i, 15, 15)
+        return self.sprite("vip_halo", 144, 174, draw)
+
 class TrafficSimulationWidget(QWidget):
     """Main widget for the traffic simulation display with modern styling, roads, cars, and pedestrians"""
     
@@ -93,10 +250,23 @@ class TrafficSimulationWidget(QWidget):
         # Initialize traffic lights
         self.setup_traffic_lights()
         
-        # Animation timer for repainting
+        # Static scene (background, roads, crossings, poles) rendered once per size
+        self.static_layer = None
+        self.paint_frames = 0
+        self.paint_seconds = 0.0
+        self.paint_max = 0.0
+        self.paint_pixels = 0
+        self.paint_allocations = 0
+        if PAINT_PROFILE == "alloc":
+            install_allocation_counter()
+        
+        # Animation timer for repainting - runs only while something moves or flashes
         self.animation_timer = QTimer()
         self.animation_timer.timeout.connect(self.update_animations)
-        self.animation_timer.start(100)
+        self.applied_status = {}  # Last server state applied per signal - unchanged lights are skipped
+        self.light_rects = {}     # Screen area each light (housing, glow, VIP halo, WALK signal) covers
+        self.light_geometry = {}  # Per-light rectangles and position-bound gradients, rebuilt on resize
+        self.resources = RenderResources()
     
     def setup_traffic_lights(self):
         """Setup traffic lights in grid layout - centered and bigger"""
@@ -115,6 +285,17 @@ class TrafficSimulationWidget(QWidget):
         self.traffic_lights["north"].set_state(green=True)
         self.traffic_lights["south"].set_state(green=True)
     
+    def wake_animations(self):
+        """Restart the animation timer after it went idle"""
+        if not self.animation_timer.isActive():
+            self.animation_timer.start(ANIMATION_FRAME_MS)
+    
+    def invalidate_direction(self, direction):
+        """Schedule a repaint of one approach: its light, car and pedestrians"""
+        self.update(self.light_rects.get(direction, self.rect()))
+        self.update(self.car_rect(direction, 2))
+        self.update(self.pedestrian_rect(direction))
+    
     def update_traffic_lights(self, signal_status):
         """Update traffic light states from server with proper 4-way intersection logic"""
         if self.rto_mode:
@@ -125,6 +306,10 @@ class TrafficSimulationWidget(QWidget):
         for signal_id, direction in signal_map.items():
             if signal_id in signal_status and direction in self.traffic_lights:
                 state = signal_status[signal_id].lower()
+                if self.applied_status.get(signal_id) == state:
+                    continue  # Light unchanged - nothing to redraw
+                self.applied_status[signal_id] = state
+                self.invalidate_direction(direction)  # Old car / pedestrian positions
                 
                 if state == "green":
                     self.traffic_lights[direction].set_state(green=True)
@@ -145,6 +330,8 @@ class TrafficSimulationWidget(QWidget):
                     self.cars[direction]["active"] = False
                     self.pedestrians[direction]["active"] = True
                     self.pedestrians[direction]["count"] = random.randint(1, 3)
+                self.invalidate_direction(direction)
+                self.wake_animations()
     
     def update_countdown_info(self, countdown_info):
         """Update countdown information"""
@@ -155,16 +342,20 @@ class TrafficSimulationWidget(QWidget):
         self.vip_active = True
         self.vip_signal_id = signal_id
         self.vip_flash_timer = 0
+        self.update()  # Every pedestrian signal changes colour in VIP mode
+        self.wake_animations()
     
     def clear_vip_active(self):
         """Clear VIP active state"""
         self.vip_active = False
         self.vip_signal_id = None
         self.vip_flash_timer = 0
+        self.update()
     
     def set_rto_mode(self, enabled):
         """Enable or disable RTO manual control mode"""
         self.rto_mode = enabled
+        self.applied_status = {}  # Server state is re-applied in full after manual control
         if enabled:
             print("RTO Mode: Manual control activated")
         else:
@@ -201,32 +392,143 @@ class TrafficSimulationWidget(QWidget):
                         light.pedestrian_green = False
                         light.pedestrian_red = True
                         self.pedestrians[direction]["active"] = False
+                self.invalidate_direction(direction)
+                self.wake_animations()
     
     def update_animations(self):
-        """Update car and pedestrian positions for animation"""
-        for direction in self.cars:
-            if self.cars[direction]["active"]:
-                self.cars[direction]["position"] += self.cars[direction]["speed"]
+        """Advance moving sprites and invalidate only what moved; go idle when nothing does"""
+        moving = False
+        for direction, car in self.cars.items():
+            if car["active"]:
+                self.update(self.car_rect(direction, 2))
+                car["position"] += car["speed"]
                 # Reset car position when it moves off-screen
-                if direction in ["north", "west"] and self.cars[direction]["position"] > 200:
-                    self.cars[direction]["position"] = -200
-                elif direction in ["south", "east"] and self.cars[direction]["position"] < -200:
-                    self.cars[direction]["position"] = 200
-        
-        for direction in self.pedestrians:
-            if self.pedestrians[direction]["active"]:
-                self.pedestrians[direction]["position"] += self.pedestrians[direction]["speed"]
-                # Reset pedestrian position when crossing is complete
-                if abs(self.pedestrians[direction]["position"]) > self.road_width:
-                    self.pedestrians[direction]["position"] = 0
-                    self.pedestrians[direction]["active"] = False
-                    self.pedestrians[direction]["count"] = 0
+                if direction in ["north", "west"] and car["position"] > 200:
+                    car["position"] = -200
+                elif direction in ["south", "east"] and car["position"] < -200:
+                    car["position"] = 200
+                self.update(self.car_rect(direction, 2))
+                moving = True
         
-        self.update()
+        for direction, ped in self.pedestrians.items():
+            if ped["active"]:
+                self.update(self.pedestrian_rect(direction))
+                ped["position"] += ped["speed"]
+                # Reset pedestrian position when crossing is complete
+                if abs(ped["position"]) > self.road_width:
+                    ped["position"] = 0
+                    ped["active"] = False
+                    ped["count"] = 0
+                else:
+                    self.update(self.pedestrian_rect(direction))
+                    moving = True
+        
+        # VIP indicator flashes on the animation tick
+        if self.vip_active:
+            self.vip_flash_timer += 1
+            vip_direction = next((d for d, n in DIRECTION_SIGNALS.items() if n == self.vip_signal_id), None)
+            if self.vip_flash_timer % VIP_FLASH_TICKS == 0 and vip_direction in self.light_rects:
+                self.update(self.light_rects[vip_direction])
+            moving = True
+        
+        if not moving:
+            self.animation_timer.stop()
     
-    def paintEvent(self, event):
-        """Paint the traffic signals, roads, cars, and pedestrians with modern styling"""
-        painter = QPainter(self)
+    def resizeEvent(self, event):
+        """Re-layout the lights and drop the static layer - it is re-rendered at the new size"""
+        self.layout_traffic_lights()
+        self.static_layer = None
+        super().resizeEvent(event)
+    
+    def layout_traffic_lights(self):
+        """Place the traffic lights around the widget centre and compute their screen areas"""
+        center_x = self.width() // 2
+        center_y = self.height() // 2
+        offsets = {"north": (0, -LIGHT_SPACING), "south": (0, LIGHT_SPACING),
+                   "east": (LIGHT_SPACING, 0), "west": (-LIGHT_SPACING, 0)}
+        for direction, (dx, dy) in offsets.items():
+            light = self.traffic_lights[direction]
+            light.x = center_x + dx
+            light.y = center_y + dy
+            ped_x, ped_y = self.pedestrian_signal_position(direction, light)
+            # VIP halo and caption above the housing, LED glow (radius 16 + 24) around each lamp
+            housing = QRect(light.x - 75, light.y - 180, 190, 210)
+            walk = QRect(ped_x - 40, ped_y - 55, 80, 80)
+            self.light_rects[direction] = housing.united(walk)
+            self.light_geometry[direction] = self.light_layout(light, ped_x, ped_y)
+    
+    def light_layout(self, light, ped_x, ped_y):
+        """Rectangles, lamp centres and gradient brushes for one light at its current position"""
+        def gradient_brush(x1, y1, x2, y2, stops):
+            gradient = QLinearGradient(x1, y1, x2, y2)
+            for position, rgba in stops:
+                gradient.setColorAt(position, QColor(*rgba))
+            return QBrush(gradient)
+        
+        housing = (light.x - 50, light.y - 130, light.x + 50, light.y + 10)
+        ped_housing = (ped_x - 25, ped_y - 45, ped_x + 25, ped_y + 15)
+        return {
+            'housing': QRect(light.x - 50, light.y - 130, 100, 140),
+            'reflection': QRect(light.x - 45, light.y - 125, 35, 60),
+            'ped_housing': QRect(ped_x - 25, ped_y - 45, 50, 60),
+            # Lamp centres: red, yellow, green, then the pedestrian lamp
+            'lamps': ((light.x, light.y - 110), (light.x, light.y - 65), (light.x, light.y - 20)),
+            'ped_lamp': (ped_x, ped_y - 15),
+            'vip_caption': QPoint(light.x - 35, light.y - 150),
+            'halo_origin': QPoint(light.x - 72, light.y - 152),
+            # Housing gradients by VIP state (False: normal, True: VIP / VIP-stopped pedestrians)
+            'housing_brush': {
+                False: gradient_brush(*housing, ((0, (60, 60, 80, 180)), (1, (30, 30, 40, 220)))),
+                True: gradient_brush(*housing, ((0, (80, 40, 60, 180)), (1, (40, 20, 30, 220))))
+            },
+            'reflection_brush': gradient_brush(light.x - 45, light.y - 125, light.x - 10, light.y - 90,
+                                               ((0, (255, 255, 255, 40)), (1, (255, 255, 255, 5)))),
+            'ped_housing_brush': {
+                False: gradient_brush(*ped_housing, ((0, (50, 50, 70, 180)), (1, (25, 25, 35, 220)))),
+                True: gradient_brush(*ped_housing, ((0, (80, 30, 30, 180)), (1, (40, 15, 15, 220))))
+            }
+        }
+    
+    def car_rect(self, direction, margin=0):
+        """Screen rectangle of a direction's car, grown by margin (2 covers the outline pen)"""
+        center_x = self.width() // 2
+        center_y = self.height() // 2
+        position = self.cars[direction]["position"]
+        if direction == "north":
+            rect = QRect(center_x - self.lane_width // 2 - CAR_WIDTH // 2,
+                         center_y - self.road_width // 2 + position, CAR_WIDTH, CAR_LENGTH)
+        elif direction == "south":
+            rect = QRect(center_x + self.lane_width // 2 - CAR_WIDTH // 2,
+                         center_y + self.road_width // 2 + position, CAR_WIDTH, CAR_LENGTH)
+        elif direction == "east":
+            rect = QRect(center_x + self.road_width // 2 + position,
+                         center_y - self.lane_width // 2 - CAR_WIDTH // 2, CAR_LENGTH, CAR_WIDTH)
+        else:
+            rect = QRect(center_x - self.road_width // 2 + position,
+                         center_y + self.lane_width // 2 - CAR_WIDTH // 2, CAR_LENGTH, CAR_WIDTH)
+        return rect.adjusted(-margin, -margin, margin, margin)
+    
+    def pedestrian_rect(self, direction):
+        """Screen rectangle covering a direction's pedestrian group (up to 3 walkers)"""
+        center_x = self.width() // 2
+        center_y = self.height() // 2
+        position = self.pedestrians[direction]["position"]
+        group = 2 * 20 + PED_SIZE  # Walkers are spaced 20 px apart
+        if direction in ["north", "south"]:
+            sign = -1 if direction == "north" else 1
+            rect = QRect(center_x - self.road_width // 2,
+                         center_y + sign * (self.road_width // 2 + ZEBRA_WIDTH // 2) + position, group, PED_SIZE)
+        else:
+            sign = 1 if direction == "east" else -1
+            rect = QRect(center_x + sign * (self.road_width // 2 + ZEBRA_WIDTH // 2) + position,
+                         center_y - self.road_width // 2, PED_SIZE, group)
+        return rect.adjusted(-2, -2, 2, 2)
+    
+    
+    def render_static_layer(self):
+        """Render background, roads, zebra crossings and light poles into a pixmap"""
+        layer = QPixmap(self.size())
+        painter = QPainter(layer)
         painter.setRenderHint(QPainter.Antialiasing)
         
         # Create gradient background
@@ -239,6 +541,23 @@ class TrafficSimulationWidget(QWidget):
         # Draw roads and zebra crossings
         self.draw_roads_and_crossings(painter)
         
+        # Draw traffic light poles with metallic gradient and their labels
+        self.draw_light_poles(painter)
+        painter.end()
+        return layer
+    
+    def paintEvent(self, event):
+        """Paint the traffic signals, roads, cars, and pedestrians with modern styling"""
+        started, allocations = time.perf_counter(), paint_allocations
+        if self.static_layer is None or self.static_layer.size() != self.size():
+            self.static_layer = self.render_static_layer()
+        
+        # Only the invalidated region is repainted - restore it from the static layer
+        dirty = event.rect()
+        painter = QPainter(self)
+        painter.drawPixmap(dirty, self.static_layer, dirty)
+        painter.setRenderHint(QPainter.Antialiasing)
+        
         # Draw cars
         self.draw_cars(painter)
         
@@ -246,7 +565,24 @@ class TrafficSimulationWidget(QWidget):
         self.draw_pedestrians(painter)
         
         # Draw modern traffic lights
-        self.draw_traffic_lights(painter)
+        self.draw_traffic_lights(painter, event.region())
+        painter.end()
+        self.record_paint_time(time.perf_counter() - started, dirty, paint_allocations - allocations)
+    
+    def record_paint_time(self, elapsed, dirty, allocations):
+        """Accumulate paint time, area and allocations; with TRAFFIC_UI_PROFILE set, print them every PAINT_REPORT_FRAMES frames"""
+        self.paint_frames += 1
+        self.paint_seconds += elapsed
+        self.paint_max = max(self.paint_max, elapsed)
+        self.paint_pixels += dirty.width() * dirty.height()
+        self.paint_allocations += allocations
+        if PAINT_PROFILE and self.paint_frames % PAINT_REPORT_FRAMES == 0:
+            coverage = self.paint_pixels / (self.paint_frames * max(1, self.width() * self.height()))
+            print(f"🎨 Paint: {self.paint_seconds / self.paint_frames * 1000:.2f} ms/frame avg, "
+                  f"{self.paint_max * 1000:.2f} ms max, {coverage:.0%} of the widget per frame "
+                  f"over {self.paint_frames} frames")
+            if PAINT_PROFILE == "alloc":
+                print(f"🧮 Allocations: {self.paint_allocations / self.paint_frames:.1f} painter resources/frame")
     
     def draw_roads_and_crossings(self, painter):
         """Draw roads and zebra crossings"""
@@ -295,40 +631,13 @@ class TrafficSimulationWidget(QWidget):
     
     def draw_cars(self, painter):
         """Draw animated cars on the roads"""
-        center_x = self.width() // 2
-        center_y = self.height() // 2
-        
-        painter.setPen(QPen(QColor(40, 40, 40), 2))
-        car_width = 20
-        car_height = 40
+        # Car color with modern metallic look
+        painter.setPen(self.resources.car_pen)
+        painter.setBrush(self.resources.car_brush)
         
         for direction, car in self.cars.items():
-            if not car["active"]:
-                continue
-            
-            # Car color with modern metallic look
-            car_gradient = QLinearGradient(0, 0, 0, car_height)
-            car_gradient.setColorAt(0, QColor(100, 100, 120))
-            car_gradient.setColorAt(0.5, QColor(60, 60, 80))
-            car_gradient.setColorAt(1, QColor(40, 40, 60))
-            painter.setBrush(QBrush(car_gradient))
-            
-            if direction == "north":
-                x = center_x - self.lane_width // 2 - car_width // 2
-                y = center_y - self.road_width // 2 + car["position"]
-                painter.drawRoundedRect(x, y, car_width, car_height, 5, 5)
-            elif direction == "south":
-                x = center_x + self.lane_width // 2 - car_width // 2
-                y = center_y + self.road_width // 2 + car["position"]
-                painter.drawRoundedRect(x, y, car_width, car_height, 5, 5)
-            elif direction == "east":
-                x = center_x + self.road_width // 2 + car["position"]
-                y = center_y - self.lane_width // 2 - car_width // 2
-                painter.drawRoundedRect(x, y, car_height, car_width, 5, 5)
-            elif direction == "west":
-                x = center_x - self.road_width // 2 + car["position"]
-                y = center_y + self.lane_width // 2 - car_width // 2
-                painter.drawRoundedRect(x, y, car_height, car_width, 5, 5)
+            if car["active"]:
+                painter.drawRoundedRect(self.car_rect(direction), 5, 5)
     
     def draw_pedestrians(self, painter):
         """Draw animated pedestrians on zebra crossings"""
@@ -336,8 +645,8 @@ class TrafficSimulationWidget(QWidget):
         center_y = self.height() // 2
         zebra_width = 40
         
-        painter.setPen(QPen(QColor(0, 0, 0), 1))
-        painter.setBrush(QBrush(QColor(200, 200, 255)))
+        painter.setPen(self.resources.pedestrian_pen)
+        painter.setBrush(self.resources.pedestrian_brush)
         
         ped_size = 10
         
@@ -365,47 +674,15 @@ class TrafficSimulationWidget(QWidget):
                     y = center_y - self.road_width // 2 + offset
                     painter.drawEllipse(x, y, ped_size, ped_size)
     
-    def draw_traffic_lights(self, painter):
-        """Draw traffic lights with modern glass-morphism style"""
-        actual_center_x = self.width() // 2
-        actual_center_y = self.height() // 2
-        spacing = 220
-        
-        # Update positions
-        self.traffic_lights["north"].x = actual_center_x
-        self.traffic_lights["north"].y = actual_center_y - spacing
-        self.traffic_lights["south"].x = actual_center_x
-        self.traffic_lights["south"].y = actual_center_y + spacing
-        self.traffic_lights["east"].x = actual_center_x + spacing
-        self.traffic_lights["east"].y = actual_center_y
-        self.traffic_lights["west"].x = actual_center_x - spacing
-        self.traffic_lights["west"].y = actual_center_y
-        
-        self.vip_flash_timer += 1
-        
+    def pedestrian_signal_position(self, direction, light):
+        """Centre of a light's pedestrian signal"""
+        ped_x = light.x + (120 if direction in ["north", "south"] else 150)
+        ped_y = light.y - 50 if direction in ["north", "south"] else light.y + 20
+        return ped_x, ped_y
+    
+    def draw_light_poles(self, painter):
+        """Draw the traffic light poles and labels (static - part of the cached layer)"""
         for direction, light in self.traffic_lights.items():
-            signal_map = {"north": 1, "east": 2, "south": 3, "west": 4}
-            signal_num = signal_map.get(direction, 0)
-            is_vip_signal = (self.vip_active and self.vip_signal_id == signal_num)
-            
-            # Draw VIP indicator with neon glow effect
-            if is_vip_signal:
-                flash_on = (self.vip_flash_timer // 5) % 2
-                if flash_on:
-                    # Outer glow
-                    for i in range(10, 0, -1):
-                        alpha = int(30 * (i / 10))
-                        painter.setBrush(QBrush(QColor(255, 0, 100, alpha)))
-                        painter.setPen(QPen(QColor(255, 0, 100, alpha), 2))
-                        painter.drawRoundedRect(light.x - 60 - i, light.y - 140 - i, 
-                                              120 + 2*i, 150 + 2*i, 15, 15)
-                    
-                    # VIP text with glow
-                    painter.setPen(QPen(QColor(255, 255, 255), 3))
-                    painter.setFont(QFont("Arial", 16, QFont.Bold))
-                    painter.drawText(light.x - 35, light.y - 150, "VIP PRIORITY")
-            
-            # Draw traffic light pole with metallic gradient
             pole_gradient = QLinearGradient(light.x - 6, 0, light.x + 6, 0)
             pole_gradient.setColorAt(0, QColor(120, 120, 140))
             pole_gradient.setColorAt(0.5, QColor(80, 80, 100))
@@ -414,65 +691,69 @@ class TrafficSimulationWidget(QWidget):
             painter.setPen(QPen(QColor(40, 40, 60), 2))
             painter.drawRoundedRect(light.x - 8, light.y - 130, 16, 130, 8, 8)
             
-            # Draw traffic light housing with glass effect
-            housing_gradient = QLinearGradient(light.x - 50, light.y - 130, light.x + 50, light.y + 10)
+            # Modern labels with subtle glow
+            ped_x, ped_y = self.pedestrian_signal_position(direction, light)
+            painter.setPen(QPen(QColor(200, 200, 220), 2))
+            painter.setFont(QFont("Arial", 11, QFont.Bold))
+            painter.drawText(light.x - 35, light.y + 55, "TRAFFIC")
+            painter.drawText(ped_x - 20, ped_y + 40, "WALK")
+    
+    def draw_traffic_lights(self, painter, region=None):
+        """Draw traffic lights with modern glass-morphism style (only those intersecting region)"""
+        resources = self.resources
+        for direction, light in self.traffic_lights.items():
+            if region is not None and not region.intersects(self.light_rects[direction]):
+                continue
+            geometry = self.light_geometry[direction]
+            is_vip_signal = (self.vip_active and self.vip_signal_id == DIRECTION_SIGNALS[direction])
+            pedestrians_stopped = self.vip_active and not is_vip_signal
+            
+            # Draw VIP indicator with neon glow effect
             if is_vip_signal:
-                housing_gradient.setColorAt(0, QColor(80, 40, 60, 180))
-                housing_gradient.setColorAt(1, QColor(40, 20, 30, 220))
-            else:
-                housing_gradient.setColorAt(0, QColor(60, 60, 80, 180))
-                housing_gradient.setColorAt(1, QColor(30, 30, 40, 220))
+                flash_on = (self.vip_flash_timer // VIP_FLASH_TICKS) % 2
+                if flash_on:
+                    # Outer glow
+                    painter.drawPixmap(geometry['halo_origin'], resources.vip_halo())
+                    
+                    # VIP text with glow
+                    painter.setPen(resources.vip_text_pen)
+                    painter.setFont(resources.vip_font)
+                    painter.drawText(geometry['vip_caption'], "VIP PRIORITY")
             
-            painter.setBrush(QBrush(housing_gradient))
-            painter.setPen(QPen(QColor(100, 100, 120, 150), 2))
-            painter.drawRoundedRect(light.x - 50, light.y - 130, 100, 140, 20, 20)
+            # Draw traffic light housing with glass effect
+            painter.setBrush(geometry['housing_brush'][is_vip_signal])
+            painter.setPen(resources.housing_pen)
+            painter.drawRoundedRect(geometry['housing'], 20, 20)
             
             # Inner glass reflection
-            reflection = QLinearGradient(light.x - 45, light.y - 125, light.x - 10, light.y - 90)
-            reflection.setColorAt(0, QColor(255, 255, 255, 40))
-            reflection.setColorAt(1, QColor(255, 255, 255, 5))
-            painter.setBrush(QBrush(reflection))
-            painter.setPen(Qt.NoPen)
-            painter.drawRoundedRect(light.x - 45, light.y - 125, 35, 60, 15, 15)
+            painter.setBrush(geometry['reflection_brush'])
+            painter.setPen(resources.no_pen)
+            painter.drawRoundedRect(geometry['reflection'], 15, 15)
             
             # Draw LED-style lights with glow effects
-            self.draw_led_light(painter, light.x, light.y - 110, 32, light.red, QColor(255, 80, 80), "red")
-            self.draw_led_light(painter, light.x, light.y - 65, 32, light.yellow, QColor(255, 255, 80), "yellow")
-            self.draw_led_light(painter, light.x, light.y - 20, 32, light.green, QColor(80, 255, 80), "green", is_vip_signal)
-            
-            # Draw pedestrian signal with modern styling
-            ped_x = light.x + (120 if direction in ["north", "south"] else 150)
-            ped_y = light.y - 50 if direction in ["north", "south"] else light.y + 20
+            (red_x, red_y), (yellow_x, yellow_y), (green_x, green_y) = geometry['lamps']
+            self.draw_led(painter, red_x, red_y, LED_SIZE, light.red, "red")
+            self.draw_led(painter, yellow_x, yellow_y, LED_SIZE, light.yellow, "yellow")
+            self.draw_led(painter, green_x, green_y, LED_SIZE, light.green, "green", is_vip_signal)
             
             # Pedestrian housing
-            ped_gradient = QLinearGradient(ped_x - 25, ped_y - 45, ped_x + 25, ped_y + 15)
-            if self.vip_active and not is_vip_signal:
-                ped_gradient.setColorAt(0, QColor(80, 30, 30, 180))
-                ped_gradient.setColorAt(1, QColor(40, 15, 15, 220))
-            else:
-                ped_gradient.setColorAt(0, QColor(50, 50, 70, 180))
-                ped_gradient.setColorAt(1, QColor(25, 25, 35, 220))
-            
-            painter.setBrush(QBrush(ped_gradient))
-            painter.setPen(QPen(QColor(80, 80, 100, 150), 2))
-            painter.drawRoundedRect(ped_x - 25, ped_y - 45, 50, 60, 15, 15)
+            painter.setBrush(geometry['ped_housing_brush'][pedestrians_stopped])
+            painter.setPen(resources.ped_housing_pen)
+            painter.drawRoundedRect(geometry['ped_housing'], 15, 15)
             
             # Pedestrian light
-            if self.vip_active and not is_vip_signal:
-                self.draw_led_light(painter, ped_x, ped_y - 15, 28, True, QColor(255, 80, 80), "red")
-            elif light.pedestrian_green:
-                self.draw_led_light(painter, ped_x, ped_y - 15, 28, True, QColor(80, 255, 80), "green")
-            else:
-                self.draw_led_light(painter, ped_x, ped_y - 15, 28, True, QColor(255, 80, 80), "red")
-            
-            # Modern labels with subtle glow
-            painter.setPen(QPen(QColor(200, 200, 220), 2))
-            painter.setFont(QFont("Arial", 11, QFont.Bold))
-            painter.drawText(light.x - 35, light.y + 55, "TRAFFIC")
-            painter.drawText(ped_x - 20, ped_y + 40, "WALK")
+            ped_lamp_x, ped_lamp_y = geometry['ped_lamp']
+            walk = light.pedestrian_green and not pedestrians_stopped
+            self.draw_led(painter, ped_lamp_x, ped_lamp_y, PED_LED_SIZE, True, "green" if walk else "red")
+    
+    def draw_led(self, painter, x, y, size, is_on, light_type, is_vip=False):
+        """Blit the cached sprite of a lamp centred at (x, y)"""
+        sprite = self.resources.led(light_type, size, is_on, is_vip and light_type == "green", self.draw_led_light)
+        offset = sprite.width() // 2
+        painter.drawPixmap(x - offset, y - offset, sprite)
     
     def draw_led_light(self, painter, x, y, size, is_on, color, light_type, is_vip=False):
-        """Draw LED-style light with glow effect"""
+        """Draw LED-style light with glow effect (renders the cached lamp sprites)"""
         radius = size // 2
         
         if is_on:
@@ -521,20 +802,21 @@ class TrafficSimulationWidget(QWidget):
 class TrafficSystemUpdateThread(QThread):
     """Thread to handle server communication and updates"""
     
-    status_updated = pyqtSignal(dict)
-    countdown_updated = pyqtSignal(dict)
+    status_updated = pyqtSignal(dict)   # Emitted only when the status differs from the last one sent
+    connection_restored = pyqtSignal()  # First successful poll after startup or an error
     connection_error = pyqtSignal(str)
     
-    def __init__(self):
+    def __init__(self, countdown_clock):
         super().__init__()
         self.server = None
         self.running = False
-        self.connect_to_server()
+        self.countdown_clock = countdown_clock  # Re-fetches the timing plan only when its version changes
+        self.last_status = None  # Last status emitted - None forces the next poll through
         
     def connect_to_server(self):
         """Connect to the traffic light server"""
         try:
-            self.server = xmlrpc.client.ServerProxy("http://127.0.0.1:9000/", allow_none=True)
+            self.server = xmlrpc.client.ServerProxy(BALANCER_URL, allow_none=True)
             _ = self.server.get_signal_status()
         except Exception as e:
             self.server = None
@@ -543,6 +825,7 @@ class TrafficSystemUpdateThread(QThread):
     def run(self):
         """Main thread loop to update traffic status"""
         self.running = True
+        self.connect_to_server()  # Here, not in __init__ - the GUI thread never waits on the network
         connection_retry_count = 0
         max_retry_attempts = 3
         
@@ -550,12 +833,14 @@ class TrafficSystemUpdateThread(QThread):
             if self.server:
                 try:
                     status = self.server.get_signal_status()
-                    countdown_info = self.server.get_countdown_info()
+                    self.countdown_clock.refresh(self.server)
                     
-                    self.status_updated.emit(status)
-                    self.countdown_updated.emit(countdown_info)
+                    if self.last_status is None:
+                        self.connection_restored.emit()
+                    self.publish_status(status)
                     connection_retry_count = 0
                 except Exception as e:
+                    self.last_status = None  # The UI falls back to local status - resend on recovery
                     connection_retry_count += 1
                     if connection_retry_count <= max_retry_attempts:
                         self.connection_error.emit(f"Server communication error: {str(e)} (Attempt {connection_retry_count}/{max_retry_attempts})")
@@ -566,10 +851,52 @@ class TrafficSystemUpdateThread(QThread):
             
             self.msleep(1000)
     
+    def publish_status(self, status):
+        """Emit the polled status only if it changed since the last emit"""
+        if status != self.last_status:
+            self.last_status = status
+            self.status_updated.emit(status)
+    
     def stop(self):
         """Stop the update thread"""
         self.running = False
 
+class RpcCommandWorker(QThread):
+    """Runs UI-initiated RPCs in order on a connection of its own; completions come back on the GUI thread"""
+    
+    command_finished = pyqtSignal(object, object, object)  # on_done, result, error (None on success)
+    
+    def __init__(self):
+        super().__init__()
+        self.commands = queue.Queue()
+        self.command_finished.connect(self.deliver)  # Queued - deliver runs on the GUI thread
+    
+    def submit(self, method, *args, on_done=None):
+        """Queue server.method(*args); on_done(result, error) is called on the GUI thread when it completes"""
+        self.commands.put((method, args, on_done))
+    
+    def run(self):
+        # ServerProxy is not thread-safe - never share the update thread's
+        server = xmlrpc.client.ServerProxy(BALANCER_URL, allow_none=True)
+        while True:
+            command = self.commands.get()
+            if command is None:
+                break
+            method, args, on_done = command
+            try:
+                result, error = getattr(server, method)(*args), None
+            except Exception as e:
+                result, error = None, e
+            self.command_finished.emit(on_done, result, error)
+    
+    def deliver(self, on_done, result, error):
+        if on_done:
+            on_done(result, error)
+    
+    def stop(self):
+        """Finish the queued commands, then exit"""
+        self.commands.put(None)
+
 class TrafficLightSimulationUI(QMainWindow):
     """Main UI with modern dark theme styling"""
     
@@ -638,13 +965,23 @@ class TrafficLightSimulationUI(QMainWindow):
                 border-top: 1px solid #4a4a6a;
                 color: #b0b0b0;
             }
-        """)
+        """ + STATE_STYLESHEET)
         
         # Server connection
-        self.update_thread = TrafficSystemUpdateThread()
+        self.countdown_clock = CountdownClock()
+        self.update_thread = TrafficSystemUpdateThread(self.countdown_clock)
         self.update_thread.status_updated.connect(self.update_traffic_status)
-        self.update_thread.countdown_updated.connect(self.update_countdown_info)
+        self.update_thread.connection_restored.connect(self.handle_connection_restored)
         self.update_thread.connection_error.connect(self.handle_connection_error)
+        self.command_worker = RpcCommandWorker()  # VIP / RTO commands - never on the GUI thread
+        self.last_server_status = None  # Last polled status - re-applied when an RTO override ends
+        self.rto_pending = 0            # RTO commands sent and not yet answered
+        self.rto_server_override = False  # Server's timing plan carries an RTO override
+        
+        # Countdown computed locally from the timing plan at display rate
+        self.countdown_timer = QTimer()
+        self.countdown_timer.timeout.connect(self.refresh_countdown)
+        self.countdown_timer.start(COUNTDOWN_REFRESH_MS)
         
         # Auto cycling
         self.auto_cycle_timer = QTimer()
@@ -656,8 +993,9 @@ class TrafficLightSimulationUI(QMainWindow):
         self.setup_ui()
         self.setup_status_bar()
         
-        # Start the update thread
+        # Start the update thread and the command worker
         self.update_thread.start()
+        self.command_worker.start()
         
     def setup_ui(self):
         """Setup the main UI layout with modern styling"""
@@ -672,9 +1010,15 @@ class TrafficLightSimulationUI(QMainWindow):
         splitter = QSplitter(Qt.Horizontal)
         main_layout.addWidget(splitter)
         
-        # Simulation widget
+        # Simulation widget and the city map, one tab each
         self.simulation_widget = TrafficSimulationWidget()
-        splitter.addWidget(self.simulation_widget)
+        rows, cols = parse_grid(CITY_GRID)
+        self.city_map = CityMapWidget(*grid_city(rows, cols, live=LIVE_INTERSECTION), clock=self.countdown_clock.now)
+        self.city_plan_version = 0
+        views = QTabWidget()
+        views.addTab(self.simulation_widget, "Intersection")
+        views.addTab(self.city_map, f"City Map ({rows * cols})")
+        splitter.addWidget(views)
         
         # Control panel
         control_panel = self.create_control_panel()
@@ -695,14 +1039,8 @@ class TrafficLightSimulationUI(QMainWindow):
         connection_layout = QVBoxLayout(connection_group)
         
         self.connection_status = QLabel("Initializing connection...")
-        self.connection_status.setStyleSheet("""
-            color: #ffa500; 
-            font-weight: bold; 
-            padding: 12px;
-            background: rgba(255, 165, 0, 0.1);
-            border-radius: 6px;
-            border: 1px solid rgba(255, 165, 0, 0.3);
-        """)
+        self.connection_status.setObjectName("connectionStatus")
+        set_widget_state(self.connection_status, "connecting")
         connection_layout.addWidget(self.connection_status)
         layout.addWidget(connection_group)
         
@@ -754,13 +1092,8 @@ class TrafficLightSimulationUI(QMainWindow):
         vip_layout.addLayout(vip_button_layout2)
         
         self.vip_status = QLabel("Status: Normal Operation")
-        self.vip_status.setStyleSheet("""
-            font-weight: bold; 
-            padding: 8px;
-            background: rgba(0, 255, 136, 0.1);
-            border-radius: 4px;
-            border: 1px solid rgba(0, 255, 136, 0.3);
-        """)
+        self.vip_status.setObjectName("vipStatus")
+        set_widget_state(self.vip_status, "normal")
         vip_layout.addWidget(self.vip_status)
         
         layout.addWidget(vip_group)
@@ -849,44 +1182,16 @@ class TrafficLightSimulationUI(QMainWindow):
             
             # Traffic signal button with modern green styling
             traffic_btn = QPushButton("GREEN")
-            traffic_btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(68, 255, 68, 0.8), stop:1 rgba(68, 255, 68, 0.4));
-                    border: 2px solid #44ff44;
-                    color: black;
-                    font-weight: bold;
-                    min-height: 30px;
-                    border-radius: 8px;
-                    padding: 6px;
-                }
-                QPushButton:hover {
-                    background: rgba(68, 255, 68, 0.9);
-                    box-shadow: 0 0 15px rgba(68, 255, 68, 0.4);
-                }
-            """)
+            traffic_btn.setObjectName("rtoSignal")
+            set_widget_state(traffic_btn, "green")
             traffic_btn.clicked.connect(lambda checked, d=direction.lower(), s=i: self.toggle_rto_traffic(d, s))
             self.rto_traffic_buttons[direction.lower()] = traffic_btn
             rto_grid.addWidget(traffic_btn, i, 1)
             
             # Pedestrian signal button with modern red styling
             ped_btn = QPushButton("STOP")
-            ped_btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(255, 68, 68, 0.8), stop:1 rgba(255, 68, 68, 0.4));
-                    border: 2px solid #ff4444;
-                    color: white;
-                    font-weight: bold;
-                    min-height: 30px;
-                    border-radius: 8px;
-                    padding: 6px;
-                }
-                QPushButton:hover {
-                    background: rgba(255, 68, 68, 0.9);
-                    box-shadow: 0 0 15px rgba(255, 68, 68, 0.4);
-                }
-            """)
+            ped_btn.setObjectName("rtoSignal")
+            set_widget_state(ped_btn, "red")
             ped_btn.clicked.connect(lambda checked, d=direction.lower(), s=i: self.toggle_rto_pedestrian(d, s))
             self.rto_ped_buttons[direction.lower()] = ped_btn
             rto_grid.addWidget(ped_btn, i, 2)
@@ -895,14 +1200,8 @@ class TrafficLightSimulationUI(QMainWindow):
         
         # RTO status with modern indicator
         self.rto_status = QLabel("Auto Cycle: ACTIVE")
-        self.rto_status.setStyleSheet("""
-            color: #00ff88;
-            font-weight: bold;
-            padding: 10px;
-            background: rgba(0, 255, 136, 0.1);
-            border-radius: 6px;
-            border: 1px solid rgba(0, 255, 136, 0.3);
-        """)
+        self.rto_status.setObjectName("rtoStatus")
+        set_widget_state(self.rto_status, "auto")
         rto_layout.addWidget(self.rto_status)
         
         self.rto_recycle_btn = QPushButton("RESET TO AUTO MODE")
@@ -952,6 +1251,7 @@ class TrafficLightSimulationUI(QMainWindow):
         status_layout = QVBoxLayout(status_group)
         
         self.status_text = QTextEdit()
+        self.status_display_text = None
         self.status_text.setMaximumHeight(160)
         self.status_text.setReadOnly(True)
         self.status_text.setStyleSheet("""
@@ -1024,24 +1324,31 @@ class TrafficLightSimulationUI(QMainWindow):
         pass
     
     def update_traffic_status(self, status):
-        """Update traffic light states based on server status"""
+        """Update traffic light states based on server status (emitted only when it changed)"""
         try:
+            self.last_server_status = status
             self.simulation_widget.update_traffic_lights(status)
             self.update_status_display(status)
-            
-            self.connection_status.setText("Connected & Synchronized")
-            self.connection_status.setStyleSheet("""
-                color: #00ff88; 
-                font-weight: bold; 
-                padding: 12px;
-                background: rgba(0, 255, 136, 0.1);
-                border-radius: 6px;
-                border: 1px solid rgba(0, 255, 136, 0.3);
-            """)
+            if not self.simulation_widget.rto_mode:
+                self.show_rto_controls(status)  # Manual changes start from the live signals
             
         except Exception as e:
             self.handle_connection_error(f"Status update error: {str(e)}")
     
+    def handle_connection_restored(self):
+        """Server answered again after startup or an error"""
+        set_widget_state(self.connection_status, "connected", "Connected & Synchronized")
+    
+    def refresh_countdown(self):
+        """Recompute the countdown from the cached timing plan (no RPC)"""
+        countdown_info = self.countdown_clock.countdown()
+        if countdown_info:
+            self.update_countdown_info(countdown_info)
+        if self.countdown_clock.plan and self.countdown_clock.version != self.city_plan_version:
+            self.city_plan_version = self.countdown_clock.version
+            self.city_map.set_plan(LIVE_INTERSECTION, self.countdown_clock.plan)
+            self.follow_rto_override(self.countdown_clock.plan)
+    
     def update_countdown_info(self, countdown_info):
         """Update countdown information in simulation widget"""
         try:
@@ -1052,7 +1359,8 @@ class TrafficLightSimulationUI(QMainWindow):
             countdown_text += f"Time Remaining: {countdown_info.get('time_remaining', 0):.1f}s\n"
             countdown_text += f"Green Signals: {countdown_info.get('current_green_signals', [])}"
             
-            self.countdown_display.setText(countdown_text)
+            if countdown_text != self.countdown_display.text():
+                self.countdown_display.setText(countdown_text)
             
         except Exception as e:
             print(f"Countdown update error: {e}")
@@ -1061,15 +1369,7 @@ class TrafficLightSimulationUI(QMainWindow):
         """Handle server connection errors and fall back to local simulation"""
         print(f"Connection error: {error_msg}")
         
-        self.connection_status.setText("Offline Mode - Local Simulation")
-        self.connection_status.setStyleSheet("""
-            color: #ffa500; 
-            font-weight: bold; 
-            padding: 12px;
-            background: rgba(255, 165, 0, 0.1);
-            border-radius: 6px;
-            border: 1px solid rgba(255, 165, 0, 0.3);
-        """)
+        set_widget_state(self.connection_status, "offline", "Offline Mode - Local Simulation")
         
         if "offline mode" in error_msg.lower() or "failed" in error_msg.lower():
             local_status = {
@@ -1097,7 +1397,9 @@ class TrafficLightSimulationUI(QMainWindow):
             status_text += f"SOUTH: {status.get('p3', 'GREEN').upper():>6}  |  "
             status_text += f"WEST: {status.get('p4', 'GREEN').upper():>6}"
             
-            self.status_text.setText(status_text)
+            if status_text != self.status_display_text:  # QTextEdit re-lays out even identical text
+                self.status_display_text = status_text
+                self.status_text.setText(status_text)
             
         except Exception as e:
             self.status_text.setText(f"ERROR: Status display failed - {str(e)}")
@@ -1108,51 +1410,37 @@ class TrafficLightSimulationUI(QMainWindow):
         self.time_label.setText(f"{current_time}")
     
     def trigger_vip_signal(self, signal_id):
-        """Trigger VIP emergency signal"""
+        """Trigger VIP emergency signal - shown at once, confirmed or rolled back when the server answers"""
         try:
             print(f"VIP Emergency: Triggering signal {signal_id}")
-            self.vip_status.setText(f"EMERGENCY ACTIVE: Signal {signal_id}")
-            self.vip_status.setStyleSheet("""
-                color: #ff4444;
-                font-weight: bold;
-                padding: 8px;
-                background: rgba(255, 68, 68, 0.2);
-                border-radius: 4px;
-                border: 2px solid rgba(255, 68, 68, 0.5);
-            """)
-            
+            set_widget_state(self.vip_status, "emergency", f"EMERGENCY ACTIVE: Signal {signal_id}")
             self.simulation_widget.set_vip_active(signal_id)
-            
-            if hasattr(self, 'update_thread') and self.update_thread.server:
-                success = self.update_thread.server.vip_signal_manipulator(signal_id)
-                if success:
-                    print(f"VIP signal {signal_id} activated successfully")
-                    self.status_text.append(f"\n>>> EMERGENCY OVERRIDE: Signal {signal_id} prioritized")
-                    QTimer.singleShot(10000, self.reset_vip_status)
-                else:
-                    print(f"VIP signal {signal_id} activation failed")
-                    self.vip_status.setText("EMERGENCY FAILED")
-                    self.simulation_widget.clear_vip_active()
-            else:
-                print("No server connection for VIP request")
-                self.vip_status.setText("CONNECTION ERROR")
-                self.simulation_widget.clear_vip_active()
+            self.command_worker.submit("vip_signal_manipulator", signal_id,
+                                       on_done=lambda success, error: self.vip_signal_done(signal_id, success, error))
                 
         except Exception as e:
             print(f"VIP signal error: {e}")
-            self.vip_status.setText("SYSTEM ERROR")
+            set_widget_state(self.vip_status, "normal", "SYSTEM ERROR")
+            self.simulation_widget.clear_vip_active()
+    
+    def vip_signal_done(self, signal_id, success, error):
+        """Completion of a VIP request"""
+        if error:
+            print(f"No server connection for VIP request: {error}")
+            set_widget_state(self.vip_status, "normal", "CONNECTION ERROR")
+            self.simulation_widget.clear_vip_active()
+        elif success:
+            print(f"VIP signal {signal_id} activated successfully")
+            self.status_text.append(f"\n>>> EMERGENCY OVERRIDE: Signal {signal_id} prioritized")
+            QTimer.singleShot(10000, self.reset_vip_status)
+        else:
+            print(f"VIP signal {signal_id} activation failed")
+            set_widget_state(self.vip_status, "normal", "EMERGENCY FAILED")
             self.simulation_widget.clear_vip_active()
     
     def reset_vip_status(self):
         """Reset VIP status display to normal"""
-        self.vip_status.setText("Status: Normal Operation")
-        self.vip_status.setStyleSheet("""
-            font-weight: bold; 
-            padding: 8px;
-            background: rgba(0, 255, 136, 0.1);
-            border-radius: 4px;
-            border: 1px solid rgba(0, 255, 136, 0.3);
-        """)
+        set_widget_state(self.vip_status, "normal", "Status: Normal Operation")
         self.simulation_widget.clear_vip_active()
     
     def run_load_simulation(self):
@@ -1163,36 +1451,25 @@ class TrafficLightSimulationUI(QMainWindow):
             self.load_test_btn.setEnabled(False)
             
             import threading
-            from concurrent.futures import ThreadPoolExecutor
             
             def load_test_worker():
                 try:
-                    print("Executing 15 simultaneous requests to test load balancing")
-                    
-                    def single_request(request_id):
-                        try:
-                            import xmlrpc.client
-                            test_server = xmlrpc.client.ServerProxy("http://127.0.0.1:9000/", allow_none=True)
-                            
-                            status = test_server.get_signal_status()
-                            stats = test_server.get_system_stats()
-                            countdown = test_server.get_countdown_info()
-                            
-                            return f"Request {request_id}: Success"
-                        except Exception as e:
-                            return f"Request {request_id}: Failed - {str(e)}"
-                    
-                    with ThreadPoolExecutor(max_workers=15) as executor:
-                        futures = [executor.submit(single_request, i) for i in range(1, 16)]
-                        results = [future.result(timeout=30) for future in futures]
-                    
-                    successful = len([r for r in results if "Success" in r])
-                    failed = len(results) - successful
+                    print("Running 5s closed-loop benchmark with 15 concurrent callers")
+                    result = asyncio.run(run_benchmark(
+                        BALANCER_URL, mode="closed", concurrency=15, duration=5.0, warmup=0.5,
+                        mix="status", label="ui-load-test"))
+                    print_report(result)
+                    latency = result['latency']
                     
                     def update_ui():
-                        self.load_status.setText(f"Test complete: {successful}/15 successful")
+                        self.load_status.setText(f"Test complete: {result['throughput_rps']:.0f} req/s, "
+                                                 f"p99 {latency['p99_ms']:.1f} ms")
                         self.load_test_btn.setEnabled(True)
-                        self.status_text.append(f"\n>>> LOAD TEST: {successful} success, {failed} failed")
+                        backends = ", ".join(f"{url}: {count}" for url, count in result['backends'].items())
+                        self.status_text.append(
+                            f"\n>>> LOAD TEST: {result['requests'] - result['errors']} success, "
+                            f"{result['errors']} failed | p50 {latency['p50_ms']:.1f} ms, "
+                            f"p99 {latency['p99_ms']:.1f} ms" + (f" | {backends}" if backends else ""))
                         QTimer.singleShot(5000, lambda: self.load_status.setText("Ready for testing"))
                     
                     QTimer.singleShot(0, update_ui)
@@ -1213,243 +1490,148 @@ class TrafficLightSimulationUI(QMainWindow):
             self.load_status.setText("Error occurred")
             self.load_test_btn.setEnabled(True)
     
+    def enter_rto_mode(self, text="Auto Cycle: DISABLED"):
+        """Show manual control: the simulation stops following the auto-cycle"""
+        if not self.simulation_widget.rto_mode:
+            self.simulation_widget.set_rto_mode(True)
+        set_widget_state(self.rto_status, "manual", text)
+    
+    def leave_rto_mode(self):
+        """Back to the auto-cycle display, redrawn from the last polled server status"""
+        if self.simulation_widget.rto_mode:
+            self.simulation_widget.set_rto_mode(False)
+            if self.last_server_status:
+                self.update_traffic_status(self.last_server_status)
+        set_widget_state(self.rto_status, "auto", "Auto Cycle: ACTIVE")
+    
+    def show_rto_controls(self, status):
+        """Set the RTO buttons to a signal status array"""
+        for i, direction in enumerate(RTO_DIRECTIONS, 1):
+            traffic, pedestrian = status.get(f"t{i}", "red"), status.get(f"p{i}", "green")
+            set_widget_state(self.rto_traffic_buttons[direction], traffic, RTO_TRAFFIC_LABELS.get(traffic, "STOP"))
+            set_widget_state(self.rto_ped_buttons[direction], pedestrian, RTO_PEDESTRIAN_LABELS.get(pedestrian, "STOP"))
+    
+    def apply_rto_status(self, status):
+        """Show operator-set states on the RTO buttons and in the simulation"""
+        self.show_rto_controls(status)
+        for i, direction in enumerate(RTO_DIRECTIONS, 1):
+            self.simulation_widget.set_manual_signal_state(direction, "traffic", status[f"t{i}"])
+            self.simulation_widget.set_manual_signal_state(direction, "pedestrian", status[f"p{i}"])
+    
+    def follow_rto_override(self, plan):
+        """Mirror an RTO override set or released anywhere (this window or another monitor)"""
+        override = plan.get('override')
+        if override and override['kind'] == "rto":
+            self.rto_server_override = True
+            if not self.rto_pending:
+                self.enter_rto_mode("Auto Cycle: DISABLED (RTO override)")
+                self.apply_rto_status(override['signal_status'])
+        elif self.rto_server_override:
+            self.rto_server_override = False
+            if not self.rto_pending:
+                self.leave_rto_mode()
+    
+    def submit_rto_override(self, changes):
+        """Send operator-set states to the server; shown at once, confirmed or rolled back on reply"""
+        self.rto_pending += 1
+        self.command_worker.submit("set_manual_override", changes, RTO_OPERATOR, on_done=self.rto_override_done)
+    
+    def rto_override_done(self, result, error):
+        """Completion of an RTO override: show what the server holds now"""
+        self.rto_pending -= 1
+        if result and result.get('accepted'):
+            self.rto_server_override = True
+            self.enter_rto_mode()
+            self.apply_rto_status(result['signal_status'])
+            for replica, reason in result.get('replica_errors', {}).items():
+                print(f"RTO override not yet on {replica}: {reason}")
+                self.status_text.append(f"\n>>> RTO OVERRIDE PENDING ON {replica}: {reason} - retrying")
+            return
+        reason = error or result.get('error')
+        print(f"RTO override not applied: {reason}")
+        self.status_text.append(f"\n>>> RTO OVERRIDE REJECTED: {reason}")
+        if self.rto_pending:
+            return  # A later reply settles the display
+        if not self.rto_server_override:
+            self.leave_rto_mode()
+        elif result and result.get('signal_status'):
+            self.apply_rto_status(result['signal_status'])  # Roll back to the states the server holds
+        elif self.countdown_clock.plan:
+            self.follow_rto_override(self.countdown_clock.plan)
+    
     def toggle_rto_traffic(self, direction, signal_num):
-        """Toggle traffic signal for RTO manual control"""
+        """Toggle traffic signal for RTO manual control - applied by the server for every monitor"""
         try:
-            if not self.simulation_widget.rto_mode:
-                self.simulation_widget.set_rto_mode(True)
-                self.rto_status.setText("Auto Cycle: DISABLED")
-                self.rto_status.setStyleSheet("""
-                    color: #ff4444;
-                    font-weight: bold;
-                    padding: 10px;
-                    background: rgba(255, 68, 68, 0.1);
-                    border-radius: 6px;
-                    border: 1px solid rgba(255, 68, 68, 0.3);
-                """)
+            self.enter_rto_mode()
             
             button = self.rto_traffic_buttons[direction]
             current_text = button.text()
             
             if current_text == "STOP":
                 new_state = "green"
-                button.setText("GREEN")
-                button.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 rgba(68, 255, 68, 0.8), stop:1 rgba(68, 255, 68, 0.4));
-                        border: 2px solid #44ff44;
-                        color: black;
-                        font-weight: bold;
-                        min-height: 30px;
-                        border-radius: 8px;
-                        padding: 6px;
-                    }
-                    QPushButton:hover {
-                        background: rgba(68, 255, 68, 0.9);
-                        box-shadow: 0 0 15px rgba(68, 255, 68, 0.4);
-                    }
-                """)
             elif current_text == "GREEN":
                 new_state = "yellow"
-                button.setText("CAUTION")
-                button.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 rgba(255, 255, 68, 0.8), stop:1 rgba(255, 255, 68, 0.4));
-                        border: 2px solid #ffff44;
-                        color: black;
-                        font-weight: bold;
-                        min-height: 30px;
-                        border-radius: 8px;
-                        padding: 6px;
-                    }
-                    QPushButton:hover {
-                        background: rgba(255, 255, 68, 0.9);
-                        box-shadow: 0 0 15px rgba(255, 255, 68, 0.4);
-                    }
-                """)
             else:
                 new_state = "red"
-                button.setText("STOP")
-                button.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 rgba(255, 68, 68, 0.8), stop:1 rgba(255, 68, 68, 0.4));
-                        border: 2px solid #ff4444;
-                        color: white;
-                        font-weight: bold;
-                        min-height: 30px;
-                        border-radius: 8px;
-                        padding: 6px;
-                    }
-                    QPushButton:hover {
-                        background: rgba(255, 68, 68, 0.9);
-                        box-shadow: 0 0 15px rgba(255, 68, 68, 0.4);
-                    }
-                """)
+            set_widget_state(button, new_state, RTO_TRAFFIC_LABELS[new_state])
             
             self.simulation_widget.set_manual_signal_state(direction, "traffic", new_state)
+            self.submit_rto_override({f"t{signal_num}": new_state})
             print(f"RTO: {direction.title()} traffic signal set to {new_state}")
             
         except Exception as e:
             print(f"RTO traffic toggle error: {e}")
     
     def toggle_rto_pedestrian(self, direction, signal_num):
-        """Toggle pedestrian signal for RTO manual control"""
+        """Toggle pedestrian signal for RTO manual control - applied by the server for every monitor"""
         try:
-            if not self.simulation_widget.rto_mode:
-                self.simulation_widget.set_rto_mode(True)
-                self.rto_status.setText("Auto Cycle: DISABLED")
-                self.rto_status.setStyleSheet("""
-                    color: #ff4444;
-                    font-weight: bold;
-                    padding: 10px;
-                    background: rgba(255, 68, 68, 0.1);
-                    border-radius: 6px;
-                    border: 1px solid rgba(255, 68, 68, 0.3);
-                """)
+            self.enter_rto_mode()
             
             button = self.rto_ped_buttons[direction]
-            current_text = button.text()
-            
-            if current_text == "STOP":
-                new_state = "green"
-                button.setText("WALK")
-                button.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 rgba(68, 255, 68, 0.8), stop:1 rgba(68, 255, 68, 0.4));
-                        border: 2px solid #44ff44;
-                        color: black;
-                        font-weight: bold;
-                        min-height: 30px;
-                        border-radius: 8px;
-                        padding: 6px;
-                    }
-                    QPushButton:hover {
-                        background: rgba(68, 255, 68, 0.9);
-                        box-shadow: 0 0 15px rgba(68, 255, 68, 0.4);
-                    }
-                """)
-            else:
-                new_state = "red"
-                button.setText("STOP")
-                button.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 rgba(255, 68, 68, 0.8), stop:1 rgba(255, 68, 68, 0.4));
-                        border: 2px solid #ff4444;
-                        color: white;
-                        font-weight: bold;
-                        min-height: 30px;
-                        border-radius: 8px;
-                        padding: 6px;
-                    }
-                    QPushButton:hover {
-                        background: rgba(255, 68, 68, 0.9);
-                        box-shadow: 0 0 15px rgba(255, 68, 68, 0.4);
-                    }
-                """)
+            new_state = "green" if button.text() == "STOP" else "red"
+            set_widget_state(button, new_state, RTO_PEDESTRIAN_LABELS[new_state])
             
             self.simulation_widget.set_manual_signal_state(direction, "pedestrian", new_state)
+            self.submit_rto_override({f"p{signal_num}": new_state})
             print(f"RTO: {direction.title()} pedestrian signal set to {new_state}")
             
         except Exception as e:
             print(f"RTO pedestrian toggle error: {e}")
     
     def rto_recycle(self):
-        """Reset to initial state and restart auto-cycle"""
+        """Release the server's RTO override and resume the auto-cycle"""
         try:
-            print("RTO: Recycling to initial state...")
-            
-            self.simulation_widget.set_rto_mode(False)
-            
-            # Reset buttons with modern styling
-            green_style = """
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(68, 255, 68, 0.8), stop:1 rgba(68, 255, 68, 0.4));
-                    border: 2px solid #44ff44;
-                    color: black;
-                    font-weight: bold;
-                    min-height: 30px;
-                    border-radius: 8px;
-                    padding: 6px;
-                }
-                QPushButton:hover {
-                    background: rgba(68, 255, 68, 0.9);
-                    box-shadow: 0 0 15px rgba(68, 255, 68, 0.4);
-                }
-            """
-            
-            red_style = """
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(255, 68, 68, 0.8), stop:1 rgba(255, 68, 68, 0.4));
-                    border: 2px solid #ff4444;
-                    color: white;
-                    font-weight: bold;
-                    min-height: 30px;
-                    border-radius: 8px;
-                    padding: 6px;
-                }
-                QPushButton:hover {
-                    background: rgba(255, 68, 68, 0.9);
-                    box-shadow: 0 0 15px rgba(255, 68, 68, 0.4);
-                }
-            """
-            
-            # Reset to initial state
-            self.rto_traffic_buttons["north"].setText("GREEN")
-            self.rto_traffic_buttons["north"].setStyleSheet(green_style)
-            self.rto_traffic_buttons["south"].setText("GREEN")
-            self.rto_traffic_buttons["south"].setStyleSheet(green_style)
-            self.rto_traffic_buttons["east"].setText("STOP")
-            self.rto_traffic_buttons["east"].setStyleSheet(red_style)
-            self.rto_traffic_buttons["west"].setText("STOP")
-            self.rto_traffic_buttons["west"].setStyleSheet(red_style)
-            
-            self.rto_ped_buttons["north"].setText("STOP")
-            self.rto_ped_buttons["north"].setStyleSheet(red_style)
-            self.rto_ped_buttons["south"].setText("STOP")
-            self.rto_ped_buttons["south"].setStyleSheet(red_style)
-            self.rto_ped_buttons["east"].setText("WALK")
-            self.rto_ped_buttons["east"].setStyleSheet(green_style)
-            self.rto_ped_buttons["west"].setText("WALK")
-            self.rto_ped_buttons["west"].setStyleSheet(green_style)
-            
-            # Update simulation states
-            self.simulation_widget.set_manual_signal_state("north", "traffic", "green")
-            self.simulation_widget.set_manual_signal_state("south", "traffic", "green")
-            self.simulation_widget.set_manual_signal_state("east", "traffic", "red")
-            self.simulation_widget.set_manual_signal_state("west", "traffic", "red")
-            self.simulation_widget.set_manual_signal_state("north", "pedestrian", "red")
-            self.simulation_widget.set_manual_signal_state("south", "pedestrian", "red")
-            self.simulation_widget.set_manual_signal_state("east", "pedestrian", "green")
-            self.simulation_widget.set_manual_signal_state("west", "pedestrian", "green")
-            
-            # Update status
-            self.rto_status.setText("Auto Cycle: ACTIVE")
-            self.rto_status.setStyleSheet("""
-                color: #00ff88;
-                font-weight: bold;
-                padding: 10px;
-                background: rgba(0, 255, 136, 0.1);
-                border-radius: 6px;
-                border: 1px solid rgba(0, 255, 136, 0.3);
-            """)
-            
-            print("RTO: System recycled to initial state - auto-cycle resumed")
+            print("RTO: Releasing manual override...")
+            self.rto_pending += 1
+            self.leave_rto_mode()
+            self.command_worker.submit("release_manual_override", RTO_OPERATOR, on_done=self.rto_release_done)
             
         except Exception as e:
             print(f"RTO recycle error: {e}")
     
+    def rto_release_done(self, released, error):
+        """Completion of an override release - restore manual control if the server still holds it"""
+        self.rto_pending -= 1
+        if error or not released:
+            print(f"RTO release failed: {error}")
+            self.status_text.append("\n>>> RTO RELEASE FAILED - override still in effect")
+            if self.countdown_clock.plan and not self.rto_pending:
+                self.follow_rto_override(self.countdown_clock.plan)
+            return
+        self.rto_server_override = False
+        print("RTO: Override released - auto-cycle resumed")
+    
     def closeEvent(self, event):
         """Clean up when closing the application"""
         if hasattr(self, 'update_thread'):
             self.update_thread.stop()
             self.update_thread.wait()
+        if hasattr(self, 'command_worker'):
+            self.command_worker.stop()
+            if not self.command_worker.wait(COMMAND_SHUTDOWN_MS):
+                print("⚠️ UI command still waiting on the server - abandoning it")
+                self.command_worker.terminate()
+                self.command_worker.wait()
         event.accept()
 
 def main():
@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import csv
+import random
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from async_client_t8 import DEFAULT_URL, PipelinedXMLRPCClient
+from bootstrap import parse_clock
+from hlc import HybridLogicalClock
+
+# TRAFFIC-DEMAND WORKLOAD GENERATOR
+# Vehicle arrivals are a non-homogeneous Poisson process: every approach (signal
+# 1-4) has its own base arrival rate, scaled by a time-of-day curve (rush hours),
+# and a fraction of arrivals are VIP vehicles. Arrival streams can be recorded
+# to CSV traces and replayed exactly.
+# The driver is OPEN-LOOP: each arrival is sent at its scheduled time whether or
+# not earlier requests have finished, and latency is measured from the scheduled
+# time - so queueing in the balancer/servers shows up instead of being hidden by
+# clients that slow down when the system does.
+
+APPROACHES = (1, 2, 3, 4)
+DEFAULT_APPROACH_RATES = (0.1, 0.1, 0.1, 0.1)  # Arrivals per second per approach
+
+# Demand multiplier at each hour of the day (interpolated in between)
+TIME_OF_DAY_PROFILES = {
+    "flat": [1.0] * 24,
+    "rush_hour": [0.2, 0.15, 0.1, 0.1, 0.15, 0.3, 0.7, 1.6, 2.0, 1.3, 0.9, 0.9,
+                  1.0, 0.9, 0.9, 1.1, 1.6, 2.0, 1.5, 0.9, 0.6, 0.45, 0.35, 0.25],
+    "night": [0.6, 0.5, 0.4, 0.4, 0.5, 0.6, 0.4, 0.2, 0.1, 0.1, 0.1, 0.1,
+              0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.6],
+}
+
+Arrival = namedtuple("Arrival", "offset controller approach vip")  # offset: seconds from start
+
+
+def seconds_of_day(clock_time=None):
+    """Seconds since midnight of a datetime (default: now)"""
+    clock_time = clock_time or datetime.now()
+    return clock_time.hour * 3600 + clock_time.minute * 60 + clock_time.second + clock_time.microsecond / 1e6
+
+
+class DemandProfile:
+    """Per-approach arrival rates shaped by a time-of-day curve, plus a VIP incidence rate"""
+
+    def __init__(self, approach_rates=DEFAULT_APPROACH_RATES, time_of_day="flat", vip_rate=0.0):
+        if time_of_day not in TIME_OF_DAY_PROFILES:
+            raise ValueError(f"Unknown time-of-day profile: {time_of_day}")
+        if len(approach_rates) != len(APPROACHES):
+            raise ValueError(f"Need one arrival rate per approach {APPROACHES}")
+        self.approach_rates = tuple(float(rate) for rate in approach_rates)
+        self.time_of_day = time_of_day
+        self.curve = TIME_OF_DAY_PROFILES[time_of_day]
+        self.vip_rate = vip_rate  # Fraction of arrivals that are VIP vehicles
+
+    def multiplier(self, tod):
+        """Time-of-day demand multiplier at tod seconds since midnight"""
+        hour = (tod % 86400) / 3600
+        index = int(hour)
+        frac = hour - index
+        return self.curve[index] * (1 - frac) + self.curve[(index + 1) % 24] * frac
+
+    def rate(self, tod):
+        """Total arrivals per second at tod"""
+        return sum(self.approach_rates) * self.multiplier(tod)
+
+    def peak_rate(self):
+        return sum(self.approach_rates) * max(self.curve)
+
+    def mean_rate(self, start_tod, duration, speedup=1.0, steps=1000):
+        """Average arrival rate over a run starting at start_tod"""
+        return sum(self.rate(start_tod + duration * speedup * i / steps) for i in range(steps)) / steps
+
+    def scaled_to(self, target_rps, start_tod, duration, speedup=1.0):
+        """Copy with rates scaled so the run averages target_rps (the time-of-day shape is kept)"""
+        factor = target_rps / self.mean_rate(start_tod, duration, speedup)
+        return DemandProfile([rate * factor for rate in self.approach_rates], self.time_of_day, self.vip_rate)
+
+
+class PoissonArrivals:
+    """Non-homogeneous Poisson arrival stream (Lewis-Shedler thinning)"""
+
+    def __init__(self, profile, controllers=1, start_tod=None, speedup=1.0, seed=None):
+        self.profile = profile
+        self.controllers = controllers              # Virtual controllers arrivals are spread over
+        self.start_tod = seconds_of_day() if start_tod is None else start_tod
+        self.speedup = speedup                      # Simulated day-seconds per real second
+        self.rng = random.Random(seed)
+
+    def generate(self, duration):
+        """Yield arrivals over duration real seconds, in time order"""
+        peak = self.profile.peak_rate()
+        if peak <= 0:
+            return
+        offset = 0.0
+        while True:
+            offset += self.rng.expovariate(peak)
+            if offset >= duration:
+                return
+            tod = self.start_tod + offset * self.speedup
+            if self.rng.random() * peak > self.profile.rate(tod):
+                continue  # Thinned: demand is below peak at this time of day
+            approach = self.rng.choices(APPROACHES, weights=self.profile.approach_rates)[0]
+            yield Arrival(offset, self.rng.randrange(self.controllers), approach,
+                          self.rng.random() < self.profile.vip_rate)
+
+
+class DemandGenerator:
+    """Vehicle demand for a single controller - replaces uniform random signal picks"""
+
+    def __init__(self, profile=None, seed=None):
+        self.profile = profile or DemandProfile()
+        self.rng = random.Random(seed)
+
+    def approaches_in_window(self, window, tod=None):
+        """Approaches with vehicles arriving in the next window seconds, in arrival order"""
+        arrivals = PoissonArrivals(self.profile, start_tod=tod, seed=self.rng.random()).generate(window)
+        return list(dict.fromkeys(arrival.approach for arrival in arrivals if not arrival.vip))
+
+
+def save_trace(arrivals, path):
+    """Record arrivals to a CSV trace; returns the number written"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(Arrival._fields)
+        for arrival in arrivals:
+            writer.writerow([f"{arrival.offset:.6f}", arrival.controller, arrival.approach, int(arrival.vip)])
+            count += 1
+    return count
+
+
+def load_trace(path):
+    """Replay arrivals from a CSV trace written by save_trace"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield Arrival(float(row['offset']), int(row['controller']), int(row['approach']),
+                          row['vip'] in ("1", "true", "True"))
+
+
+class OpenLoopStats:
+    """Outcome of an open-loop run; latencies are measured from each arrival's scheduled time"""
+
+    def __init__(self):
+        self.scheduled = 0
+        self.completed = 0
+        self.denied = 0
+        self.errors = 0
+        self.shed = 0
+        self.vip = 0
+        self.max_dispatch_lag = 0.0
+        self.latencies = []
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def fire(client, arrival, intended, stats, loop):
+    """Send one arrival's request and record its latency from the scheduled time"""
+    method = "vip_signal_manipulator" if arrival.vip else "signal_manipulator"
+    try:
+        result = await client.call(method, arrival.approach)
+        stats.completed += 1
+        if not result:
+            stats.denied += 1
+        stats.latencies.append(loop.time() - intended)
+    except Exception:
+        stats.errors += 1
+
+
+async def run_open_loop(arrivals, url=DEFAULT_URL, connections=4, depth=256, max_in_flight=10000):
+    """Send every arrival at its scheduled time over pipelined connections; returns OpenLoopStats"""
+    loop = asyncio.get_running_loop()
+    clock = HybridLogicalClock()
+    clients = [PipelinedXMLRPCClient(url, depth=depth, clock=clock) for _ in range(connections)]
+    stats = OpenLoopStats()
+    in_flight = set()
+    start = loop.time()
+
+    for arrival in arrivals:
+        intended = start + arrival.offset
+        delay = intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            stats.max_dispatch_lag = max(stats.max_dispatch_lag, -delay)
+        stats.scheduled += 1
+        stats.vip += arrival.vip
+        if len(in_flight) >= max_in_flight:
+            stats.shed += 1  # Client-side safety valve - reported, never silently retried
+            continue
+        # Each virtual controller keeps to one connection, like a real junction controller
+        client = clients[arrival.controller % connections]
+        task = asyncio.create_task(fire(client, arrival, intended, stats, loop))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    for client in clients:
+        await client.close()
+    stats.elapsed = loop.time() - start
+    return stats
+
+
+def print_report(stats, target):
+    print("\n" + "=" * 80)
+    print("📊 OPEN-LOOP WORKLOAD RESULTS")
+    print(f"   🎯 Target: {target} | Scheduled: {stats.scheduled} (👑 VIP: {stats.vip}) in {stats.elapsed:.1f}s")
+    print(f"   ⚡ Achieved: {stats.completed / stats.elapsed:.1f} req/s | Completed: {stats.completed} | "
+          f"🚫 Denied: {stats.denied} | ❌ Errors: {stats.errors} | Shed: {stats.shed}")
+    if stats.latencies:
+        print(f"   ⏱️ Latency from schedule: p50 {stats.percentile(50) * 1000:.1f} ms | "
+              f"p95 {stats.percentile(95) * 1000:.1f} ms | p99 {stats.percentile(99) * 1000:.1f} ms | "
+              f"max {max(stats.latencies) * 1000:.1f} ms")
+    print(f"   🐢 Max dispatch lag: {stats.max_dispatch_lag * 1000:.1f} ms")
+    print("=" * 80)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop traffic-demand generator for the load balancer")
+    parser.add_argument("--url", default=DEFAULT_URL, help="load balancer URL")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of demand to generate")
+    parser.add_argument("--profile", default="flat", choices=sorted(TIME_OF_DAY_PROFILES),
+                        help="time-of-day demand curve")
+    parser.add_argument("--start-time", help="time of day the run starts at, HH:MM:SS (default: now)")
+    parser.add_argument("--speedup", type=float, default=1.0,
+                        help="simulated seconds of the day per real second (e.g. 1440 = a day in a minute)")
+    parser.add_argument("--approach-rates", default=",".join(map(str, DEFAULT_APPROACH_RATES)),
+                        help="arrivals/s for approaches 1-4, comma separated")
+    parser.add_argument("--target-rps", type=float, help="scale rates so the run averages this many requests/s")
+    parser.add_argument("--controllers", type=int, default=1000, help="virtual junction controllers")
+    parser.add_argument("--vip-rate", type=float, default=0.0, help="fraction of arrivals that are VIP")
+    parser.add_argument("--seed", type=int, help="random seed for a reproducible stream")
+    parser.add_argument("--trace-in", help="replay arrivals from a CSV trace instead of generating")
+    parser.add_argument("--trace-out", help="record the generated arrivals to a CSV trace")
+    parser.add_argument("--connections", type=int, default=4, help="pipelined keep-alive connections")
+    parser.add_argument("--depth", type=int, default=256, help="max pipelined requests per connection")
+    parser.add_argument("--max-in-flight", type=int, default=10000, help="client-side cap on outstanding requests")
+    parser.add_argument("--dry-run", action="store_true", help="generate (and record) arrivals without sending")
+    args = parser.parse_args()
+
+    if args.trace_in:
+        arrivals = list(load_trace(args.trace_in))
+        target = f"trace {args.trace_in}"
+    else:
+        start_tod = seconds_of_day(parse_clock(args.start_time)) if args.start_time else seconds_of_day()
+        profile = DemandProfile([float(r) for r in args.approach_rates.split(",")], args.profile, args.vip_rate)
+        if args.target_rps:
+            profile = profile.scaled_to(args.target_rps, start_tod, args.duration, args.speedup)
+        target = f"{profile.mean_rate(start_tod, args.duration, args.speedup):.1f} req/s ({args.profile})"
+        arrivals = list(PoissonArrivals(profile, args.controllers, start_tod, args.speedup, args.seed)
+                        .generate(args.duration))
+    if args.trace_out:
+        print(f"💾 Recorded {save_trace(arrivals, args.trace_out)} arrivals to {args.trace_out}")
+
+    print("=" * 80)
+    print("🚗 TRAFFIC-DEMAND WORKLOAD GENERATOR (OPEN LOOP)")
+    print(f"📡 {len(arrivals)} arrivals over {arrivals[-1].offset if arrivals else 0:.1f}s → {args.url}")
+    print(f"🎯 Target: {target} | 👑 VIP arrivals: {sum(a.vip for a in arrivals)}")
+    print("=" * 80)
+    if args.dry_run or not arrivals:
+        return
+    try:
+        stats = asyncio.run(run_open_loop(arrivals, args.url, args.connections, args.depth, args.max_in_flight))
+        print_report(stats, target)
+    except KeyboardInterrupt:
+        print("\n🛑 Workload generator stopped manually.")
+
+
+if __name__ == "__main__":
+    main()